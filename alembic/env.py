@@ -1,3 +1,4 @@
+import re
 from logging.config import fileConfig
 from sqlalchemy import engine_from_config, pool
 from alembic import context
@@ -13,11 +14,29 @@ if config.config_file_name is not None:
 
 target_metadata = Base.metadata
 
+# search objects are created by raw DDL (migration 0006 / app.models.search),
+# not the metadata: FTS5 tables and their shadow tables on SQLite, the
+# tsvector columns and GIN indexes on Postgres
+SEARCH_TABLES = re.compile(r"^(invoices|expenses)_fts(_(data|idx|content|docsize|config))?$")
+SEARCH_INDEXES = {"ix_invoices_search", "ix_expenses_search"}
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """Keep autogenerate from proposing drops of objects the metadata does not model."""
+    if reflected and compare_to is None:
+        if type_ == "table" and SEARCH_TABLES.match(name):
+            return False
+        if type_ == "column" and name == "search_vector":
+            return False
+        if type_ == "index" and name in SEARCH_INDEXES:
+            return False
+    return True
+
 def run_migrations_offline():
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -34,7 +53,7 @@ def run_migrations_online():
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,131 @@
+"""initial schema
+
+Revision ID: 0001_initial_schema
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001_initial_schema"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "invoices",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("invoice_number", sa.String()),
+        sa.Column("issue_date", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("due_date", sa.DateTime(timezone=True)),
+        sa.Column("client_name", sa.String(), nullable=False),
+        sa.Column("client_email", sa.String()),
+        sa.Column("subtotal", sa.Numeric(12, 2)),
+        sa.Column("tax_amount", sa.Numeric(12, 2)),
+        sa.Column("total", sa.Numeric(12, 2)),
+        sa.Column("currency", sa.String()),
+        sa.Column("status", sa.Enum("draft", "sent", "paid", "cancelled", name="invoicestatus")),
+        sa.Column("tax_label", sa.String()),
+        sa.Column("tax_note", sa.String()),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+    )
+    op.create_index("ix_invoices_id", "invoices", ["id"])
+    op.create_index("ix_invoices_invoice_number", "invoices", ["invoice_number"], unique=True)
+
+    op.create_table(
+        "invoice_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("description", sa.String(), nullable=False),
+        sa.Column("quantity", sa.Numeric(10, 2)),
+        sa.Column("unit_price", sa.Numeric(12, 2), nullable=False),
+        sa.Column("line_total", sa.Numeric(12, 2)),
+        sa.Column("invoice_id", sa.Integer(), sa.ForeignKey("invoices.id"), nullable=False),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+    )
+    op.create_index("ix_invoice_items_id", "invoice_items", ["id"])
+
+    op.create_table(
+        "expenses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("date", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("amount", sa.Numeric(12, 2), nullable=False),
+        sa.Column("currency", sa.String()),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("description", sa.String()),
+        sa.Column("receipt_url", sa.String()),
+        sa.Column("status", sa.Enum("pending", "approved", "reimbursed", name="expensestatus")),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+    )
+    op.create_index("ix_expenses_id", "expenses", ["id"])
+
+    op.create_table(
+        "api_keys",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("key_prefix", sa.String(20)),
+        sa.Column("key_hash", sa.String(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True)),
+        sa.Column("last_used_at", sa.DateTime(timezone=True)),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+    )
+    op.create_index("ix_api_keys_id", "api_keys", ["id"])
+    op.create_index("ix_api_keys_key_prefix", "api_keys", ["key_prefix"])
+
+    op.create_table(
+        "tax_configs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("country", sa.String()),
+        sa.Column("rate", sa.Numeric(6, 3), nullable=False),
+        sa.Column("label", sa.String()),
+        sa.Column("note", sa.String()),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+    )
+    op.create_index("ix_tax_configs_id", "tax_configs", ["id"])
+
+    op.create_table(
+        "company_profiles",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("logo_path", sa.String()),
+        sa.Column("header_text", sa.String()),
+        sa.Column("tax_label", sa.String()),
+        sa.Column("tax_note", sa.String()),
+        sa.UniqueConstraint("owner_id", name="uq_company_profile_owner"),
+    )
+    op.create_index("ix_company_profiles_id", "company_profiles", ["id"])
+
+
+def downgrade():
+    op.drop_table("company_profiles")
+    op.drop_table("tax_configs")
+    op.drop_table("api_keys")
+    op.drop_table("expenses")
+    op.drop_table("invoice_items")
+    op.drop_table("invoices")
+    op.drop_table("users")
+    sa.Enum(name="expensestatus").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="invoicestatus").drop(op.get_bind(), checkfirst=True)
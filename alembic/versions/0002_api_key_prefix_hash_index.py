@@ -0,0 +1,38 @@
+"""api key (key_prefix, key_hash) unique index
+
+Revision ID: 0002_api_key_prefix_hash_index
+Revises: 0001_initial_schema
+Create Date: 2026-10-18
+
+Keys are now verified with a single lookup on (key_prefix, key_hash). Rows
+written before key_prefix was always populated get a placeholder prefix that
+no presented key can match; those keys must be rotated.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002_api_key_prefix_hash_index"
+down_revision = "0001_initial_schema"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("UPDATE api_keys SET key_prefix = 'legacy' WHERE key_prefix IS NULL")
+    # keep the oldest row if the same key was ever stored twice
+    op.execute(
+        "DELETE FROM api_keys WHERE id NOT IN ("
+        "SELECT min_id FROM (SELECT MIN(id) AS min_id FROM api_keys GROUP BY key_prefix, key_hash) AS keep)"
+    )
+    with op.batch_alter_table("api_keys") as batch:
+        batch.drop_index("ix_api_keys_key_prefix")
+        batch.alter_column("key_prefix", existing_type=sa.String(20), nullable=False)
+        batch.create_index("ix_api_keys_prefix_hash", ["key_prefix", "key_hash"], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table("api_keys") as batch:
+        batch.drop_index("ix_api_keys_prefix_hash")
+        batch.alter_column("key_prefix", existing_type=sa.String(20), nullable=True)
+        batch.create_index("ix_api_keys_key_prefix", ["key_prefix"])
@@ -0,0 +1,23 @@
+"""owner + created_at keyset indexes for invoice and expense listings
+
+Revision ID: 0003_owner_created_keyset_indexes
+Revises: 0002_api_key_prefix_hash_index
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0003_owner_created_keyset_indexes"
+down_revision = "0002_api_key_prefix_hash_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_invoices_owner_created", "invoices", ["owner_id", "created_at", "id"])
+    op.create_index("ix_expenses_owner_created", "expenses", ["owner_id", "created_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_expenses_owner_created", table_name="expenses")
+    op.drop_index("ix_invoices_owner_created", table_name="invoices")
@@ -0,0 +1,31 @@
+"""owner-scoped composite indexes for tenant queries
+
+Revision ID: 0004_owner_scoped_indexes
+Revises: 0003_owner_created_keyset_indexes
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0004_owner_scoped_indexes"
+down_revision = "0003_owner_created_keyset_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_invoices_owner_status", "invoices", ["owner_id", "status", "created_at", "id"])
+    op.create_index("ix_invoices_owner_due", "invoices", ["owner_id", "due_date"])
+    op.create_index("ix_expenses_owner_status", "expenses", ["owner_id", "status", "created_at", "id"])
+    op.create_index("ix_invoice_items_invoice_id", "invoice_items", ["invoice_id"])
+    op.create_index("ix_api_keys_owner_id", "api_keys", ["owner_id"])
+    op.create_index("ix_tax_configs_owner_id", "tax_configs", ["owner_id", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_tax_configs_owner_id", table_name="tax_configs")
+    op.drop_index("ix_api_keys_owner_id", table_name="api_keys")
+    op.drop_index("ix_invoice_items_invoice_id", table_name="invoice_items")
+    op.drop_index("ix_expenses_owner_status", table_name="expenses")
+    op.drop_index("ix_invoices_owner_due", table_name="invoices")
+    op.drop_index("ix_invoices_owner_status", table_name="invoices")
@@ -0,0 +1,44 @@
+"""email outbox table
+
+Revision ID: 0005_email_outbox
+Revises: 0004_owner_scoped_indexes
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005_email_outbox"
+down_revision = "0004_owner_scoped_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "email_outbox",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("to_address", sa.String(), nullable=False),
+        sa.Column("subject", sa.String(), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column("invoice_id", sa.Integer(), sa.ForeignKey("invoices.id"), nullable=True),
+        sa.Column("status", sa.Enum("pending", "sent", "dead", name="outboxstatus"), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_error", sa.String()),
+        sa.Column("sent_at", sa.DateTime(timezone=True)),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+    )
+    op.create_index("ix_email_outbox_id", "email_outbox", ["id"])
+    op.create_index("ix_email_outbox_owner_id", "email_outbox", ["owner_id"])
+    op.create_index("ix_email_outbox_due", "email_outbox", ["status", "next_attempt_at"])
+
+
+def downgrade():
+    op.drop_index("ix_email_outbox_due", table_name="email_outbox")
+    op.drop_index("ix_email_outbox_owner_id", table_name="email_outbox")
+    op.drop_index("ix_email_outbox_id", table_name="email_outbox")
+    op.drop_table("email_outbox")
+    sa.Enum(name="outboxstatus").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,135 @@
+"""full-text search indexes for invoices and expenses
+
+Revision ID: 0006_full_text_search
+Revises: 0005_email_outbox
+Create Date: 2026-10-18
+
+SQLite gets FTS5 tables, Postgres tsvector columns with GIN indexes; both
+are kept current by triggers and backfilled here. The DDL is a frozen copy
+of app.models.search as of this revision (which installs the same objects
+on fresh databases); later changes to the model need their own revision.
+"""
+from alembic import op
+
+
+revision = "0006_full_text_search"
+down_revision = "0005_email_outbox"
+branch_labels = None
+depends_on = None
+
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE invoices_fts USING fts5(
+        owner, client_name, invoice_number, items, tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE VIRTUAL TABLE expenses_fts USING fts5(
+        owner, category, description, tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER invoices_fts_ai AFTER INSERT ON invoices BEGIN
+        INSERT INTO invoices_fts(rowid, owner, client_name, invoice_number, items)
+        VALUES (new.id, 'u' || new.owner_id, new.client_name, new.invoice_number, '');
+    END""",
+    """CREATE TRIGGER invoices_fts_au AFTER UPDATE OF client_name, invoice_number, owner_id ON invoices BEGIN
+        UPDATE invoices_fts SET owner = 'u' || new.owner_id, client_name = new.client_name,
+            invoice_number = new.invoice_number
+        WHERE rowid = new.id;
+    END""",
+    """CREATE TRIGGER invoices_fts_ad AFTER DELETE ON invoices BEGIN
+        DELETE FROM invoices_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER invoice_items_fts_ai AFTER INSERT ON invoice_items BEGIN
+        UPDATE invoices_fts SET items = trim(items || ' ' || coalesce(new.description, ''))
+        WHERE rowid = new.invoice_id;
+    END""",
+    """CREATE TRIGGER invoice_items_fts_au AFTER UPDATE OF description, invoice_id ON invoice_items BEGIN
+        UPDATE invoices_fts SET items = coalesce(
+            (SELECT group_concat(description, ' ') FROM invoice_items WHERE invoice_id = old.invoice_id), '')
+        WHERE rowid = old.invoice_id;
+        UPDATE invoices_fts SET items = coalesce(
+            (SELECT group_concat(description, ' ') FROM invoice_items WHERE invoice_id = new.invoice_id), '')
+        WHERE rowid = new.invoice_id;
+    END""",
+    """CREATE TRIGGER invoice_items_fts_ad AFTER DELETE ON invoice_items BEGIN
+        UPDATE invoices_fts SET items = coalesce(
+            (SELECT group_concat(description, ' ') FROM invoice_items WHERE invoice_id = old.invoice_id), '')
+        WHERE rowid = old.invoice_id;
+    END""",
+    """CREATE TRIGGER expenses_fts_ai AFTER INSERT ON expenses BEGIN
+        INSERT INTO expenses_fts(rowid, owner, category, description)
+        VALUES (new.id, 'u' || new.owner_id, new.category, new.description);
+    END""",
+    """CREATE TRIGGER expenses_fts_au AFTER UPDATE OF category, description, owner_id ON expenses BEGIN
+        UPDATE expenses_fts SET owner = 'u' || new.owner_id, category = new.category,
+            description = new.description
+        WHERE rowid = new.id;
+    END""",
+    """CREATE TRIGGER expenses_fts_ad AFTER DELETE ON expenses BEGIN
+        DELETE FROM expenses_fts WHERE rowid = old.id;
+    END""",
+    """INSERT INTO invoices_fts(rowid, owner, client_name, invoice_number, items)
+        SELECT id, 'u' || owner_id, client_name, invoice_number, coalesce(
+            (SELECT group_concat(description, ' ') FROM invoice_items WHERE invoice_id = invoices.id), '')
+        FROM invoices""",
+    """INSERT INTO expenses_fts(rowid, owner, category, description)
+        SELECT id, 'u' || owner_id, category, description FROM expenses""",
+]
+
+POSTGRES_DDL = [
+    "ALTER TABLE invoices ADD COLUMN search_vector tsvector",
+    """CREATE OR REPLACE FUNCTION invoice_search_doc(inv_id integer, client text, number text)
+    RETURNS tsvector LANGUAGE sql STABLE AS $$
+        SELECT to_tsvector('simple', coalesce(client, '') || ' ' || coalesce(number, '') || ' ' ||
+            coalesce((SELECT string_agg(description, ' ') FROM invoice_items WHERE invoice_id = inv_id), ''))
+    $$""",
+    """CREATE OR REPLACE FUNCTION invoices_search_row() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        NEW.search_vector := invoice_search_doc(NEW.id, NEW.client_name, NEW.invoice_number);
+        RETURN NEW;
+    END $$""",
+    """CREATE TRIGGER invoices_search_row BEFORE INSERT OR UPDATE OF client_name, invoice_number
+        ON invoices FOR EACH ROW EXECUTE FUNCTION invoices_search_row()""",
+    """CREATE OR REPLACE FUNCTION invoice_items_search_refresh() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        UPDATE invoices i SET search_vector = invoice_search_doc(i.id, i.client_name, i.invoice_number)
+        WHERE i.id IN (SELECT invoice_id FROM changed_items);
+        RETURN NULL;
+    END $$""",
+    """CREATE TRIGGER invoice_items_search_ai AFTER INSERT ON invoice_items
+        REFERENCING NEW TABLE AS changed_items FOR EACH STATEMENT EXECUTE FUNCTION invoice_items_search_refresh()""",
+    """CREATE TRIGGER invoice_items_search_au AFTER UPDATE ON invoice_items
+        REFERENCING NEW TABLE AS changed_items FOR EACH STATEMENT EXECUTE FUNCTION invoice_items_search_refresh()""",
+    """CREATE TRIGGER invoice_items_search_ad AFTER DELETE ON invoice_items
+        REFERENCING OLD TABLE AS changed_items FOR EACH STATEMENT EXECUTE FUNCTION invoice_items_search_refresh()""",
+    "UPDATE invoices SET search_vector = invoice_search_doc(id, client_name, invoice_number)",
+    "CREATE INDEX ix_invoices_search ON invoices USING gin (search_vector)",
+    """ALTER TABLE expenses ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        to_tsvector('simple', coalesce(category, '') || ' ' || coalesce(description, ''))) STORED""",
+    "CREATE INDEX ix_expenses_search ON expenses USING gin (search_vector)",
+]
+
+
+def upgrade():
+    dialect = op.get_context().dialect.name
+    for statement in {"sqlite": SQLITE_DDL, "postgresql": POSTGRES_DDL}.get(dialect, []):
+        op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_context().dialect.name
+    if dialect == "sqlite":
+        for trigger in (
+            "invoices_fts_ai", "invoices_fts_au", "invoices_fts_ad",
+            "invoice_items_fts_ai", "invoice_items_fts_au", "invoice_items_fts_ad",
+            "expenses_fts_ai", "expenses_fts_au", "expenses_fts_ad",
+        ):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS invoices_fts")
+        op.execute("DROP TABLE IF EXISTS expenses_fts")
+    elif dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_expenses_search")
+        op.execute("ALTER TABLE expenses DROP COLUMN IF EXISTS search_vector")
+        op.execute("DROP INDEX IF EXISTS ix_invoices_search")
+        for trigger in ("invoice_items_search_ai", "invoice_items_search_au", "invoice_items_search_ad"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger} ON invoice_items")
+        op.execute("DROP TRIGGER IF EXISTS invoices_search_row ON invoices")
+        op.execute("DROP FUNCTION IF EXISTS invoice_items_search_refresh()")
+        op.execute("DROP FUNCTION IF EXISTS invoices_search_row()")
+        op.execute("DROP FUNCTION IF EXISTS invoice_search_doc(integer, text, text)")
+        op.execute("ALTER TABLE invoices DROP COLUMN IF EXISTS search_vector")
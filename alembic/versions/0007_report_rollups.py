@@ -0,0 +1,114 @@
+"""monthly report rollups maintained by triggers
+
+Revision ID: 0007_report_rollups
+Revises: 0006_full_text_search
+Create Date: 2026-10-18
+
+Creates report_rollups, installs its maintenance triggers and backfills it
+from the existing ledgers with one INSERT ... SELECT per ledger. The DDL is
+a frozen copy of app.models.rollup as of this revision; later changes to the
+model need their own revision.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007_report_rollups"
+down_revision = "0006_full_text_search"
+branch_labels = None
+depends_on = None
+
+# (table, kind, amount column)
+SOURCES = (("invoices", "invoice", "total"), ("expenses", "expense", "amount"))
+
+SQLITE_UPSERT = """INSERT INTO report_rollups(owner_id, kind, month, currency, status, count, total)
+        VALUES ({row}.owner_id, '{kind}', strftime('%Y-%m', {row}.created_at), coalesce({row}.currency, ''),
+            {row}.status, {sign}1, {sign}coalesce({row}.{amount}, 0))
+        ON CONFLICT(owner_id, kind, month, currency, status)
+        DO UPDATE SET count = count + excluded.count, total = round(total + excluded.total, 2);"""
+
+POSTGRES_APPLY = """INSERT INTO report_rollups(owner_id, kind, month, currency, status, count, total)
+            SELECT owner_id, '{kind}', to_char(created_at AT TIME ZONE 'UTC', 'YYYY-MM'),
+                coalesce(currency, ''), status::text, {sign}count(*), {sign}coalesce(sum({amount}), 0)
+            FROM {rows} GROUP BY 1, 3, 4, 5
+            ON CONFLICT (owner_id, kind, month, currency, status) DO UPDATE
+            SET count = report_rollups.count + excluded.count, total = report_rollups.total + excluded.total;"""
+
+BACKFILL = """INSERT INTO report_rollups(owner_id, kind, month, currency, status, count, total)
+    SELECT owner_id, '{kind}', {month}, coalesce(currency, ''), {status}, count(*), coalesce(sum({amount}), 0)
+    FROM {table} GROUP BY 1, 3, 4, 5"""
+
+
+def _sqlite_statements(table, kind, amount):
+    def upsert(row, sign):
+        return SQLITE_UPSERT.format(row=row, kind=kind, sign=sign, amount=amount)
+
+    changed = " OR ".join(f"old.{c} IS NOT new.{c}" for c in (amount, "status", "currency", "owner_id", "created_at"))
+    return [
+        f"CREATE TRIGGER {table}_rollup_ai AFTER INSERT ON {table} BEGIN {upsert('new', '')} END",
+        f"CREATE TRIGGER {table}_rollup_ad AFTER DELETE ON {table} BEGIN {upsert('old', '-')} END",
+        f"CREATE TRIGGER {table}_rollup_au AFTER UPDATE ON {table} WHEN {changed} BEGIN "
+        f"{upsert('old', '-')} {upsert('new', '')} END",
+        BACKFILL.format(
+            kind=kind, month="strftime('%Y-%m', created_at)", status="status", amount=amount, table=table,
+        ),
+    ]
+
+
+def _postgres_statements(table, kind, amount):
+    return [
+        f"""CREATE OR REPLACE FUNCTION {table}_rollup() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                {POSTGRES_APPLY.format(kind=kind, amount=amount, rows='old_rows', sign='-')}
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                {POSTGRES_APPLY.format(kind=kind, amount=amount, rows='new_rows', sign='')}
+            END IF;
+            RETURN NULL;
+        END $$""",
+        f"""CREATE TRIGGER {table}_rollup_ai AFTER INSERT ON {table}
+            REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION {table}_rollup()""",
+        f"""CREATE TRIGGER {table}_rollup_au AFTER UPDATE ON {table}
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION {table}_rollup()""",
+        f"""CREATE TRIGGER {table}_rollup_ad AFTER DELETE ON {table}
+            REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION {table}_rollup()""",
+        BACKFILL.format(
+            kind=kind, month="to_char(created_at AT TIME ZONE 'UTC', 'YYYY-MM')", status="status::text",
+            amount=amount, table=table,
+        ),
+    ]
+
+
+def upgrade():
+    op.create_table(
+        "report_rollups",
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("kind", sa.String(16), primary_key=True),
+        sa.Column("month", sa.String(7), primary_key=True),
+        sa.Column("currency", sa.String(), primary_key=True),
+        sa.Column("status", sa.String(16), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Numeric(14, 2), nullable=False),
+    )
+    dialect = op.get_context().dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        return
+    statements = _sqlite_statements if dialect == "sqlite" else _postgres_statements
+    for source in SOURCES:
+        for statement in statements(*source):
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_context().dialect.name
+    for table, _, _ in SOURCES:
+        for suffix in ("ai", "au", "ad"):
+            if dialect == "postgresql":
+                op.execute(f"DROP TRIGGER IF EXISTS {table}_rollup_{suffix} ON {table}")
+            else:
+                op.execute(f"DROP TRIGGER IF EXISTS {table}_rollup_{suffix}")
+        if dialect == "postgresql":
+            op.execute(f"DROP FUNCTION IF EXISTS {table}_rollup()")
+    op.drop_table("report_rollups")
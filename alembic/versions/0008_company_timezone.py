@@ -0,0 +1,22 @@
+"""company profile timezone for report buckets
+
+Revision ID: 0008_company_timezone
+Revises: 0007_report_rollups
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008_company_timezone"
+down_revision = "0007_report_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("company_profiles", sa.Column("timezone", sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("company_profiles", "timezone")
@@ -0,0 +1,27 @@
+"""fx reference rates for currency-converted reports
+
+Revision ID: 0009_fx_rates
+Revises: 0008_company_timezone
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009_fx_rates"
+down_revision = "0008_company_timezone"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "fx_rates",
+        sa.Column("currency", sa.String(length=3), primary_key=True),
+        sa.Column("date", sa.Date(), primary_key=True),
+        sa.Column("rate", sa.Numeric(18, 8), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("fx_rates")
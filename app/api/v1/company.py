@@ -5,19 +5,19 @@ from app.db.session import get_db
 from app.core.security import get_current_user
 from app.schemas.company_profile import CompanyProfileOut, CompanyProfileUpdate
 from app.crud.company_profile import get_or_create_profile, update_profile
-from app.models.user import User
+from app.core.auth_cache import Principal
 
 router = APIRouter()
 
 
 @router.get("/company/profile", response_model=CompanyProfileOut)
-def fetch_profile(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def fetch_profile(db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     profile = get_or_create_profile(db, current_user.id)
     return profile
 
 
 @router.patch("/company/profile", response_model=CompanyProfileOut)
-def edit_profile(data: CompanyProfileUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def edit_profile(data: CompanyProfileUpdate, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     return update_profile(db, current_user.id, data)
 
 
@@ -25,7 +25,7 @@ def edit_profile(data: CompanyProfileUpdate, db: Session = Depends(get_db), curr
 def upload_logo(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     if not file.content_type.startswith("image/"):
         raise HTTPException(400, "Only image uploads allowed")
@@ -1,31 +1,97 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile, File
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.schemas.expense import ExpenseCreate, ExpenseOut, ExpenseUpdate
 from app.crud.expense import create_expense, get_expenses, get_expense, update_expense
+from app.crud.export import EXPORT_FORMATS, expense_rows, serialize
+from app.crud.search import search_expenses
 from app.core.security import get_current_user
-from app.models.user import User
+from app.core.auth_cache import Principal
+from app.models.expense import ExpenseStatus
+from datetime import datetime
 import os
 
 router = APIRouter()
 
 @router.post("/", response_model=ExpenseOut)
-def create_new_expense(expense_data: ExpenseCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def create_new_expense(expense_data: ExpenseCreate, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     return create_expense(db, expense_data, current_user.id)
 
 @router.get("/", response_model=list[ExpenseOut])
-def list_expenses(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return get_expenses(db, current_user.id)
+def list_expenses(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = None,
+    status: ExpenseStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    category: str | None = None,
+    currency: str | None = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Newest first; when more rows exist the next page's cursor is in `X-Next-Cursor`."""
+    try:
+        expenses, next_cursor = get_expenses(
+            db, current_user.id, limit=limit, cursor=cursor, status=status,
+            created_from=created_from, created_to=created_to, category=category, currency=currency,
+        )
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return expenses
+
+@router.get("/search", response_model=list[ExpenseOut], summary="Full-text search over category and description")
+def search_expense_ledger(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Best match first; every word must match (as a prefix). Next page's cursor is in `X-Next-Cursor`."""
+    try:
+        expenses, next_cursor = search_expenses(db, current_user.id, q, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return expenses
+
+@router.get("/export", summary="Stream all matching expenses as CSV or NDJSON")
+def export_expenses(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    status: ExpenseStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    category: str | None = None,
+    currency: str | None = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Oldest first; memory use is flat in the row count."""
+    names, rows = expense_rows(
+        db, current_user.id, status=status, created_from=created_from, created_to=created_to,
+        category=category, currency=currency,
+    )
+    return StreamingResponse(
+        serialize(names, rows, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f"attachment; filename=expenses.{format}"},
+    )
 
 @router.get("/{expense_id}", response_model=ExpenseOut)
-def retrieve_expense(expense_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def retrieve_expense(expense_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     expense = get_expense(db, expense_id, current_user.id)
     if not expense:
         raise HTTPException(404)
     return expense
 
 @router.patch("/{expense_id}", response_model=ExpenseOut)
-def update_existing_expense(expense_id: int, update: ExpenseUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def update_existing_expense(expense_id: int, update: ExpenseUpdate, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     data = update.dict(exclude_unset=True)
     expense = update_expense(db, expense_id, data, current_user.id)
     if not expense:
@@ -38,7 +104,7 @@ def upload_receipt(
     expense_id: int,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     expense = get_expense(db, expense_id, current_user.id)
     if not expense:
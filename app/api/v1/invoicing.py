@@ -1,15 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
+from pydantic import EmailStr
 from app.db.session import get_db
-from app.schemas.invoice import InvoiceCreate, InvoiceOut, InvoiceUpdate
-from app.crud.invoice import create_invoice, get_invoices, get_invoice, update_invoice_status
+from app.schemas.invoice import (
+    DraftRecalculation, DraftRecalculationResult, InvoiceCreate, InvoiceHeaderOut, InvoiceOut, InvoiceUpdate,
+)
+from app.crud.invoice import (
+    create_invoice, get_invoices, get_invoice, update_invoice_status, import_invoices, recalculate_draft_totals,
+)
+from app.crud.outbox import enqueue_email
+from app.crud.export import EXPORT_FORMATS, invoice_rows, serialize
+from app.crud.search import search_invoices
 from app.core.security import get_current_user
-from app.models.user import User
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-import io
-import qrcode
+from app.core.auth_cache import Principal
+from app.models.invoice import InvoiceStatus
+from app.core.pdf import invoice_version, render_invoice_pdf
+from app.core.pdf_cache import pdf_cache
+from app.core.pdf_export import export_invoice_pdfs
+from app.core.http_cache import etag_matches, not_modified, validator_headers
+from app.core.qr import invoice_qr_payload, qr_etag, render_qr_png
+from datetime import datetime
+import tempfile
 
 router = APIRouter()
 
@@ -17,23 +29,158 @@ router = APIRouter()
 def create_new_invoice(
     invoice_data: InvoiceCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     return create_invoice(db, invoice_data, current_user.id)
 
-@router.get("/", response_model=list[InvoiceOut])
-def list_invoices(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return get_invoices(db, current_user.id)
+@router.post("/bulk", summary="Bulk-create invoices from an NDJSON stream")
+async def bulk_create_invoices(
+    request: Request,
+    chunk_size: int = 500,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Body: one InvoiceCreate JSON object per line. Response: one NDJSON result
+    per input line, streamed as each chunk of rows is committed.
+    """
+    # spool the upload (to disk past 1 MiB) so the response can stream while rows are processed
+    spool = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+
+    def report():
+        try:
+            for result in import_invoices(db, spool, current_user.id, chunk_size=max(1, chunk_size)):
+                yield result.model_dump_json(exclude_none=True) + "\n"
+        finally:
+            spool.close()
+
+    return StreamingResponse(report(), media_type="application/x-ndjson")
+
+@router.post("/recalculate-drafts", response_model=DraftRecalculationResult, summary="Re-total draft invoices")
+def recalculate_drafts(
+    params: DraftRecalculation,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Recompute subtotal, tax and total of every matching draft from its items,
+    e.g. after adding or changing a tax configuration.
+    """
+    updated, rate = recalculate_draft_totals(db, current_user.id, **params.model_dump())
+    return DraftRecalculationResult(updated=updated, tax_rate=rate)
+
+@router.get("/", response_model=list[InvoiceOut | InvoiceHeaderOut])
+def list_invoices(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = None,
+    status: InvoiceStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    client_name: str | None = None,
+    currency: str | None = None,
+    include_items: bool = True,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Newest first; when more rows exist the next page's cursor is in `X-Next-Cursor`.
+    `include_items=false` returns header rows without line items.
+    """
+    try:
+        invoices, next_cursor = get_invoices(
+            db, current_user.id, limit=limit, cursor=cursor, status=status,
+            created_from=created_from, created_to=created_to, client_name=client_name, currency=currency,
+            include_items=include_items,
+        )
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    schema = InvoiceOut if include_items else InvoiceHeaderOut
+    return [schema.model_validate(inv) for inv in invoices]
+
+@router.get("/search", response_model=list[InvoiceOut | InvoiceHeaderOut], summary="Full-text search over invoices")
+def search_invoice_ledger(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    include_items: bool = True,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Matches client name, invoice number and line-item descriptions; every word
+    must match (as a prefix). Best match first; next page's cursor is in `X-Next-Cursor`.
+    """
+    try:
+        invoices, next_cursor = search_invoices(
+            db, current_user.id, q, limit=limit, cursor=cursor, include_items=include_items,
+        )
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    schema = InvoiceOut if include_items else InvoiceHeaderOut
+    return [schema.model_validate(inv) for inv in invoices]
+
+@router.get("/export", summary="Stream all matching invoices as CSV or NDJSON")
+def export_invoices(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    status: InvoiceStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    client_name: str | None = None,
+    currency: str | None = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Oldest first, one row per invoice (totals, no line items); memory use is flat in the row count."""
+    names, rows = invoice_rows(
+        db, current_user.id, status=status, created_from=created_from, created_to=created_to,
+        client_name=client_name, currency=currency,
+    )
+    return StreamingResponse(
+        serialize(names, rows, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f"attachment; filename=invoices.{format}"},
+    )
+
+@router.get("/export/pdf", summary="ZIP of invoice PDFs matching a filter")
+def export_pdfs(
+    status: InvoiceStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    client_name: str | None = None,
+    currency: str | None = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Streams `invoices.zip`; PDFs are rendered in parallel worker processes and
+    each is sent as soon as it is ready.
+    """
+    chunks = export_invoice_pdfs(
+        db, current_user.id, status=status, created_from=created_from, created_to=created_to,
+        client_name=client_name, currency=currency,
+    )
+    return StreamingResponse(
+        chunks, media_type="application/zip", headers={"Content-Disposition": "attachment; filename=invoices.zip"}
+    )
 
 @router.get("/{invoice_id}", response_model=InvoiceOut)
-def retrieve_invoice(invoice_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def retrieve_invoice(invoice_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     invoice = get_invoice(db, invoice_id, current_user.id)
     if not invoice:
         raise HTTPException(404, "Invoice not found")
     return invoice
 
 @router.patch("/{invoice_id}")
-def mark_status(invoice_id: int, update: InvoiceUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def mark_status(invoice_id: int, update: InvoiceUpdate, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     invoice = update_invoice_status(db, invoice_id, update.status, current_user.id)
     if not invoice:
         raise HTTPException(404)
@@ -41,72 +188,71 @@ def mark_status(invoice_id: int, update: InvoiceUpdate, db: Session = Depends(ge
 
 
 @router.get("/{invoice_id}/pdf")
-def download_pdf(invoice_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def download_pdf(
+    invoice_id: int,
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
     invoice = get_invoice(db, invoice_id, current_user.id)
     if not invoice:
         raise HTTPException(404, "Invoice not found")
 
-    buf = io.BytesIO()
-    c = canvas.Canvas(buf, pagesize=A4)
-    width, height = A4
-
-    y = height - 50
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(50, y, f"Invoice {invoice.invoice_number}")
-    y -= 25
-    c.setFont("Helvetica", 12)
-    c.drawString(50, y, f"Client: {invoice.client_name}")
-    y -= 18
-    c.drawString(50, y, f"Issue date: {invoice.issue_date}")
-    y -= 18
-    c.drawString(50, y, f"Due date: {invoice.due_date}")
-    y -= 25
-    c.drawString(50, y, f"Currency: {invoice.currency}")
-    y -= 18
-    c.drawString(50, y, f"Subtotal: {invoice.subtotal}")
-    y -= 18
-    c.drawString(50, y, f"Tax: {invoice.tax_amount}")
-    y -= 18
-    c.drawString(50, y, f"Total: {invoice.total}")
-    y -= 30
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(50, y, "Items:")
-    y -= 20
-    c.setFont("Helvetica", 11)
-    for item in invoice.items:
-        c.drawString(60, y, f"{item.description} x{item.quantity} @ {item.unit_price} = {item.line_total}")
-        y -= 16
-        if y < 100:
-            c.showPage()
-            y = height - 50
-    c.showPage()
-    c.save()
-    buf.seek(0)
-    return StreamingResponse(buf, media_type="application/pdf", headers={"Content-Disposition": f"attachment; filename=invoice_{invoice.invoice_number}.pdf"})
+    version = invoice_version(invoice)
+    etag = f'"pdf-{invoice.id}-{version}"'
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    headers = {
+        "Content-Disposition": f"attachment; filename=invoice_{invoice.invoice_number}.pdf",
+        **validator_headers(etag),
+    }
+    path = pdf_cache.get(invoice.id, version)
+    if path:
+        return FileResponse(path, media_type="application/pdf", headers=headers)
+    pdf = render_invoice_pdf(invoice)
+    pdf_cache.put(invoice.id, version, pdf)
+    return Response(pdf, media_type="application/pdf", headers=headers)
 
 
 @router.get("/{invoice_id}/qrcode")
-def invoice_qr(invoice_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def invoice_qr(
+    invoice_id: int,
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
     invoice = get_invoice(db, invoice_id, current_user.id)
     if not invoice:
         raise HTTPException(404, "Invoice not found")
-    payment_payload = f"invoice:{invoice.invoice_number}|amount:{invoice.total}|currency:{invoice.currency}"
-    img = qrcode.make(payment_payload)
-    buf = io.BytesIO()
-    img.save(buf, format="PNG")
-    buf.seek(0)
-    return StreamingResponse(buf, media_type="image/png", headers={"Content-Disposition": f"inline; filename=invoice_{invoice.invoice_number}_qr.png"})
+    payment_payload = invoice_qr_payload(invoice)
+    etag = qr_etag(payment_payload)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    headers = {
+        "Content-Disposition": f"inline; filename=invoice_{invoice.invoice_number}_qr.png",
+        **validator_headers(etag),
+    }
+    return Response(render_qr_png(payment_payload), media_type="image/png", headers=headers)
 
 
 @router.post("/{invoice_id}/email")
 def email_invoice(
     invoice_id: int,
-    to: str,
+    to: EmailStr,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
+    """Queue the invoice PDF for delivery; the outbox worker sends it with retries."""
     invoice = get_invoice(db, invoice_id, current_user.id)
     if not invoice:
         raise HTTPException(404, "Invoice not found")
-    # Stub: in production integrate with SendGrid/SMTP. For now just acknowledge.
-    return {"status": "queued", "to": to, "note": "Email send stubbed; integrate with SendGrid or SMTP."}
+    email = enqueue_email(
+        db,
+        current_user.id,
+        to,
+        subject=f"Invoice {invoice.invoice_number}",
+        body=f"Please find attached invoice {invoice.invoice_number} for {invoice.total} {invoice.currency}.",
+        invoice_id=invoice.id,
+    )
+    db.commit()
+    return {"status": "queued", "to": to, "id": email.id}
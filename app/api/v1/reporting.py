@@ -1,61 +1,91 @@
-from fastapi import APIRouter, Depends
+from datetime import date, datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
 from app.db.session import get_db
 from app.core.security import get_current_user
-from app.models.invoice import Invoice
-from app.models.expense import Expense
-from app.models.user import User
+from app.core.auth_cache import Principal
+from app.core.report_cache import report_cache
+from app.crud import rollup
+from app.crud.aging import AGING_CLIENT_LIMIT, MAX_AGING_CLIENTS, aging as receivables_aging, aging_date
+from app.crud.timeseries import timeseries as bucketed_totals
 
 router = APIRouter()
 
 
+REPORTING_CURRENCY = Query(
+    None, pattern="^[A-Za-z]{3}$", description="Also convert totals into this currency at month-end FX rates",
+)
+
+
 @router.get("/reports/summary", summary="Totals for invoices and expenses")
-def summary(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    inv_sum = (
-        db.query(
-            func.coalesce(func.sum(Invoice.total), 0).label("total"),
-            func.count(Invoice.id).label("count"),
-        )
-        .filter(Invoice.owner_id == current_user.id)
-        .first()
-    )
-    exp_sum = (
-        db.query(
-            func.coalesce(func.sum(Expense.amount), 0).label("total"),
-            func.count(Expense.id).label("count"),
-        )
-        .filter(Expense.owner_id == current_user.id)
-        .first()
-    )
-    return {
-        "invoices": {"count": int(inv_sum.count), "total": str(inv_sum.total)},
-        "expenses": {"count": int(exp_sum.count), "total": str(exp_sum.total)},
-    }
+def summary(
+    currency: str | None = REPORTING_CURRENCY,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Counts and totals, also split `by_currency` and `by_status`; read from the
+    monthly rollup. With `currency`, `converted` holds the total in that
+    currency plus any `unconverted` amounts that have no FX rate.
+    """
+    owner_id, params = current_user.id, {"currency": currency and currency.upper()}
+    return report_cache.get_or_compute(owner_id, "summary", params, lambda: rollup.summary(db, owner_id, **params))
 
 
 @router.get("/reports/monthly", summary="Monthly totals for invoices and expenses")
-def monthly(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    invoices = (
-        db.query(
-            func.strftime("%Y-%m", Invoice.created_at).label("month"),
-            func.coalesce(func.sum(Invoice.total), 0).label("total"),
+def monthly(
+    currency: str | None = REPORTING_CURRENCY,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Per-month (UTC) totals, oldest first; read from the monthly rollup. `currency` adds `converted`."""
+    owner_id, params = current_user.id, {"currency": currency and currency.upper()}
+    return report_cache.get_or_compute(owner_id, "monthly", params, lambda: rollup.monthly(db, owner_id, **params))
+
+
+@router.get("/reports/timeseries", summary="Invoice and expense totals per day/week/month/quarter/year")
+def timeseries(
+    granularity: str = Query("month", pattern="^(day|week|month|quarter|year)$"),
+    tz: str | None = Query(None, description="IANA timezone; defaults to the company profile's, else UTC"),
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Buckets are labelled with their local start date (weeks start on Monday),
+    oldest first. Naive `created_from`/`created_to` are read in the report timezone.
+    """
+    params = {"granularity": granularity, "tz": tz, "created_from": created_from, "created_to": created_to}
+    try:
+        return report_cache.get_or_compute(
+            current_user.id, "timeseries", params, lambda: bucketed_totals(db, current_user.id, **params)
         )
-        .filter(Invoice.owner_id == current_user.id)
-        .group_by("month")
-        .all()
-    )
-    expenses = (
-        db.query(
-            func.strftime("%Y-%m", Expense.created_at).label("month"),
-            func.coalesce(func.sum(Expense.amount), 0).label("total"),
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+
+
+@router.get("/reports/aging", summary="Accounts-receivable aging of sent invoices")
+def aging(
+    as_of: date | None = Query(None, description="Aging date; defaults to today in the report timezone"),
+    tz: str | None = Query(None, description="IANA timezone; defaults to the company profile's, else UTC"),
+    limit: int = Query(AGING_CLIENT_LIMIT, ge=0, le=MAX_AGING_CLIENTS, description="Largest clients to list"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Outstanding totals in current / 1-30 / 31-60 / 61-90 / 90+ days past due,
+    per currency and for the `limit` largest clients. Invoices without a due
+    date are current.
+    """
+    try:
+        # key on the resolved date: a cached "today" must not outlive the day
+        as_of, tz = aging_date(db, current_user.id, as_of, tz)
+        params = {"as_of": as_of, "tz": tz, "limit": limit}
+        return report_cache.get_or_compute(
+            current_user.id, "aging", params, lambda: receivables_aging(db, current_user.id, **params)
         )
-        .filter(Expense.owner_id == current_user.id)
-        .group_by("month")
-        .all()
-    )
-    return {
-        "invoices": [{"month": m.month, "total": str(m.total)} for m in invoices],
-        "expenses": [{"month": m.month, "total": str(m.total)} for m in expenses],
-    }
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
@@ -63,11 +63,30 @@ def list_tools():
             },
             "output": "InvoiceOut",
         },
+        {
+            "name": "invoices.bulk_create",
+            "method": "POST",
+            "path": "/api/v1/invoices/bulk",
+            "input": (
+                "application/x-ndjson: one invoices.create object per line; query chunk_size=int "
+                "(MCP: `rows` list, at most 1000 per call)"
+            ),
+            "output": "application/x-ndjson: {line, ok, id|null, invoice_number|null, error|null} per row",
+        },
         {
             "name": "invoices.list",
             "method": "GET",
             "path": "/api/v1/invoices",
-            "input": {},
+            "input": {
+                "limit": "int (1-500, default 100)",
+                "cursor": "string|null (from X-Next-Cursor)",
+                "status": "draft|sent|paid|cancelled|null",
+                "created_from": "datetime|null",
+                "created_to": "datetime|null",
+                "client_name": "string|null",
+                "currency": "string|null",
+                "include_items": "bool (default true; false returns InvoiceHeaderOut)",
+            },
             "output": ["InvoiceOut"],
         },
         {
@@ -77,6 +96,58 @@ def list_tools():
             "input": {},
             "output": "application/pdf",
         },
+        {
+            "name": "invoices.recalculate_drafts",
+            "method": "POST",
+            "path": "/api/v1/invoices/recalculate-drafts",
+            "input": {
+                "tax_rate": "decimal|null (percent; default: the user's default tax config)",
+                "client_name": "string|null",
+                "currency": "string|null",
+                "created_from": "datetime|null",
+                "created_to": "datetime|null",
+            },
+            "output": {"updated": "int", "tax_rate": "decimal"},
+        },
+        {
+            "name": "invoices.search",
+            "method": "GET",
+            "path": "/api/v1/invoices/search",
+            "input": {
+                "q": "string (words matched as prefixes against client name, number and item descriptions)",
+                "limit": "int (1-100, default 20)",
+                "cursor": "string|null (from X-Next-Cursor)",
+                "include_items": "bool (default true; false returns InvoiceHeaderOut)",
+            },
+            "output": ["InvoiceOut"],
+        },
+        {
+            "name": "invoices.export",
+            "method": "GET",
+            "path": "/api/v1/invoices/export",
+            "input": {
+                "format": "csv|ndjson (default csv)",
+                "status": "draft|sent|paid|cancelled|null",
+                "created_from": "datetime|null",
+                "created_to": "datetime|null",
+                "client_name": "string|null",
+                "currency": "string|null",
+            },
+            "output": "text/csv or application/x-ndjson (streamed; one row per invoice, oldest first)",
+        },
+        {
+            "name": "invoices.export_pdfs",
+            "method": "GET",
+            "path": "/api/v1/invoices/export/pdf",
+            "input": {
+                "status": "draft|sent|paid|cancelled|null",
+                "created_from": "datetime|null",
+                "created_to": "datetime|null",
+                "client_name": "string|null",
+                "currency": "string|null",
+            },
+            "output": "application/zip (streamed; one invoice_<number>.pdf per invoice)",
+        },
         {
             "name": "invoices.qrcode",
             "method": "GET",
@@ -89,7 +160,7 @@ def list_tools():
             "method": "POST",
             "path": "/api/v1/invoices/{id}/email",
             "input": {"to": "email"},
-            "output": {"status": "queued", "note": "string"},
+            "output": {"status": "queued", "to": "string", "id": "int (outbox entry; delivered asynchronously)"},
         },
         {
             "name": "expenses.create",
@@ -108,9 +179,42 @@ def list_tools():
             "name": "expenses.list",
             "method": "GET",
             "path": "/api/v1/expenses",
-            "input": {},
+            "input": {
+                "limit": "int (1-500, default 100)",
+                "cursor": "string|null (from X-Next-Cursor)",
+                "status": "pending|approved|reimbursed|null",
+                "created_from": "datetime|null",
+                "created_to": "datetime|null",
+                "category": "string|null",
+                "currency": "string|null",
+            },
             "output": ["ExpenseOut"],
         },
+        {
+            "name": "expenses.search",
+            "method": "GET",
+            "path": "/api/v1/expenses/search",
+            "input": {
+                "q": "string (words matched as prefixes against category and description)",
+                "limit": "int (1-100, default 20)",
+                "cursor": "string|null (from X-Next-Cursor)",
+            },
+            "output": ["ExpenseOut"],
+        },
+        {
+            "name": "expenses.export",
+            "method": "GET",
+            "path": "/api/v1/expenses/export",
+            "input": {
+                "format": "csv|ndjson (default csv)",
+                "status": "pending|approved|reimbursed|null",
+                "created_from": "datetime|null",
+                "created_to": "datetime|null",
+                "category": "string|null",
+                "currency": "string|null",
+            },
+            "output": "text/csv or application/x-ndjson (streamed; one row per expense, oldest first)",
+        },
         {
             "name": "expenses.upload_receipt",
             "method": "POST",
@@ -122,15 +226,64 @@ def list_tools():
             "name": "reports.summary",
             "method": "GET",
             "path": "/api/v1/reports/summary",
-            "input": {},
-            "output": {"invoices": {"count": "int", "total": "decimal"}, "expenses": {"count": "int", "total": "decimal"}},
+            "input": {"currency": "string|null (ISO code; adds totals converted at month-end FX rates)"},
+            "output": {
+                "invoices": {"count": "int", "total": "decimal", "by_currency": {"<currency>": "decimal"},
+                             "by_status": {"<status>": "decimal"},
+                             "converted": {"currency": "string", "total": "decimal",
+                                           "unconverted": {"<currency>": "decimal"}}},
+                "expenses": {"count": "int", "total": "decimal", "by_currency": {"<currency>": "decimal"},
+                             "by_status": {"<status>": "decimal"},
+                             "converted": {"currency": "string", "total": "decimal",
+                                           "unconverted": {"<currency>": "decimal"}}},
+            },
         },
         {
             "name": "reports.monthly",
             "method": "GET",
             "path": "/api/v1/reports/monthly",
-            "input": {},
-            "output": {"invoices": [{"month": "YYYY-MM", "total": "decimal"}], "expenses": [{"month": "YYYY-MM", "total": "decimal"}]},
+            "input": {"currency": "string|null (ISO code; adds converted/unconverted per month)"},
+            "output": {
+                "invoices": [{"month": "YYYY-MM", "total": "decimal", "converted": "decimal", "unconverted": "decimal"}],
+                "expenses": [{"month": "YYYY-MM", "total": "decimal", "converted": "decimal", "unconverted": "decimal"}],
+            },
+        },
+        {
+            "name": "reports.timeseries",
+            "method": "GET",
+            "path": "/api/v1/reports/timeseries",
+            "input": {
+                "granularity": "day|week|month|quarter|year (default month)",
+                "tz": "string|null (IANA name; default: company profile timezone, else UTC)",
+                "created_from": "datetime|null",
+                "created_to": "datetime|null",
+            },
+            "output": {
+                "granularity": "string",
+                "timezone": "string",
+                "invoices": [{"period": "YYYY-MM-DD (bucket start)", "count": "int", "total": "decimal"}],
+                "expenses": [{"period": "YYYY-MM-DD (bucket start)", "count": "int", "total": "decimal"}],
+            },
+        },
+        {
+            "name": "reports.aging",
+            "method": "GET",
+            "path": "/api/v1/reports/aging",
+            "input": {
+                "as_of": "date|null (default: today in tz)",
+                "tz": "string|null (IANA name; default: company profile timezone, else UTC)",
+                "limit": "int (largest clients to list, default 10, max 100)",
+            },
+            "output": {
+                "as_of": "YYYY-MM-DD",
+                "timezone": "string",
+                "currencies": {"<currency>": {"current": "decimal", "days_1_30": "decimal", "days_31_60": "decimal",
+                                              "days_61_90": "decimal", "days_over_90": "decimal", "total": "decimal"}},
+                "clients": [{"client_name": "string", "currency": "string", "count": "int", "current": "decimal",
+                             "days_1_30": "decimal", "days_31_60": "decimal", "days_61_90": "decimal",
+                             "days_over_90": "decimal", "total": "decimal"}],
+                "clients_omitted": "int",
+            },
         },
         {
             "name": "tax.configs.create",
@@ -157,7 +310,12 @@ def list_tools():
             "name": "company.profile.update",
             "method": "PATCH",
             "path": "/api/v1/company/profile",
-            "input": {"header_text": "string|null", "tax_label": "string|null", "tax_note": "string|null"},
+            "input": {
+                "header_text": "string|null",
+                "tax_label": "string|null",
+                "tax_note": "string|null",
+                "timezone": "string|null (IANA name, e.g. Europe/Berlin; default for report buckets)",
+            },
             "output": "CompanyProfileOut",
         },
         {
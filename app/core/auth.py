@@ -0,0 +1,104 @@
+"""
+Credential resolution shared by the REST API and the MCP server.
+
+Both entry points hand the raw `Authorization` / `x-api-key` header values to
+`resolve_credentials` (sync) or `resolve_credentials_async`. Cache hits are
+answered without any I/O; only misses touch the database. The async variant
+takes a session factory rather than a session, so a hit never opens a
+session or occupies a worker thread.
+"""
+from contextlib import AbstractContextManager
+from typing import Callable
+from datetime import datetime, timezone
+from jose import JWTError, jwt
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.auth_cache import Principal, credential_digest, expiry_timestamp, principal_cache
+from app.core.config import settings
+from app.core.last_used import last_used_buffer
+from app.crud.api_key import verify_api_key
+from app.crud.user import get_user_by_email
+
+API_KEY_PREFIX = "mcp_u"
+
+
+class AuthError(ValueError):
+    """Missing or invalid credentials; the message is safe to return to callers."""
+
+
+def _credential(authorization: str | None, api_key: str | None) -> tuple[str, str]:
+    if authorization and authorization.startswith("Bearer "):
+        return "jwt", authorization[len("Bearer "):]
+    if api_key:
+        return "key", api_key
+    raise AuthError("Missing credentials")
+
+
+def _api_key_owner_id(api_key: str) -> int:
+    parts = api_key.split("_", 2)
+    if not api_key.startswith(API_KEY_PREFIX) or len(parts) != 3:
+        raise AuthError("Invalid API key format")
+    try:
+        return int(parts[1][1:])
+    except ValueError as exc:
+        raise AuthError("Invalid API key format") from exc
+
+
+def _from_cache(digest: str) -> Principal | None:
+    principal = principal_cache.get(digest)
+    if principal and principal.key_id is not None:
+        last_used_buffer.touch(principal.key_id, datetime.now(timezone.utc))
+    return principal
+
+
+def _load(db: Session, kind: str, credential: str, digest: str) -> Principal:
+    """Resolve a credential against the database and cache the result."""
+    if kind == "jwt":
+        try:
+            payload = jwt.decode(credential, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError as exc:
+            raise AuthError("Invalid token") from exc
+        email = payload.get("sub")
+        if not email:
+            raise AuthError("Invalid token")
+        user = get_user_by_email(db, email)
+        if not user:
+            raise AuthError("User not found")
+        principal = Principal(id=user.id, email=user.email)
+        principal_cache.put(digest, principal, expires_at=payload.get("exp"))
+        return principal
+
+    user_id = _api_key_owner_id(credential)
+    key_obj = verify_api_key(db, credential)
+    if not key_obj or key_obj.owner_id != user_id:
+        raise AuthError("Invalid API key")
+    principal = Principal(id=key_obj.owner_id, email=key_obj.owner.email, key_id=key_obj.id)
+    last_used_buffer.touch(key_obj.id, datetime.now(timezone.utc))
+    principal_cache.put(digest, principal, expires_at=expiry_timestamp(key_obj.expires_at))
+    return principal
+
+
+def resolve_credentials(db: Session, authorization: str | None, api_key: str | None) -> Principal:
+    kind, credential = _credential(authorization, api_key)
+    digest = credential_digest(kind, credential)
+    return _from_cache(digest) or _load(db, kind, credential, digest)
+
+
+def _load_in_scope(scope: Callable[[], AbstractContextManager[Session]], kind: str, credential: str, digest: str):
+    with scope() as db:
+        return _load(db, kind, credential, digest)
+
+
+async def resolve_credentials_async(
+    scope: Callable[[], AbstractContextManager[Session]], authorization: str | None, api_key: str | None,
+) -> Principal:
+    """
+    Like `resolve_credentials`, but hits are answered on the event loop; only a
+    miss opens a session from `scope` (e.g. `session_scope`) in a worker thread.
+    """
+    kind, credential = _credential(authorization, api_key)
+    digest = credential_digest(kind, credential)
+    principal = _from_cache(digest)
+    if principal:
+        return principal
+    return await run_in_threadpool(_load_in_scope, scope, kind, credential, digest)
@@ -0,0 +1,107 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Authenticated caller as seen by endpoints and MCP tools."""
+    id: int
+    email: str | None = None
+    key_id: int | None = None
+
+
+def credential_digest(kind: str, credential: str) -> str:
+    return f"{kind}:{hashlib.sha256(credential.encode('utf-8')).hexdigest()}"
+
+
+def expiry_timestamp(value: datetime | None) -> float | None:
+    if value is None:
+        return None
+    if value.tzinfo is None:  # SQLite drops the offset; values are stored in UTC
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class PrincipalCache:
+    """
+    Bounded TTL/LRU map from a credential digest to the resolved principal.
+
+    Each entry lives for at most `ttl_seconds` and never past the credential's
+    own expiry. The cache is per process: a key revoked on another worker stays
+    valid here for up to `ttl_seconds`.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[Principal, float]] = OrderedDict()
+        self._by_key_id: dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def get(self, digest: str) -> Principal | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            principal, deadline = entry
+            if deadline <= now:
+                self._drop(digest)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return principal
+
+    def put(self, digest: str, principal: Principal, expires_at: float | None = None):
+        """Store a principal; `expires_at` is the credential's unix expiry, if any."""
+        ttl = self.ttl
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._drop(digest)
+            self._entries[digest] = (principal, time.monotonic() + ttl)
+            if principal.key_id is not None:
+                self._by_key_id[principal.key_id] = digest
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_key(self, key_id: int):
+        with self._lock:
+            digest = self._by_key_id.get(key_id)
+            if digest is not None:
+                self._drop(digest)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_key_id.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+    def _drop(self, digest: str):
+        entry = self._entries.pop(digest, None)
+        if entry is not None and entry[0].key_id is not None:
+            self._by_key_id.pop(entry[0].key_id, None)
+
+
+principal_cache = PrincipalCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
@@ -5,9 +5,38 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 43200
-    RATE_LIMIT_PER_MINUTE: int = 120  # simple in-memory limiter
-    REDIS_URL: str | None = None      # if set, rate limiting uses Redis
+    RATE_LIMIT_PER_MINUTE: int = 120  # token bucket size; refills over a minute
+    RATE_LIMIT_MAX_KEYS: int = 100000  # cap on keys tracked by the in-memory limiter
+    # glob on request path -> tokens charged per request (default 1)
+    RATE_LIMIT_ROUTE_COSTS: dict[str, int] = {
+        "/api/v1/invoices/*/pdf": 5,
+        "/api/v1/invoices/*/qrcode": 2,
+    }
+    REDIS_URL: str | None = None      # if set, rate limiting and the report cache use Redis
     REQUIRE_HTTPS: bool = True        # enforce HTTPS by default
+    AUTH_CACHE_MAX_ENTRIES: int = 10000  # resolved-credential cache, per process
+    AUTH_CACHE_TTL_SECONDS: float = 60
+    API_KEY_LAST_USED_FLUSH_SECONDS: float = 30  # write-behind interval for last_used_at
+    PASSWORD_HASH_WORKERS: int = 2    # dedicated bcrypt threads
+    PASSWORD_HASH_MAX_QUEUE: int = 16  # waiting hashes before /auth answers 503
+    PDF_CACHE_DIR: str = "./.cache/pdf"  # rendered invoice PDFs (content-addressed)
+    PDF_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # LRU eviction past this size
+    PDF_EXPORT_WORKERS: int | None = None  # batch export render processes; default: CPU count
+    QR_CACHE_MAX_ENTRIES: int = 1024  # memoized payment QR images, per process
+    REPORT_CACHE_MAX_ENTRIES: int = 10000  # per-process report results (memory backend)
+    REPORT_CACHE_TTL_SECONDS: float = 60  # max age of a cached report; 0 disables the cache
+    FX_BASE_CURRENCY: str = "EUR"     # quote currency of fx_rates rows (rate = units per 1 base)
+    INVOICE_CACHE_CONTROL: str = "private, no-cache"  # PDF/QR responses; clients revalidate by ETag
+    SMTP_HOST: str | None = None      # if set, the API process runs the email outbox worker
+    SMTP_PORT: int = 587
+    SMTP_USERNAME: str | None = None
+    SMTP_PASSWORD: str | None = None
+    SMTP_STARTTLS: bool = True
+    EMAIL_FROM: str = "invoices@localhost"
+    OUTBOX_BATCH_SIZE: int = 50       # emails leased per worker round
+    OUTBOX_POLL_SECONDS: float = 2    # idle wait between rounds
+    OUTBOX_MAX_ATTEMPTS: int = 8      # then the email is dead-lettered
+    OUTBOX_BACKOFF_SECONDS: float = 30  # first retry delay; doubles per attempt
     MCP_HOST: str = "0.0.0.0"
     MCP_PORT: int = 9000
     MCP_AUTH_REQUIRED: bool = True
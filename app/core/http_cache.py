@@ -0,0 +1,21 @@
+from fastapi import Response
+from app.core.config import settings
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match check; uses weak comparison as RFC 9110 requires for this header."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag.removeprefix("W/") in candidates
+
+
+def validator_headers(etag: str) -> dict[str, str]:
+    # responses are per caller, so shared caches must key on the credential
+    return {"ETag": etag, "Cache-Control": settings.INVOICE_CACHE_CONTROL, "Vary": "Authorization, X-API-Key"}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag))
@@ -0,0 +1,93 @@
+import logging
+import threading
+from datetime import datetime
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.api_key import ApiKey
+
+logger = logging.getLogger(__name__)
+
+
+class LastUsedBuffer:
+    """
+    Write-behind buffer for ApiKey.last_used_at.
+
+    The auth path only records (key_id, timestamp) in memory; a background
+    thread writes the latest timestamp per key in one bulk UPDATE every
+    `interval_seconds`, and once more on shutdown.
+    """
+
+    def __init__(self, interval_seconds: float = 30.0):
+        self.interval = interval_seconds
+        self._pending: dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def touch(self, key_id: int, used_at: datetime):
+        with self._lock:
+            self._pending[key_id] = used_at
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self, db: Session | None = None) -> int:
+        """Write buffered timestamps; returns the number of keys flushed."""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+        rows = [{"key_id": key_id, "used_at": used_at} for key_id, used_at in batch.items()]
+        stmt = (
+            update(ApiKey.__table__)
+            .where(ApiKey.__table__.c.id == bindparam("key_id"))
+            .values(last_used_at=bindparam("used_at"))
+        )
+        own_session = db is None
+        if own_session:
+            db = SessionLocal()
+        try:
+            db.execute(stmt, rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # put the batch back unless newer timestamps arrived meanwhile
+            with self._lock:
+                for key_id, used_at in batch.items():
+                    self._pending.setdefault(key_id, used_at)
+            raise
+        finally:
+            if own_session:
+                db.close()
+        return len(rows)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="api-key-last-used", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush api key last_used_at")
+
+
+last_used_buffer = LastUsedBuffer(settings.API_KEY_LAST_USED_FLUSH_SECONDS)
@@ -0,0 +1,57 @@
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.config import settings
+from app.core.ratelimit import build_limiter, route_cost
+
+INSECURE_OK_HOSTS = {"127.0.0.1", "localhost", "testserver"}
+
+
+def get_limiter(app):
+    """The limiter on `app.state`, built once on first use if startup did not set it."""
+    limiter = getattr(app.state, "limiter", None)
+    if limiter is None:
+        limiter = build_limiter(
+            settings.REDIS_URL, settings.RATE_LIMIT_PER_MINUTE, 60, settings.RATE_LIMIT_MAX_KEYS
+        )
+        app.state.limiter = limiter
+    return limiter
+
+
+class RateLimitMiddleware:
+    """
+    Rate limiting and HTTPS enforcement as plain ASGI.
+
+    Only the request line and headers are inspected; admitted requests are
+    passed through untouched, so streaming responses are never buffered or
+    re-wrapped.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        # key by api-key if present, else client host
+        client = scope.get("client")
+        key = headers.get("x-api-key") or (client[0] if client else "unknown")
+        try:
+            get_limiter(scope["app"]).check(key, cost=route_cost(scope["path"], settings.RATE_LIMIT_ROUTE_COSTS))
+            if settings.REQUIRE_HTTPS:
+                # Only enforce when behind a proxy that sets X-Forwarded-Proto.
+                # Direct Uvicorn connections are plain HTTP (TLS terminates at the proxy).
+                forwarded_proto = headers.get("x-forwarded-proto")
+                host = (headers.get("host", "") or "").split(":", 1)[0]
+                if forwarded_proto and forwarded_proto != "https" and host not in INSECURE_OK_HOSTS:
+                    raise HTTPException(status_code=400, detail="HTTPS required")
+        except HTTPException as exc:
+            response = JSONResponse(status_code=exc.status_code, content={"detail": exc.detail}, headers=exc.headers)
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
@@ -0,0 +1,234 @@
+"""
+Delivery worker for the email outbox.
+
+Requests only insert `OutboxEmail` rows (in their own transaction). This
+worker leases due rows in batches, sends them over one long-lived SMTP
+connection, and records the outcome: sent, retry later with exponential
+backoff, or dead-lettered after a permanent (5xx) rejection or too many
+attempts. It runs as an asyncio task inside the API process when SMTP_HOST
+is set, or standalone via `python -m app.core.outbox`.
+"""
+import asyncio
+import logging
+from email.message import EmailMessage
+import aiosmtplib
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.pdf import invoice_version, render_invoice_pdf
+from app.core.pdf_cache import pdf_cache
+from app.crud.invoice import get_invoice
+from app.crud.outbox import claim_due_emails, mark_failed, mark_sent
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def _is_permanent(exc: Exception) -> bool:
+    if isinstance(exc, aiosmtplib.SMTPRecipientsRefused):
+        return all(500 <= r.code < 600 for r in exc.recipients)
+    if isinstance(exc, aiosmtplib.SMTPResponseException):
+        return 500 <= exc.code < 600
+    return False
+
+
+class OutboxWorker:
+    def __init__(
+        self,
+        smtp_host: str | None,
+        smtp_port: int = 587,
+        sender: str = "invoices@localhost",
+        username: str | None = None,
+        password: str | None = None,
+        starttls: bool = True,
+        timeout: float = 10.0,
+        batch_size: int = 50,
+        poll_seconds: float = 2.0,
+        max_attempts: int = 8,
+        backoff_seconds: float = 30.0,
+        max_backoff_seconds: float = 3600.0,
+        lease_seconds: float = 300.0,
+    ):
+        self.smtp_host = smtp_host
+        self.smtp_port = smtp_port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.lease_seconds = lease_seconds
+        self.sent = 0
+        self.retried = 0
+        self.dead = 0
+        self._smtp: aiosmtplib.SMTP | None = None
+        self._task: asyncio.Task | None = None
+        self._stop = asyncio.Event()
+
+    # -- database side (runs in a worker thread) --
+
+    def _claim(self, db: Session | None) -> tuple[list[tuple[int, EmailMessage]], list[tuple[int, str, bool]]]:
+        """Lease a batch and build its messages; returns (messages, failures to record)."""
+        own_session = db is None
+        if own_session:
+            db = SessionLocal()
+        try:
+            messages: list[tuple[int, EmailMessage]] = []
+            failures: list[tuple[int, str, bool]] = []
+            for email in claim_due_emails(db, self.batch_size, self.lease_seconds):
+                try:
+                    messages.append((email.id, self._message(db, email)))
+                except Exception as exc:
+                    # one unbuildable row must not hold back the batch; a malformed
+                    # header (ValueError) will never build, so dead-letter it
+                    logger.warning("Cannot build outbox email %s", email.id, exc_info=True)
+                    failures.append((email.id, f"{type(exc).__name__}: {exc}", isinstance(exc, ValueError)))
+            return messages, failures
+        finally:
+            if own_session:
+                db.close()
+
+    def _message(self, db: Session, email) -> EmailMessage:
+        msg = EmailMessage()
+        msg["From"] = self.sender
+        msg["To"] = email.to_address
+        msg["Subject"] = email.subject
+        msg.set_content(email.body)
+        invoice = get_invoice(db, email.invoice_id, email.owner_id) if email.invoice_id else None
+        if invoice is not None:
+            version = invoice_version(invoice)
+            path = pdf_cache.get(invoice.id, version)
+            if path:
+                with open(path, "rb") as fh:
+                    pdf = fh.read()
+            else:
+                pdf = render_invoice_pdf(invoice)
+                pdf_cache.put(invoice.id, version, pdf)
+            msg.add_attachment(
+                pdf, maintype="application", subtype="pdf", filename=f"invoice_{invoice.invoice_number}.pdf"
+            )
+        return msg
+
+    def _record(self, db: Session | None, sent_ids: list[int], failures: list[tuple[int, str, bool]]) -> int:
+        """Store outcomes; returns how many failures were dead-lettered."""
+        own_session = db is None
+        if own_session:
+            db = SessionLocal()
+        try:
+            mark_sent(db, sent_ids)
+            return sum(
+                mark_failed(
+                    db, email_id, error, permanent, self.max_attempts, self.backoff_seconds, self.max_backoff_seconds
+                )
+                for email_id, error, permanent in failures
+            )
+        finally:
+            if own_session:
+                db.close()
+
+    # -- SMTP side --
+
+    async def _connection(self) -> aiosmtplib.SMTP:
+        if self._smtp is None or not self._smtp.is_connected:
+            smtp = aiosmtplib.SMTP(
+                hostname=self.smtp_host, port=self.smtp_port, timeout=self.timeout, start_tls=self.starttls
+            )
+            await smtp.connect()
+            if self.username:
+                await smtp.login(self.username, self.password or "")
+            self._smtp = smtp
+        return self._smtp
+
+    async def _send(self, msg: EmailMessage):
+        try:
+            await (await self._connection()).send_message(msg)
+        except aiosmtplib.SMTPServerDisconnected:
+            # the server dropped our idle connection; reconnect once
+            self._smtp = None
+            await (await self._connection()).send_message(msg)
+
+    async def close(self):
+        if self._smtp is not None and self._smtp.is_connected:
+            try:
+                await self._smtp.quit()
+            except aiosmtplib.SMTPException:
+                self._smtp.close()
+        self._smtp = None
+
+    # -- driving --
+
+    async def drain_once(self, db: Session | None = None) -> int:
+        """Deliver one batch of due emails; returns how many were claimed."""
+        batch, failures = await asyncio.to_thread(self._claim, db)
+        claimed = len(batch) + len(failures)
+        sent_ids: list[int] = []
+        for email_id, msg in batch:
+            try:
+                await self._send(msg)
+                sent_ids.append(email_id)
+            except Exception as exc:
+                permanent = _is_permanent(exc)
+                failures.append((email_id, f"{type(exc).__name__}: {exc}", permanent))
+                if not isinstance(exc, aiosmtplib.SMTPResponseException):
+                    await self.close()  # connection state unknown; start clean next time
+        if claimed:
+            dead = await asyncio.to_thread(self._record, db, sent_ids, failures)
+            self.sent += len(sent_ids)
+            self.dead += dead
+            self.retried += len(failures) - dead
+        return claimed
+
+    async def run(self):
+        self._stop.clear()
+        try:
+            while not self._stop.is_set():
+                try:
+                    claimed = await self.drain_once()
+                except Exception:
+                    logger.exception("Email outbox batch failed")
+                    claimed = 0
+                if claimed < self.batch_size:
+                    try:
+                        await asyncio.wait_for(self._stop.wait(), self.poll_seconds)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            await self.close()
+
+    def start(self):
+        """Run on the current event loop (call from async code)."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stop.set()
+            await self._task
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"sent": self.sent, "retried": self.retried, "dead_lettered": self.dead}
+
+
+outbox_worker = OutboxWorker(
+    settings.SMTP_HOST,
+    settings.SMTP_PORT,
+    sender=settings.EMAIL_FROM,
+    username=settings.SMTP_USERNAME,
+    password=settings.SMTP_PASSWORD,
+    starttls=settings.SMTP_STARTTLS,
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    poll_seconds=settings.OUTBOX_POLL_SECONDS,
+    max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+    backoff_seconds=settings.OUTBOX_BACKOFF_SECONDS,
+)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if not settings.SMTP_HOST:
+        raise SystemExit("SMTP_HOST is not set")
+    asyncio.run(outbox_worker.run())
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from app.core.config import settings
+from app.models.user import pwd_context
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on its own small thread pool instead of the shared one.
+
+    bcrypt releases the GIL, so `workers` hashes run in parallel. At most
+    `workers + max_queue` calls may be in flight; beyond that callers get a
+    fast 503 with Retry-After rather than queueing behind a login burst.
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 16, retry_after_seconds: int = 1):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after_seconds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.busy = 0
+        self.completed = 0
+        self.rejected = 0
+        self.seconds_total = 0.0
+        self.seconds_max = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(pwd_context.verify, password, hashed)
+
+    async def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Password hashing is busy, retry shortly",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        with self._lock:
+            self.in_flight += 1
+        try:
+            return await asyncio.wrap_future(self._executor.submit(self._timed, fn, *args))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+
+    def _timed(self, fn, *args):
+        with self._lock:
+            self.busy += 1
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.busy -= 1
+                self.completed += 1
+                self.seconds_total += elapsed
+                self.seconds_max = max(self.seconds_max, elapsed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "busy": self.busy,
+                "queued": self.in_flight - self.busy,
+                "utilization": self.busy / self.workers,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "latency_avg_ms": self.seconds_total / self.completed * 1000 if self.completed else 0.0,
+                "latency_max_ms": self.seconds_max * 1000,
+            }
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE)
@@ -0,0 +1,101 @@
+import hashlib
+import io
+from dataclasses import astuple, dataclass
+from datetime import datetime
+from decimal import Decimal
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+
+def invoice_version(invoice) -> str:
+    """
+    Short digest of exactly the fields `render_invoice_pdf` draws.
+
+    It is taken over the `PdfInvoice` copy, so edits the document does not
+    show (status, `updated_at`) keep the cache key and ETag, and any change
+    to a drawn field or item produces a new one.
+    """
+    pdf = PdfInvoice.from_invoice(invoice)
+    parts = [str(value) for value in astuple(pdf)[:-1]]
+    parts += [f"{i.description}|{i.quantity}|{i.unit_price}|{i.line_total}" for i in pdf.items]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class PdfItem:
+    description: str
+    quantity: Decimal
+    unit_price: Decimal
+    line_total: Decimal
+
+
+@dataclass(frozen=True)
+class PdfInvoice:
+    """Plain copy of the fields a PDF shows; picklable for worker processes."""
+    id: int
+    invoice_number: str
+    client_name: str
+    issue_date: datetime | None
+    due_date: datetime
+    currency: str
+    subtotal: Decimal
+    tax_amount: Decimal
+    total: Decimal
+    items: tuple[PdfItem, ...]
+
+    @classmethod
+    def from_invoice(cls, invoice) -> "PdfInvoice":
+        return cls(
+            id=invoice.id,
+            invoice_number=invoice.invoice_number,
+            client_name=invoice.client_name,
+            issue_date=invoice.issue_date,
+            due_date=invoice.due_date,
+            currency=invoice.currency,
+            subtotal=invoice.subtotal,
+            tax_amount=invoice.tax_amount,
+            total=invoice.total,
+            items=tuple(
+                PdfItem(item.description, item.quantity, item.unit_price, item.line_total) for item in invoice.items
+            ),
+        )
+
+
+def render_invoice_pdf(invoice) -> bytes:
+    """Render an `Invoice` row or a `PdfInvoice` copy of one."""
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    width, height = A4
+
+    y = height - 50
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(50, y, f"Invoice {invoice.invoice_number}")
+    y -= 25
+    c.setFont("Helvetica", 12)
+    c.drawString(50, y, f"Client: {invoice.client_name}")
+    y -= 18
+    c.drawString(50, y, f"Issue date: {invoice.issue_date}")
+    y -= 18
+    c.drawString(50, y, f"Due date: {invoice.due_date}")
+    y -= 25
+    c.drawString(50, y, f"Currency: {invoice.currency}")
+    y -= 18
+    c.drawString(50, y, f"Subtotal: {invoice.subtotal}")
+    y -= 18
+    c.drawString(50, y, f"Tax: {invoice.tax_amount}")
+    y -= 18
+    c.drawString(50, y, f"Total: {invoice.total}")
+    y -= 30
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(50, y, "Items:")
+    y -= 20
+    c.setFont("Helvetica", 11)
+    for item in invoice.items:
+        c.drawString(60, y, f"{item.description} x{item.quantity} @ {item.unit_price} = {item.line_total}")
+        y -= 16
+        if y < 100:
+            c.showPage()
+            y = height - 50
+    c.showPage()
+    c.save()
+    return buf.getvalue()
@@ -0,0 +1,134 @@
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from app.core.config import settings
+
+
+class PdfCache:
+    """
+    Content-addressed store of rendered PDFs on local disk.
+
+    Files are named `<invoice_id>-<version>.pdf`, so a changed invoice simply
+    misses and its old file ages out; nothing is deleted on edits. Total size
+    is capped at `max_bytes`; the least recently served files are deleted
+    first. Recency is kept in file mtimes so the order survives a restart,
+    and several processes may share one directory (each enforces the cap on
+    what it has seen).
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, int] = OrderedDict()  # file name -> size
+        self._size = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _load(self):
+        # index whatever earlier processes left behind, oldest first
+        os.makedirs(self.directory, exist_ok=True)
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".pdf"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._size += size
+        self._loaded = True
+        self._evict()
+
+    @staticmethod
+    def _name(invoice_id: int, version: str) -> str:
+        return f"{invoice_id}-{version}.pdf"
+
+    def get(self, invoice_id: int, version: str) -> str | None:
+        """Path of the cached PDF, or None on a miss."""
+        name = self._name(invoice_id, version)
+        path = os.path.join(self.directory, name)
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if name not in self._entries:
+                # another process may have rendered it
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    self.misses += 1
+                    return None
+                self._entries[name] = size
+                self._size += size
+            self._entries.move_to_end(name)
+            self.hits += 1
+        try:
+            os.utime(path)
+        except OSError:  # evicted by another process in the meantime
+            with self._lock:
+                self._forget(name)
+            return None
+        return path
+
+    def put(self, invoice_id: int, version: str, data: bytes) -> str:
+        name = self._name(invoice_id, version)
+        path = os.path.join(self.directory, name)
+        with self._lock:
+            if not self._loaded:
+                self._load()
+        # write-then-rename so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._forget(name)
+            self._entries[name] = len(data)
+            self._size += len(data)
+            self._evict(keep=name)
+        return path
+
+    def clear(self):
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            for name in list(self._entries):
+                self._delete(name)
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _evict(self, keep: str | None = None):
+        while self._size > self.max_bytes and self._entries:
+            name = next(iter(self._entries))
+            if name == keep:
+                if len(self._entries) == 1:
+                    break
+                self._entries.move_to_end(name)
+                continue
+            self._delete(name)
+
+    def _delete(self, name: str):
+        self._forget(name)
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+    def _forget(self, name: str):
+        size = self._entries.pop(name, None)
+        if size is not None:
+            self._size -= size
+
+
+pdf_cache = PdfCache(settings.PDF_CACHE_DIR, settings.PDF_CACHE_MAX_BYTES)
@@ -0,0 +1,138 @@
+"""
+Batch PDF export: render invoices in a process pool and stream them as a ZIP.
+
+reportlab holds the GIL while it lays out a page, so renders go to worker
+processes. At most two renders per worker are in flight and each finished PDF
+is written to the archive and handed to the caller straight away, so memory
+stays bounded by the window, not by the number of invoices.
+"""
+import multiprocessing
+import os
+import re
+import threading
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Iterator
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.pdf import PdfInvoice, invoice_version, render_invoice_pdf
+from app.core.pdf_cache import pdf_cache
+from app.crud.invoice import get_invoices
+
+EXPORT_PAGE_SIZE = 200
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def pool_size() -> int:
+    return settings.PDF_EXPORT_WORKERS or os.cpu_count() or 1
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """The shared render pool, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the parent holds DB connections and background threads
+            _pool = ProcessPoolExecutor(max_workers=pool_size(), mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_pdf_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+class _ZipSink:
+    """Write-only, unseekable target for ZipFile; collects bytes until drained."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _archive_name(invoice: PdfInvoice, taken: set[str]) -> str:
+    """`invoice_<number>.pdf`, with the invoice id added if sanitizing made the name collide."""
+    stem = f"invoice_{re.sub(r'[^A-Za-z0-9._-]+', '_', invoice.invoice_number)}"
+    name = f"{stem}.pdf"
+    if name in taken:
+        name = f"{stem}_{invoice.id}.pdf"
+        while name in taken:
+            name = f"{name[:-4]}_{invoice.id}.pdf"
+    taken.add(name)
+    return name
+
+
+def _invoices(db: Session, owner_id: int, filters: dict) -> Iterator[tuple[PdfInvoice, str]]:
+    cursor = None
+    while True:
+        page, cursor = get_invoices(db, owner_id, limit=EXPORT_PAGE_SIZE, cursor=cursor, **filters)
+        for invoice in page:
+            yield PdfInvoice.from_invoice(invoice), invoice_version(invoice)
+        db.expunge_all()  # keep the session from accumulating every page
+        if not cursor:
+            return
+
+
+def export_invoice_pdfs(db: Session, owner_id: int, **filters) -> Iterator[bytes]:
+    """
+    Yield a ZIP archive of the owner's invoice PDFs in chunks.
+
+    `filters` are passed to `get_invoices` (status, created_from, created_to,
+    client_name, currency). PDFs already in the disk cache are reused and new
+    renders are added to it. Entries appear in completion order.
+    """
+    pool = get_pdf_pool()
+    window = 2 * pool_size()
+    sink = _ZipSink()
+    pending: dict[Future, tuple[PdfInvoice, str]] = {}
+    names: set[str] = set()  # duplicate ZIP entries would shadow each other on extraction
+
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:  # PDFs are already compressed
+
+        def collect(futures):
+            for future in futures:
+                invoice, version = pending.pop(future)
+                pdf = future.result()
+                pdf_cache.put(invoice.id, version, pdf)
+                archive.writestr(_archive_name(invoice, names), pdf)
+
+        try:
+            for invoice, version in _invoices(db, owner_id, filters):
+                path = pdf_cache.get(invoice.id, version)
+                if path:
+                    try:
+                        with open(path, "rb") as fh:
+                            archive.writestr(_archive_name(invoice, names), fh.read())
+                        yield sink.drain()
+                        continue
+                    except OSError:  # evicted between lookup and read
+                        pass
+                pending[pool.submit(render_invoice_pdf, invoice)] = (invoice, version)
+                if len(pending) >= window:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                    yield sink.drain()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+                yield sink.drain()
+        finally:
+            for future in pending:
+                future.cancel()
+    yield sink.drain()  # central directory
@@ -0,0 +1,21 @@
+import hashlib
+import io
+from functools import lru_cache
+import qrcode
+from app.core.config import settings
+
+
+def invoice_qr_payload(invoice) -> str:
+    return f"invoice:{invoice.invoice_number}|amount:{invoice.total}|currency:{invoice.currency}"
+
+
+def qr_etag(payload: str) -> str:
+    return f'"qr-{hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]}"'
+
+
+@lru_cache(maxsize=settings.QR_CACHE_MAX_ENTRIES)
+def render_qr_png(payload: str) -> bytes:
+    """PNG for a payment payload; memoized because the image depends on nothing else."""
+    buf = io.BytesIO()
+    qrcode.make(payload).save(buf, format="PNG")
+    return buf.getvalue()
@@ -1,54 +1,162 @@
+import logging
+import math
 import time
+from collections import OrderedDict
+from fnmatch import fnmatchcase
 from fastapi import HTTPException
 import redis
 
+logger = logging.getLogger(__name__)
 
-class SimpleRateLimiter:
-    """Very lightweight in-memory sliding window rate limiter."""
 
-    def __init__(self, max_requests: int, window_seconds: int = 60):
+class TokenBucketRateLimiter:
+    """
+    In-memory token bucket implemented as GCRA: one float per key.
+
+    Each key may burst up to `max_requests` and refills at
+    `max_requests / window_seconds` per second, so there is no double burst at
+    window edges. A request costing more than the burst is charged the whole
+    burst, so it waits for a full bucket instead of being rejected forever.
+    Refilled keys carry no state and are dropped; the table never holds more
+    than `max_keys` entries (least recently seen keys are evicted first).
+    """
+
+    def __init__(self, max_requests: int, window_seconds: int = 60, max_keys: int = 100_000):
         self.max_requests = max_requests
         self.window = window_seconds
-        self.store = {}  # key -> (count, window_start)
-
-    def check(self, key: str):
-        now = time.time()
-        count, start = self.store.get(key, (0, now))
-        if now - start > self.window:
-            self.store[key] = (1, now)
-            return
-        if count + 1 > self.max_requests:
-            raise HTTPException(status_code=429, detail="Rate limit exceeded")
-        self.store[key] = (count + 1, start)
+        self.max_keys = max_keys
+        self.interval = window_seconds / max_requests
+        self.store: OrderedDict[str, float] = OrderedDict()  # key -> theoretical arrival time
+
+    def check(self, key: str, cost: int = 1):
+        now = time.monotonic()
+        self._evict_idle(now)
+        cost = min(cost, self.max_requests)
+        tat = max(self.store.get(key, now), now) + cost * self.interval
+        if tat - now > self.window:
+            retry_after = math.ceil(tat - now - self.window)
+            raise HTTPException(status_code=429, detail="Rate limit exceeded", headers={"Retry-After": str(retry_after)})
+        self.store[key] = tat
+        self.store.move_to_end(key)
+        while len(self.store) > self.max_keys:
+            self.store.popitem(last=False)
+
+    def _evict_idle(self, now: float):
+        # Entries are in last-seen order, not TAT order: this drops refilled keys
+        # from the front and stops at the first live one. Idle keys behind it
+        # wait for a later call or the max_keys cap; both keep this O(1) amortized.
+        while self.store:
+            key, tat = next(iter(self.store.items()))
+            if tat > now:
+                break
+            del self.store[key]
 
     def reset(self):
-        self.store = {}
+        self.store = OrderedDict()
+
+
+SimpleRateLimiter = TokenBucketRateLimiter  # backwards-compatible name
+
+
+# GCRA in one round trip. Times are integer milliseconds from the Redis clock
+# so every app instance agrees on "now". Returns 0 when admitted, otherwise the
+# milliseconds until the request would fit.
+_GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + cost * interval
+if new_tat - now > window then
+    return new_tat - now - window
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return 0
+"""
 
 
 class RedisRateLimiter:
-    """Redis sliding window (per minute) using INCR + EXPIRE."""
+    """
+    Shared GCRA token bucket in Redis, checked with a single EVALSHA.
+
+    Keys Redis has throttled are remembered locally until their retry time, so
+    repeat offenders are rejected without a round trip. If Redis errors, the
+    limiter fails open to a per-process token bucket and retries Redis after
+    `retry_seconds`.
+    """
 
-    def __init__(self, redis_url: str, max_requests: int, window_seconds: int = 60):
-        self.r = redis.Redis.from_url(redis_url)
+    def __init__(
+        self,
+        redis_url: str | None,
+        max_requests: int,
+        window_seconds: int = 60,
+        max_keys: int = 100_000,
+        client: redis.Redis | None = None,
+        retry_seconds: float = 5.0,
+    ):
+        self.r = client or redis.Redis.from_url(redis_url, socket_timeout=0.25, socket_connect_timeout=0.25)
         self.max_requests = max_requests
         self.window = window_seconds
+        self.interval_ms = math.ceil(window_seconds * 1000 / max_requests)
+        self.retry_seconds = retry_seconds
+        self.blocked: OrderedDict[str, float] = OrderedDict()  # key -> monotonic retry time
+        self.max_keys = max_keys
+        self.fallback = TokenBucketRateLimiter(max_requests, window_seconds, max_keys)
+        self.redis_down_until = 0.0
+        self._script = self.r.register_script(_GCRA_SCRIPT)
 
-    def check(self, key: str):
-        bucket = f"rl:{key}"
-        pipe = self.r.pipeline()
-        pipe.incr(bucket, 1)
-        pipe.expire(bucket, self.window)
-        count, _ = pipe.execute()
-        if int(count) > self.max_requests:
-            raise HTTPException(status_code=429, detail="Rate limit exceeded")
+    def check(self, key: str, cost: int = 1):
+        now = time.monotonic()
+        blocked_until = self.blocked.get(key)
+        if blocked_until is not None:
+            if blocked_until > now:
+                self._reject(blocked_until - now)
+            del self.blocked[key]
+        if now < self.redis_down_until:
+            return self.fallback.check(key, cost)
+        try:
+            wait_ms = int(self._script(
+                keys=[f"rl:{key}"], args=[self.interval_ms, self.window * 1000, min(cost, self.max_requests)],
+            ))
+        except redis.RedisError:
+            logger.warning("Redis rate limiter unavailable; using in-process limiter", exc_info=True)
+            self.redis_down_until = now + self.retry_seconds
+            return self.fallback.check(key, cost)
+        if wait_ms > 0:
+            self.blocked[key] = now + wait_ms / 1000
+            while len(self.blocked) > self.max_keys:
+                self.blocked.popitem(last=False)
+            self._reject(wait_ms / 1000)
+
+    @staticmethod
+    def _reject(wait_seconds: float):
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(max(1, math.ceil(wait_seconds)))},
+        )
 
     def reset(self):
         # Not efficient to scan; provided for tests only.
         for key in self.r.scan_iter("rl:*"):
             self.r.delete(key)
+        self.blocked = OrderedDict()
+        self.fallback.reset()
+        self.redis_down_until = 0.0
+
+
+def route_cost(path: str, costs: dict[str, int]) -> int:
+    """Cost of a request path; `costs` maps glob patterns to weights (default 1)."""
+    for pattern, cost in costs.items():
+        if fnmatchcase(path, pattern):
+            return cost
+    return 1
 
 
-def build_limiter(redis_url: str | None, max_requests: int, window_seconds: int = 60):
+def build_limiter(redis_url: str | None, max_requests: int, window_seconds: int = 60, max_keys: int = 100_000):
     if redis_url:
-        return RedisRateLimiter(redis_url, max_requests, window_seconds)
-    return SimpleRateLimiter(max_requests, window_seconds)
+        return RedisRateLimiter(redis_url, max_requests, window_seconds, max_keys)
+    return TokenBucketRateLimiter(max_requests, window_seconds, max_keys)
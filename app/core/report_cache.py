@@ -0,0 +1,186 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+import redis
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def report_key(report: str, params: dict) -> str:
+    return f"{report}:{json.dumps(params, sort_keys=True, default=str, separators=(',', ':'))}"
+
+
+class MemoryReportCache:
+    """
+    Per-process LRU of report results, keyed by owner, report name, parameters
+    and the owner's generation.
+
+    Every invoice, expense, tax or profile write calls `bump(owner_id)`, which
+    orphans all of that owner's entries at once; they age out of the LRU.
+    Entries also expire after `ttl_seconds`, which bounds how stale a result
+    can be when another worker (with its own cache) made the write.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._generations: dict[int, int] = {}
+        self._entries: OrderedDict[tuple[int, int, str], tuple[dict, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, owner_id: int, key: str) -> tuple[int, dict | None]:
+        """The owner's current generation and the cached result for `key`, if any."""
+        now = time.monotonic()
+        with self._lock:
+            generation = self._generations.get(owner_id, 0)
+            entry_key = (owner_id, generation, key)
+            entry = self._entries.get(entry_key)
+            if entry is None or entry[1] <= now:
+                self._entries.pop(entry_key, None)
+                self.misses += 1
+                return generation, None
+            self._entries.move_to_end(entry_key)
+            self.hits += 1
+            return generation, entry[0]
+
+    def store(self, owner_id: int, generation: int, key: str, value: dict):
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[(owner_id, generation, key)] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end((owner_id, generation, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def bump(self, owner_id: int):
+        with self._lock:
+            self._generations[owner_id] = self._generations.get(owner_id, 0) + 1
+
+    def get_or_compute(self, owner_id: int, report: str, params: dict, compute: Callable[[], dict]) -> dict:
+        """Cached result of `compute()`; stored under the generation seen before computing."""
+        key = report_key(report, params)
+        generation, value = self.lookup(owner_id, key)
+        if value is None:
+            value = compute()
+            # a write that lands meanwhile bumps past `generation`, so this entry is never served
+            self.store(owner_id, generation, key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+# generation and entry in one round trip
+_LOOKUP_SCRIPT = """
+local generation = redis.call('GET', KEYS[1]) or '0'
+return {generation, redis.call('GET', ARGV[1] .. generation .. ':' .. ARGV[2])}
+"""
+
+
+class RedisReportCache(MemoryReportCache):
+    """
+    Report cache shared by every worker through Redis.
+
+    The generation lives in `rc:gen:<owner>` (INCR on write) and results in
+    `rc:<owner>:<generation>:<digest>` with a TTL, so a bump on any worker
+    invalidates everywhere. If Redis errors, the cache falls back to the
+    per-process LRU and retries Redis after `retry_seconds`.
+    """
+
+    def __init__(
+        self,
+        redis_url: str | None,
+        max_entries: int = 10_000,
+        ttl_seconds: float = 60.0,
+        client: redis.Redis | None = None,
+        retry_seconds: float = 5.0,
+    ):
+        super().__init__(max_entries, ttl_seconds)
+        self.r = client or redis.Redis.from_url(redis_url, socket_timeout=0.25, socket_connect_timeout=0.25)
+        self.retry_seconds = retry_seconds
+        self.redis_down_until = 0.0
+        self._lookup = self.r.register_script(_LOOKUP_SCRIPT)
+
+    def _redis_ok(self) -> bool:
+        return time.monotonic() >= self.redis_down_until
+
+    def _redis_failed(self):
+        logger.warning("Redis report cache unavailable; using in-process cache", exc_info=True)
+        self.redis_down_until = time.monotonic() + self.retry_seconds
+
+    def lookup(self, owner_id: int, key: str) -> tuple[int, dict | None]:
+        if not self._redis_ok() or self.ttl <= 0:
+            return super().lookup(owner_id, key)
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        try:
+            generation, raw = self._lookup(keys=[f"rc:gen:{owner_id}"], args=[f"rc:{owner_id}:", digest])
+        except redis.RedisError:
+            self._redis_failed()
+            return super().lookup(owner_id, key)
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return int(generation), (json.loads(raw) if raw is not None else None)
+
+    def store(self, owner_id: int, generation: int, key: str, value: dict):
+        if not self._redis_ok() or self.ttl <= 0:
+            return super().store(owner_id, generation, key, value)
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        try:
+            self.r.set(f"rc:{owner_id}:{generation}:{digest}", json.dumps(value), px=max(1, int(self.ttl * 1000)))
+        except redis.RedisError:
+            self._redis_failed()
+
+    def bump(self, owner_id: int):
+        super().bump(owner_id)  # local entries may have been filled during an outage
+        try:
+            self.r.incr(f"rc:gen:{owner_id}")
+        except redis.RedisError:
+            self._redis_failed()
+
+    def clear(self):
+        # Not efficient to scan; provided for tests only.
+        for key in self.r.scan_iter("rc:*"):
+            self.r.delete(key)
+        super().clear()
+        self.redis_down_until = 0.0
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["backend"] = "redis"
+        stats["redis_available"] = self._redis_ok()
+        return stats
+
+
+def build_report_cache(redis_url: str | None, max_entries: int = 10_000, ttl_seconds: float = 60.0):
+    if redis_url:
+        return RedisReportCache(redis_url, max_entries, ttl_seconds)
+    return MemoryReportCache(max_entries, ttl_seconds)
+
+
+report_cache = build_report_cache(
+    settings.REDIS_URL, settings.REPORT_CACHE_MAX_ENTRIES, settings.REPORT_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,87 @@
+"""
+Accounts-receivable aging: outstanding (`sent`) invoices bucketed by days
+past due, per client and currency, in one aggregate query.
+
+The bucket edges are computed here as UTC instants (midnight of `as_of` in
+the report timezone, minus 30/60/90 days), so the SQL is plain range
+comparisons on `due_date` and the scan is the (owner_id, status, ...) index
+range of sent invoices. Invoices without a due date count as current.
+
+Only the `limit` largest (client, currency) rows are returned, so the
+response stays small however many clients a tenant has; the per-currency
+totals still cover everyone.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.orm import Session
+from app.crud.timeseries import report_timezone
+from app.models.invoice import Invoice, InvoiceStatus
+
+AGING_BUCKETS = ("current", "days_1_30", "days_31_60", "days_61_90", "days_over_90")
+AGING_CLIENT_LIMIT = 10
+MAX_AGING_CLIENTS = 100
+
+
+def _edges(as_of: date, tz: str) -> list[datetime]:
+    """Start of `as_of` in `tz`, then 30, 60 and 90 days earlier, as UTC."""
+    midnight = datetime.combine(as_of, time(), tzinfo=ZoneInfo(tz))
+    return [(midnight - timedelta(days=days)).astimezone(timezone.utc) for days in (0, 30, 60, 90)]
+
+
+def aging_date(db: Session, owner_id: int, as_of: date | None = None, tz: str | None = None) -> tuple[date, str]:
+    """Resolved (as_of, timezone): `as_of` defaults to today in the report timezone."""
+    tz = report_timezone(db, owner_id, tz)
+    return as_of or datetime.now(ZoneInfo(tz)).date(), tz
+
+
+def aging(
+    db: Session, owner_id: int, as_of: date | None = None, tz: str | None = None, limit: int = AGING_CLIENT_LIMIT,
+) -> dict:
+    """
+    Outstanding totals per bucket, by currency and for the `limit` largest
+    (client, currency) pairs; `clients_omitted` counts the rest.
+    """
+    as_of, tz = aging_date(db, owner_id, as_of, tz)
+    today, minus_30, minus_60, minus_90 = _edges(as_of, tz)
+    due = Invoice.due_date
+    conditions = {
+        "current": or_(due.is_(None), due >= today),
+        "days_1_30": and_(due < today, due >= minus_30),
+        "days_31_60": and_(due < minus_30, due >= minus_60),
+        "days_61_90": and_(due < minus_60, due >= minus_90),
+        "days_over_90": due < minus_90,
+    }
+    rows = db.execute(
+        select(
+            Invoice.client_name,
+            func.coalesce(Invoice.currency, "").label("currency"),
+            func.count().label("count"),
+            *(func.coalesce(func.sum(case((cond, Invoice.total), else_=0)), 0).label(name)
+              for name, cond in conditions.items()),
+        )
+        .where(Invoice.owner_id == owner_id, Invoice.status == InvoiceStatus.sent)
+        .group_by(Invoice.client_name, Invoice.currency)
+    )
+
+    def money(value) -> Decimal:
+        return Decimal(str(value)).quantize(Decimal("0.01"))
+
+    currencies: dict[str, dict[str, Decimal]] = {}
+    clients = []
+    for row in rows:
+        amounts = {name: money(getattr(row, name)) for name in AGING_BUCKETS}
+        amounts["total"] = sum(amounts.values(), Decimal("0"))
+        per_currency = currencies.setdefault(row.currency, {name: Decimal("0") for name in amounts})
+        for name, amount in amounts.items():
+            per_currency[name] += amount
+        clients.append({"client_name": row.client_name, "currency": row.currency, "count": int(row.count), **amounts})
+    clients.sort(key=lambda c: (-c["total"], c["client_name"], c["currency"]))
+    return {
+        "as_of": as_of.isoformat(),
+        "timezone": tz,
+        "currencies": {cur: {k: str(v) for k, v in amounts.items()} for cur, amounts in sorted(currencies.items())},
+        "clients": [{k: str(v) if isinstance(v, Decimal) else v for k, v in c.items()} for c in clients[:limit]],
+        "clients_omitted": max(0, len(clients) - limit),
+    }
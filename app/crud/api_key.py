@@ -2,8 +2,12 @@ import secrets
 import hashlib
 import hmac
 from datetime import datetime, timedelta, timezone
-from sqlalchemy.orm import Session
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, joinedload
 from app.models.api_key import ApiKey
+from app.core.auth_cache import principal_cache
+
+KEY_PREFIX_LEN = 12
 
 
 def _hash_key(plain_key: str) -> str:
@@ -13,7 +17,7 @@ def _hash_key(plain_key: str) -> str:
 def generate_api_key(owner_id: int, name: str | None = None) -> tuple[str, str, str]:
     random_part = secrets.token_urlsafe(32)
     plain_key = f"mcp_u{owner_id}_{random_part}"
-    prefix = plain_key[:12]  # first 12 chars for index
+    prefix = plain_key[:KEY_PREFIX_LEN]
     hashed = _hash_key(plain_key)
     return plain_key, hashed, prefix
 
@@ -39,6 +43,26 @@ def verify_api_key_plain(plain_key: str, key_obj: ApiKey) -> bool:
     return ok
 
 
+def verify_api_key(db: Session, plain_key: str) -> ApiKey | None:
+    """
+    Resolve a presented key with one indexed query on (key_prefix, key_hash).
+    Expired keys are filtered out in SQL and the owner is joined in the same
+    round trip; revoked keys are deleted rows and simply never match.
+    last_used_at is left to the caller (see app.core.last_used).
+    """
+    now = datetime.now(timezone.utc)
+    return (
+        db.query(ApiKey)
+        .options(joinedload(ApiKey.owner))
+        .filter(
+            ApiKey.key_prefix == plain_key[:KEY_PREFIX_LEN],
+            ApiKey.key_hash == _hash_key(plain_key),
+            or_(ApiKey.expires_at.is_(None), ApiKey.expires_at > now),
+        )
+        .first()
+    )
+
+
 def get_user_api_keys(db: Session, owner_id: int):
     return db.query(ApiKey).filter(ApiKey.owner_id == owner_id).all()
 
@@ -53,5 +77,6 @@ def delete_api_key(db: Session, key_id: int, owner_id: int):
     if key:
         db.delete(key)
         db.commit()
+        principal_cache.invalidate_key(key_id)
         return True
     return False
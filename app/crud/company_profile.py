@@ -1,10 +1,15 @@
 from sqlalchemy.orm import Session
 from app.models.company_profile import CompanyProfile
 from app.schemas.company_profile import CompanyProfileUpdate
+from app.core.report_cache import report_cache
+
+
+def get_profile(db: Session, owner_id: int) -> CompanyProfile | None:
+    return db.query(CompanyProfile).filter(CompanyProfile.owner_id == owner_id).first()
 
 
 def get_or_create_profile(db: Session, owner_id: int) -> CompanyProfile:
-    profile = db.query(CompanyProfile).filter(CompanyProfile.owner_id == owner_id).first()
+    profile = get_profile(db, owner_id)
     if not profile:
         profile = CompanyProfile(owner_id=owner_id)
         db.add(profile)
@@ -18,5 +23,6 @@ def update_profile(db: Session, owner_id: int, data: CompanyProfileUpdate) -> Co
     for k, v in data.dict(exclude_unset=True).items():
         setattr(profile, k, v)
     db.commit()
+    report_cache.bump(owner_id)  # the profile timezone is the default report timezone
     db.refresh(profile)
     return profile
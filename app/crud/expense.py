@@ -1,7 +1,10 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from app.models.expense import Expense
+from app.models.expense import Expense, ExpenseStatus
 from app.schemas.expense import ExpenseCreate
+from app.crud.pagination import as_utc, keyset_page
+from app.core.report_cache import report_cache
+from datetime import datetime
 
 def create_expense(db: Session, expense_data: ExpenseCreate, owner_id: int):
     expense = Expense(**expense_data.dict(), owner_id=owner_id)
@@ -9,11 +12,34 @@ def create_expense(db: Session, expense_data: ExpenseCreate, owner_id: int):
         expense.date = func.now()
     db.add(expense)
     db.commit()
+    report_cache.bump(owner_id)
     db.refresh(expense)
     return expense
 
-def get_expenses(db: Session, owner_id: int):
-    return db.query(Expense).filter(Expense.owner_id == owner_id).all()
+def get_expenses(
+    db: Session,
+    owner_id: int,
+    limit: int = 100,
+    cursor: str | None = None,
+    status: ExpenseStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    category: str | None = None,
+    currency: str | None = None,
+) -> tuple[list[Expense], str | None]:
+    """Newest-first page of expenses plus the cursor for the next page."""
+    query = db.query(Expense).filter(Expense.owner_id == owner_id)
+    if status is not None:
+        query = query.filter(Expense.status == status)
+    if created_from is not None:
+        query = query.filter(Expense.created_at >= as_utc(created_from))
+    if created_to is not None:
+        query = query.filter(Expense.created_at < as_utc(created_to))
+    if category is not None:
+        query = query.filter(Expense.category == category)
+    if currency is not None:
+        query = query.filter(Expense.currency == currency)
+    return keyset_page(query, Expense, limit, cursor)
 
 def get_expense(db: Session, expense_id: int, owner_id: int):
     return db.query(Expense).filter(Expense.id == expense_id, Expense.owner_id == owner_id).first()
@@ -25,5 +51,6 @@ def update_expense(db: Session, expense_id: int, update_data: dict, owner_id: in
             if value is not None:
                 setattr(expense, key, value)
         db.commit()
+        report_cache.bump(owner_id)
         db.refresh(expense)
     return expense
@@ -0,0 +1,118 @@
+"""
+Full-ledger exports as CSV or NDJSON text chunks.
+
+Rows are selected as plain column tuples (no ORM objects, nothing kept in the
+session) and fetched `EXPORT_BATCH_ROWS` at a time through a server-side
+cursor where the driver has one, so memory does not grow with the ledger.
+"""
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterator
+from sqlalchemy import Result, select
+from sqlalchemy.orm import Session
+from app.crud.pagination import as_utc
+from app.models.expense import Expense, ExpenseStatus
+from app.models.invoice import Invoice, InvoiceStatus
+
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXPORT_BATCH_ROWS = 1000
+
+INVOICE_COLUMNS = (
+    Invoice.id, Invoice.invoice_number, Invoice.issue_date, Invoice.due_date, Invoice.client_name,
+    Invoice.client_email, Invoice.currency, Invoice.subtotal, Invoice.tax_amount, Invoice.total,
+    Invoice.status, Invoice.created_at,
+)
+EXPENSE_COLUMNS = (
+    Expense.id, Expense.date, Expense.amount, Expense.currency, Expense.category, Expense.description,
+    Expense.status, Expense.created_at,
+)
+
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _stream(db: Session, stmt, columns) -> tuple[list[str], Result]:
+    # yield_per implies stream_results: a server-side cursor on Postgres
+    return [c.key for c in columns], db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_ROWS))
+
+
+def invoice_rows(
+    db: Session,
+    owner_id: int,
+    status: InvoiceStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    client_name: str | None = None,
+    currency: str | None = None,
+) -> tuple[list[str], Result]:
+    """Column names and streamed rows for the owner's invoices, oldest first."""
+    stmt = select(*INVOICE_COLUMNS).where(Invoice.owner_id == owner_id)
+    if status is not None:
+        stmt = stmt.where(Invoice.status == status)
+    if created_from is not None:
+        stmt = stmt.where(Invoice.created_at >= as_utc(created_from))
+    if created_to is not None:
+        stmt = stmt.where(Invoice.created_at < as_utc(created_to))
+    if client_name is not None:
+        stmt = stmt.where(Invoice.client_name == client_name)
+    if currency is not None:
+        stmt = stmt.where(Invoice.currency == currency)
+    return _stream(db, stmt.order_by(Invoice.created_at, Invoice.id), INVOICE_COLUMNS)
+
+
+def expense_rows(
+    db: Session,
+    owner_id: int,
+    status: ExpenseStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    category: str | None = None,
+    currency: str | None = None,
+) -> tuple[list[str], Result]:
+    """Column names and streamed rows for the owner's expenses, oldest first."""
+    stmt = select(*EXPENSE_COLUMNS).where(Expense.owner_id == owner_id)
+    if status is not None:
+        stmt = stmt.where(Expense.status == status)
+    if created_from is not None:
+        stmt = stmt.where(Expense.created_at >= as_utc(created_from))
+    if created_to is not None:
+        stmt = stmt.where(Expense.created_at < as_utc(created_to))
+    if category is not None:
+        stmt = stmt.where(Expense.category == category)
+    if currency is not None:
+        stmt = stmt.where(Expense.currency == currency)
+    return _stream(db, stmt.order_by(Expense.created_at, Expense.id), EXPENSE_COLUMNS)
+
+
+def serialize(names: list[str], rows: Result, fmt: str) -> Iterator[str]:
+    """Encode rows as `fmt` ("csv" with a header line, or "ndjson"), one chunk per batch."""
+    buf = io.StringIO()
+    writer = csv.writer(buf) if fmt == "csv" else None
+    if writer:
+        writer.writerow(names)
+    count = 0
+    for row in rows:
+        values = [_plain(v) for v in row]
+        if writer:
+            writer.writerow(values)
+        else:
+            buf.write(json.dumps(dict(zip(names, values))))
+            buf.write("\n")
+        count += 1
+        if count % EXPORT_BATCH_ROWS == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
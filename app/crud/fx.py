@@ -0,0 +1,115 @@
+"""
+FX reference rates: CSV loading and the SQL expressions reports use to
+convert amounts inside their aggregate queries.
+
+    python -m app.crud.fx rates.csv [rates2.csv ...]
+
+loads `date,currency,rate` rows (header required; `rate` units of currency
+per one FX_BASE_CURRENCY, as in the ECB reference-rate files). Loading is an
+upsert, so files can be re-applied or extended day by day. Rates are shared,
+so a load invalidates every owner's cached reports.
+"""
+import argparse
+import csv
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Iterable
+from sqlalchemy import case, func, literal, literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.report_cache import report_cache
+from app.models.fx import FxRate
+from app.models.rollup import ReportRollup
+
+LOAD_BATCH_ROWS = 1000
+
+
+def _parse(line: int, row: dict) -> dict:
+    try:
+        rate = Decimal(row["rate"])
+        if rate <= 0:
+            raise InvalidOperation
+        return {
+            "date": date.fromisoformat(row["date"].strip()),
+            "currency": row["currency"].strip().upper(),
+            "rate": rate,
+        }
+    except (KeyError, ValueError, InvalidOperation, AttributeError):
+        raise ValueError(f"line {line}: expected date,currency,rate with a positive rate, got {row}")
+
+
+def load_rates_csv(db: Session, lines: Iterable[str]) -> int:
+    """Upsert rates from CSV text lines; returns rows written. All-or-nothing."""
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    written = 0
+    batch: dict[tuple[str, date], dict] = {}  # a key may appear once per upsert on Postgres
+
+    def flush():
+        nonlocal written
+        stmt = insert(FxRate).values(list(batch.values()))
+        db.execute(stmt.on_conflict_do_update(index_elements=["currency", "date"], set_={"rate": stmt.excluded.rate}))
+        written += len(batch)
+        batch.clear()
+
+    try:
+        for line, row in enumerate(csv.DictReader(lines), start=2):
+            rate = _parse(line, row)
+            batch[rate["currency"], rate["date"]] = rate
+            if len(batch) >= LOAD_BATCH_ROWS:
+                flush()
+        if batch:
+            flush()
+    except Exception:
+        db.rollback()
+        raise
+    db.commit()
+    # converted totals of anyone with report data may have changed
+    for owner in db.execute(select(ReportRollup.owner_id).distinct()).scalars():
+        report_cache.bump(owner)
+    return written
+
+
+def month_end(db: Session, month):
+    """Last day of a `YYYY-MM` text expression, comparable with `FxRate.date`."""
+    if db.get_bind().dialect.name == "postgresql":
+        return func.to_date(month, "YYYY-MM") + literal_column("interval '1 month - 1 day'")
+    return func.date(month + "-01", "+1 month", "-1 day")
+
+
+def rate_on(currency, on):
+    """Latest rate for `currency` (SQL expression or str) on or before `on`; NULL if none."""
+    if isinstance(currency, str):
+        currency = literal(currency.upper())
+    else:
+        currency = func.upper(currency)  # ledger currencies are free text; rates are loaded uppercase
+    latest = (
+        select(FxRate.rate)
+        .where(FxRate.currency == currency, FxRate.date <= on)
+        .order_by(FxRate.date.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    return case((currency == settings.FX_BASE_CURRENCY.upper(), literal(Decimal(1), FxRate.rate.type)), else_=latest)
+
+
+def conversion_factor(source_currency, target_currency: str, on):
+    """Multiplier from `source_currency` into `target_currency` on `on`; NULL when a rate is missing."""
+    return rate_on(target_currency, on) / rate_on(source_currency, on)
+
+
+def main():
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Load FX reference rates from CSV (date,currency,rate).")
+    parser.add_argument("files", nargs="+")
+    args = parser.parse_args()
+    with SessionLocal() as db:
+        for path in args.files:
+            with open(path, newline="", encoding="utf-8") as f:
+                print(f"{path}: {load_rates_csv(db, f)} rates")
+
+
+if __name__ == "__main__":
+    main()
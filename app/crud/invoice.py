@@ -1,22 +1,41 @@
-from sqlalchemy.orm import Session
-from app.models.invoice import Invoice, InvoiceItem
-from app.schemas.invoice import InvoiceCreate
+from typing import Iterable, Iterator
+from sqlalchemy import Numeric, func, insert, literal, select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, raiseload, selectinload
+from pydantic import ValidationError
+from app.models.company_profile import CompanyProfile
+from app.models.invoice import Invoice, InvoiceItem, InvoiceStatus
+from app.schemas.invoice import InvoiceCreate, InvoiceBulkResult
 from app.crud.tax_config import get_default_tax_rate
-from app.crud.company_profile import get_or_create_profile
+from app.crud.company_profile import get_profile
+from app.crud.pagination import as_utc, keyset_page
+from app.core.report_cache import report_cache
+from datetime import datetime
 from decimal import Decimal
 
-def create_invoice(db: Session, invoice_data: InvoiceCreate, owner_id: int):
+def _build_invoice(
+    invoice_data: InvoiceCreate,
+    owner_id: int,
+    default_rate: float | None,
+    profile: CompanyProfile | None,
+) -> tuple[Invoice, list[dict]]:
+    """Compute totals and return the unsaved invoice plus its item rows."""
     # determine tax rate: prefer payload, else user default if set
     tax_rate = invoice_data.tax_rate
-    if tax_rate is None:
-        default_rate = get_default_tax_rate(db, owner_id)
-        if default_rate is not None:
-            tax_rate = Decimal(str(default_rate))
+    if tax_rate is None and default_rate is not None:
+        tax_rate = Decimal(str(default_rate))
 
-    subtotal = Decimal("0")
-    for item in invoice_data.items:
-        line_total = item.quantity * item.unit_price
-        subtotal += line_total
+    items = [
+        {
+            "description": item.description,
+            "quantity": item.quantity,
+            "unit_price": item.unit_price,
+            "line_total": item.quantity * item.unit_price,
+            "owner_id": owner_id,
+        }
+        for item in invoice_data.items
+    ]
+    subtotal = sum((item["line_total"] for item in items), Decimal("0"))
 
     tax_amount = Decimal("0")
     if tax_rate:
@@ -24,40 +43,196 @@ def create_invoice(db: Session, invoice_data: InvoiceCreate, owner_id: int):
 
     total = subtotal + tax_amount
 
+    # apply optional tax labels/notes (from payload or company profile defaults);
+    # a missing profile just means no defaults, so nothing is created here
     invoice = Invoice(
         invoice_number=invoice_data.invoice_number,
-        due_date=invoice_data.due_date,
+        due_date=as_utc(invoice_data.due_date),  # SQLite drops the offset; aging compares in UTC
         client_name=invoice_data.client_name,
         client_email=invoice_data.client_email,
         currency=invoice_data.currency,
         subtotal=subtotal,
         tax_amount=tax_amount,
         total=total,
-        owner_id=owner_id
+        tax_label=invoice_data.tax_label or (profile.tax_label if profile else None),
+        tax_note=invoice_data.tax_note or (profile.tax_note if profile else None),
+        owner_id=owner_id,
     )
-    # apply optional tax labels/notes (from payload or company profile defaults)
-    profile = get_or_create_profile(db, owner_id)
-    invoice.tax_label = invoice_data.tax_label or profile.tax_label
-    invoice.tax_note = invoice_data.tax_note or profile.tax_note
-    db.add(invoice)
+    return invoice, items
+
+
+def _add_invoices(db: Session, built: list[tuple[Invoice, list[dict]]]) -> list[int]:
+    """Flush invoices, then insert all their items as one executemany INSERT."""
+    db.add_all(invoice for invoice, _ in built)
+    db.flush()
+    rows = [{**item, "invoice_id": invoice.id} for invoice, items in built for item in items]
+    if rows:
+        db.execute(insert(InvoiceItem), rows)
+    return [invoice.id for invoice, _ in built]
+
+
+def create_invoice(db: Session, invoice_data: InvoiceCreate, owner_id: int):
+    default_rate = get_default_tax_rate(db, owner_id) if invoice_data.tax_rate is None else None
+    built = _build_invoice(invoice_data, owner_id, default_rate, get_profile(db, owner_id))
+    # invoice and items commit together
+    [invoice_id] = _add_invoices(db, [built])
     db.commit()
-    db.refresh(invoice)
-
-    for item in invoice_data.items:
-        db_item = InvoiceItem(
-            description=item.description,
-            quantity=item.quantity,
-            unit_price=item.unit_price,
-            line_total=item.quantity * item.unit_price,
-            invoice_id=invoice.id,
-            owner_id=owner_id
+    report_cache.bump(owner_id)
+    return _with_items(db).filter(Invoice.id == invoice_id).one()
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}" for err in exc.errors()
+    )
+
+
+def import_invoices(
+    db: Session,
+    rows: Iterable[str | bytes | dict],
+    owner_id: int,
+    chunk_size: int = 500,
+) -> Iterator[InvoiceBulkResult]:
+    """
+    Validate and insert invoices from an iterable of NDJSON lines or dicts.
+
+    Rows are committed in chunks of `chunk_size` and a result is yielded per
+    input row (1-based `line`), so this function holds at most one chunk; a
+    caller that collects the results (the MCP tool) holds them all. If a chunk
+    hits a database error (constraint violation, numeric overflow, ...) it is
+    retried row by row inside savepoints so only the offending rows fail.
+    """
+    default_rate = get_default_tax_rate(db, owner_id)
+    profile = get_profile(db, owner_id)
+    chunk: list[tuple[int, InvoiceCreate]] = []
+
+    def flush_chunk():
+        built = [(line, data, _build_invoice(data, owner_id, default_rate, profile)) for line, data in chunk]
+        try:
+            ids = _add_invoices(db, [b for _, _, b in built])
+            db.commit()
+            report_cache.bump(owner_id)
+            return [
+                InvoiceBulkResult(line=line, ok=True, id=invoice_id, invoice_number=data.invoice_number)
+                for (line, data, _), invoice_id in zip(built, ids)
+            ]
+        except DBAPIError:
+            db.rollback()
+        results = []
+        for line, data in chunk:
+            try:
+                with db.begin_nested():
+                    [invoice_id] = _add_invoices(db, [_build_invoice(data, owner_id, default_rate, profile)])
+                results.append(InvoiceBulkResult(line=line, ok=True, id=invoice_id, invoice_number=data.invoice_number))
+            except DBAPIError as exc:
+                results.append(
+                    InvoiceBulkResult(line=line, ok=False, invoice_number=data.invoice_number, error=str(exc.orig))
+                )
+        db.commit()
+        report_cache.bump(owner_id)
+        return results
+
+    for line, raw in enumerate(rows, start=1):
+        if isinstance(raw, (str, bytes)) and not raw.strip():
+            continue
+        try:
+            if isinstance(raw, dict):
+                data = InvoiceCreate.model_validate(raw)
+            else:
+                data = InvoiceCreate.model_validate_json(raw)
+        except ValidationError as exc:
+            yield InvoiceBulkResult(line=line, ok=False, error=_validation_message(exc))
+            continue
+        chunk.append((line, data))
+        if len(chunk) >= chunk_size:
+            yield from flush_chunk()
+            chunk.clear()
+    if chunk:
+        yield from flush_chunk()
+
+
+def _with_items(db: Session):
+    return db.query(Invoice).options(selectinload(Invoice.items))
+
+def get_invoices(
+    db: Session,
+    owner_id: int,
+    limit: int = 100,
+    cursor: str | None = None,
+    status: InvoiceStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    client_name: str | None = None,
+    currency: str | None = None,
+    include_items: bool = True,
+) -> tuple[list[Invoice], str | None]:
+    """
+    Newest-first page of invoices plus the cursor for the next page.
+
+    Items for the whole page come from one extra SELECT ... IN query; with
+    `include_items=False` they are not loaded, and touching them raises.
+    """
+    query = db.query(Invoice).options(selectinload(Invoice.items) if include_items else raiseload(Invoice.items))
+    query = query.filter(Invoice.owner_id == owner_id)
+    if status is not None:
+        query = query.filter(Invoice.status == status)
+    if created_from is not None:
+        query = query.filter(Invoice.created_at >= as_utc(created_from))
+    if created_to is not None:
+        query = query.filter(Invoice.created_at < as_utc(created_to))
+    if client_name is not None:
+        query = query.filter(Invoice.client_name == client_name)
+    if currency is not None:
+        query = query.filter(Invoice.currency == currency)
+    return keyset_page(query, Invoice, limit, cursor)
+
+def recalculate_draft_totals(
+    db: Session,
+    owner_id: int,
+    tax_rate: Decimal | None = None,
+    client_name: str | None = None,
+    currency: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> tuple[int, Decimal]:
+    """
+    Re-total the owner's matching draft invoices from their items in one
+    UPDATE ... FROM (per-invoice item sums), at `tax_rate` or else the
+    owner's current default rate. Returns (invoices updated, rate used).
+    """
+    if tax_rate is None:
+        default_rate = get_default_tax_rate(db, owner_id)
+        tax_rate = Decimal(str(default_rate)) if default_rate is not None else Decimal("0")
+
+    sums = (
+        select(InvoiceItem.invoice_id, func.sum(InvoiceItem.line_total).label("subtotal"))
+        .join(Invoice, Invoice.id == InvoiceItem.invoice_id)
+        .where(Invoice.owner_id == owner_id, Invoice.status == InvoiceStatus.draft)
+    )
+    if client_name is not None:
+        sums = sums.where(Invoice.client_name == client_name)
+    if currency is not None:
+        sums = sums.where(Invoice.currency == currency)
+    if created_from is not None:
+        sums = sums.where(Invoice.created_at >= as_utc(created_from))
+    if created_to is not None:
+        sums = sums.where(Invoice.created_at < as_utc(created_to))
+    sums = sums.group_by(InvoiceItem.invoice_id).subquery()
+
+    invoices = Invoice.__table__
+    rate = literal(tax_rate, Numeric(7, 4)) / 100
+    result = db.execute(
+        update(invoices)
+        .where(invoices.c.id == sums.c.invoice_id)
+        .values(
+            subtotal=sums.c.subtotal,
+            tax_amount=func.round(sums.c.subtotal * rate, 2),
+            total=func.round(sums.c.subtotal + sums.c.subtotal * rate, 2),
         )
-        db.add(db_item)
+    )
     db.commit()
-    return invoice
-
-def get_invoices(db: Session, owner_id: int, skip: int = 0, limit: int = 100):
-    return db.query(Invoice).filter(Invoice.owner_id == owner_id).offset(skip).limit(limit).all()
+    report_cache.bump(owner_id)
+    return result.rowcount, tax_rate
 
 def get_invoice(db: Session, invoice_id: int, owner_id: int):
     return db.query(Invoice).filter(Invoice.id == invoice_id, Invoice.owner_id == owner_id).first()
@@ -67,5 +242,6 @@ def update_invoice_status(db: Session, invoice_id: int, status: str, owner_id: i
     if invoice:
         invoice.status = status
         db.commit()
+        report_cache.bump(owner_id)
         db.refresh(invoice)
     return invoice
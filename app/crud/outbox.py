@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.models.outbox import OutboxEmail, OutboxStatus
+
+
+def enqueue_email(
+    db: Session,
+    owner_id: int,
+    to_address: str,
+    subject: str,
+    body: str,
+    invoice_id: int | None = None,
+) -> OutboxEmail:
+    """Add an email to the outbox; it is sent once the caller's transaction commits."""
+    email = OutboxEmail(
+        to_address=to_address,
+        subject=subject,
+        body=body,
+        invoice_id=invoice_id,
+        owner_id=owner_id,
+        status=OutboxStatus.pending,
+        attempts=0,
+        next_attempt_at=datetime.now(timezone.utc),
+    )
+    db.add(email)
+    return email
+
+
+def claim_due_emails(db: Session, limit: int, lease_seconds: float) -> list[OutboxEmail]:
+    """
+    Lease up to `limit` due emails to the calling worker and commit.
+
+    A claimed row's `next_attempt_at` moves `lease_seconds` ahead, so if the
+    worker dies mid-send another one picks it up after the lease runs out.
+    On Postgres concurrent workers skip each other's locked rows.
+    """
+    now = datetime.now(timezone.utc)
+    emails = (
+        db.query(OutboxEmail)
+        .filter(OutboxEmail.status == OutboxStatus.pending, OutboxEmail.next_attempt_at <= now)
+        .order_by(OutboxEmail.next_attempt_at, OutboxEmail.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    lease_until = now + timedelta(seconds=lease_seconds)
+    for email in emails:
+        email.next_attempt_at = lease_until
+    db.commit()
+    return emails
+
+
+def mark_sent(db: Session, email_ids: list[int]):
+    if not email_ids:
+        return
+    db.execute(
+        update(OutboxEmail)
+        .where(OutboxEmail.id.in_(email_ids))
+        .values(status=OutboxStatus.sent, sent_at=datetime.now(timezone.utc), last_error=None),
+    )
+    db.commit()
+
+
+def mark_failed(
+    db: Session,
+    email_id: int,
+    error: str,
+    permanent: bool,
+    max_attempts: int,
+    backoff_seconds: float,
+    max_backoff_seconds: float,
+) -> bool:
+    """
+    Record a failed attempt and retry with exponential backoff, or
+    dead-letter the email; returns True when it was dead-lettered.
+    """
+    email = db.get(OutboxEmail, email_id)
+    if email is None:
+        return False
+    email.attempts += 1
+    email.last_error = error[:1000]
+    if permanent or email.attempts >= max_attempts:
+        email.status = OutboxStatus.dead
+    else:
+        delay = min(backoff_seconds * 2 ** (email.attempts - 1), max_backoff_seconds)
+        email.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+    db.commit()
+    return email.status == OutboxStatus.dead
+
@@ -0,0 +1,65 @@
+import base64
+import json
+from datetime import datetime, timezone
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Raises ValueError for anything that is not a cursor we issued."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError, UnicodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """Cursor for ranked results, which have no stable (created_at, id) order."""
+    raw = json.dumps({"offset": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_offset_cursor(cursor: str | None) -> int:
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = int(json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))["offset"])
+    except (ValueError, TypeError, KeyError, UnicodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if offset < 0:
+        raise ValueError("Invalid cursor")
+    return offset
+
+
+def as_utc(value: datetime | None) -> datetime | None:
+    """Normalize aware filter bounds to UTC; SQLite stores UTC without an offset."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc)
+
+
+def keyset_page(query: Query, model, limit: int, cursor: str | None = None) -> tuple[list, str | None]:
+    """
+    Newest-first page of `query` keyed on (created_at, id).
+
+    Each page is one index range scan starting right after the cursor row, so
+    page 10,000 costs the same as page 1. Returns the rows and the cursor for
+    the next page (None on the last page).
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) < (created_at, row_id))
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
@@ -0,0 +1,160 @@
+"""
+Report reads over `report_rollups`, and the rebuild command.
+
+    python -m app.crud.rollup [--owner ID]
+
+recomputes the rollup from the invoice and expense ledgers: run it whenever
+the rollup is suspected to have drifted (e.g. rows written with the triggers
+disabled). Migration 0007 backfills existing databases itself.
+"""
+import argparse
+from decimal import Decimal
+from sqlalchemy import String, case, cast, delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+from app.crud.fx import conversion_factor, month_end
+from app.models.expense import Expense
+from app.models.invoice import Invoice
+from app.models.rollup import ReportRollup
+from app.core.report_cache import report_cache
+
+KINDS = {"invoice": "invoices", "expense": "expenses"}
+
+
+def month_key(db: Session, column):
+    """`YYYY-MM` of a timestamp column in UTC, as the rollup triggers compute it."""
+    if db.get_bind().dialect.name == "postgresql":
+        return func.to_char(func.timezone("UTC", column), "YYYY-MM")
+    return func.strftime("%Y-%m", column)
+
+
+def rebuild_rollups(db: Session, owner_id: int | None = None) -> int:
+    """Recompute the rollup (for one owner, or everyone) from the ledgers; returns rows written."""
+    clear = delete(ReportRollup)
+    if owner_id is not None:
+        clear = clear.where(ReportRollup.owner_id == owner_id)
+    db.execute(clear)
+    written = 0
+    for kind, model, amount in (("invoice", Invoice, Invoice.total), ("expense", Expense, Expense.amount)):
+        month = month_key(db, model.created_at)
+        currency = func.coalesce(model.currency, "")
+        status = cast(model.status, String)
+        groups = select(
+            model.owner_id, literal(kind), month, currency, status,
+            func.count(), func.coalesce(func.sum(amount), 0),
+        ).group_by(model.owner_id, month, currency, status)
+        if owner_id is not None:
+            groups = groups.where(model.owner_id == owner_id)
+        columns = ["owner_id", "kind", "month", "currency", "status", "count", "total"]
+        written += db.execute(insert(ReportRollup).from_select(columns, groups)).rowcount
+    db.commit()
+    owners = [owner_id] if owner_id is not None else db.execute(select(ReportRollup.owner_id).distinct()).scalars()
+    for owner in owners:
+        report_cache.bump(owner)
+    return written
+
+
+def _totals() -> dict:
+    return {"count": 0, "total": Decimal("0"), "by_currency": {}, "by_status": {}}
+
+
+def _money(value) -> Decimal:
+    return Decimal(str(value or 0)).quantize(Decimal("0.01"))
+
+
+def _rollup_rows(db: Session, owner_id: int, currency: str | None):
+    """The owner's rollup rows, with each row's FX factor into `currency` (NULL if unknown)."""
+    columns = [ReportRollup.kind, ReportRollup.month, ReportRollup.currency, ReportRollup.status,
+               ReportRollup.count, ReportRollup.total]
+    if currency is not None:
+        # month-end rate per (month, currency) row: cost follows the rollup, not the ledger
+        on = month_end(db, ReportRollup.month)
+        columns.append(conversion_factor(ReportRollup.currency, currency, on).label("factor"))
+    return select(*columns).where(ReportRollup.owner_id == owner_id).subquery()
+
+
+def _sums(rows, converting: bool) -> list:
+    sums = [func.sum(rows.c.count).label("count"), func.sum(rows.c.total).label("total")]
+    if converting:
+        sums += [
+            func.sum(rows.c.total * rows.c.factor).label("converted"),
+            func.sum(case((rows.c.factor.is_(None), rows.c.total), else_=0)).label("unconverted"),
+        ]
+    return sums
+
+
+def summary(db: Session, owner_id: int, currency: str | None = None) -> dict:
+    """
+    Invoice and expense counts and totals, overall and split by currency and
+    by status. With `currency`, also the total converted into it at each
+    month's closing FX rate; amounts lacking a rate are listed as unconverted.
+    """
+    rows = _rollup_rows(db, owner_id, currency)
+    result = db.execute(
+        select(rows.c.kind, rows.c.currency, rows.c.status, *_sums(rows, currency is not None))
+        .group_by(rows.c.kind, rows.c.currency, rows.c.status)
+        .having(func.sum(rows.c.count) > 0)
+    )
+    report = {name: _totals() for name in KINDS.values()}
+    if currency is not None:
+        for totals in report.values():
+            totals["converted"] = {"currency": currency.upper(), "total": Decimal("0"), "unconverted": {}}
+    for row in result:
+        totals = report[KINDS[row.kind]]
+        amount = Decimal(row.total)
+        totals["count"] += int(row.count)
+        totals["total"] += amount
+        totals["by_currency"][row.currency] = totals["by_currency"].get(row.currency, Decimal("0")) + amount
+        totals["by_status"][row.status] = totals["by_status"].get(row.status, Decimal("0")) + amount
+        if currency is not None:
+            converted = totals["converted"]
+            converted["total"] += _money(row.converted)
+            if _money(row.unconverted):
+                missing = converted["unconverted"]
+                missing[row.currency] = missing.get(row.currency, Decimal("0")) + _money(row.unconverted)
+    for totals in report.values():
+        totals["total"] = str(totals["total"])
+        totals["by_currency"] = {k: str(v) for k, v in totals["by_currency"].items()}
+        totals["by_status"] = {k: str(v) for k, v in totals["by_status"].items()}
+        if "converted" in totals:
+            converted = totals["converted"]
+            converted["total"] = str(converted["total"])
+            converted["unconverted"] = {k: str(v) for k, v in converted["unconverted"].items()}
+    return report
+
+
+def monthly(db: Session, owner_id: int, currency: str | None = None) -> dict:
+    """
+    Per-month invoice and expense totals, oldest month first. With `currency`,
+    each month also carries `converted` (at that month's closing rate) and
+    `unconverted` (native amounts lacking a rate).
+    """
+    rows = _rollup_rows(db, owner_id, currency)
+    result = db.execute(
+        select(rows.c.kind, rows.c.month, *_sums(rows, currency is not None))
+        .group_by(rows.c.kind, rows.c.month)
+        .having(func.sum(rows.c.count) > 0)
+        .order_by(rows.c.month)
+    )
+    report = {name: [] for name in KINDS.values()}
+    for row in result:
+        item = {"month": row.month, "total": str(_money(row.total))}
+        if currency is not None:
+            item["converted"] = str(_money(row.converted))
+            item["unconverted"] = str(_money(row.unconverted))
+        report[KINDS[row.kind]].append(item)
+    return report
+
+
+def main():
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Recompute report rollups from the ledgers.")
+    parser.add_argument("--owner", type=int, help="only this owner id (default: everyone)")
+    args = parser.parse_args()
+    with SessionLocal() as db:
+        written = rebuild_rollups(db, owner_id=args.owner)
+    print(f"wrote {written} rollup rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Ranked full-text search over the indexes defined in app.models.search.
+
+Free text is reduced to word tokens, each matched as a prefix and all
+required ("acme consult" finds "Acme Corp" invoices with a "Consulting"
+item). Results are best match first; pages are addressed by an offset
+cursor since relevance order has no keyset.
+"""
+import re
+from sqlalchemy import column, func, literal_column, table, text
+from sqlalchemy.orm import Session, raiseload, selectinload
+from app.crud.pagination import decode_offset_cursor, encode_offset_cursor
+from app.models.expense import Expense
+from app.models.invoice import Invoice
+
+MAX_QUERY_TOKENS = 16
+
+invoices_fts = table("invoices_fts", column("rowid"))
+expenses_fts = table("expenses_fts", column("rowid"))
+
+
+def search_tokens(q: str) -> list[str]:
+    return re.findall(r"\w+", q.lower())[:MAX_QUERY_TOKENS]
+
+
+def _fts5_match(owner_id: int, columns: str, tokens: list[str]) -> str:
+    # tokens are \w+ only, so quoting them cannot break out of the expression
+    terms = " ".join(f'"{t}"*' for t in tokens)
+    return f"owner : u{owner_id} AND {{{columns}}} : ({terms})"
+
+
+def _tsquery(tokens: list[str]) -> str:
+    return " & ".join(f"{t}:*" for t in tokens)
+
+
+def _page(query, limit: int, cursor: str | None):
+    offset = decode_offset_cursor(cursor)
+    rows = query.offset(offset).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_offset_cursor(offset + limit)
+    return rows, next_cursor
+
+
+def search_invoices(
+    db: Session,
+    owner_id: int,
+    q: str,
+    limit: int = 20,
+    cursor: str | None = None,
+    include_items: bool = True,
+) -> tuple[list[Invoice], str | None]:
+    """Invoices matching `q` in client name, number or item descriptions, best first."""
+    tokens = search_tokens(q)
+    if not tokens:
+        decode_offset_cursor(cursor)
+        return [], None
+    query = db.query(Invoice).options(selectinload(Invoice.items) if include_items else raiseload(Invoice.items))
+    query = query.filter(Invoice.owner_id == owner_id)
+    if db.get_bind().dialect.name == "postgresql":
+        tsquery = func.to_tsquery("simple", _tsquery(tokens))
+        vector = literal_column("invoices.search_vector")
+        query = query.filter(vector.op("@@")(tsquery)).order_by(func.ts_rank_cd(vector, tsquery).desc(), Invoice.id)
+    else:
+        match = _fts5_match(owner_id, "client_name invoice_number items", tokens)
+        # column weights: owner, client_name, invoice_number, items
+        rank = func.bm25(literal_column("invoices_fts"), 0.0, 4.0, 4.0, 1.0)
+        query = (
+            query.join(invoices_fts, invoices_fts.c.rowid == Invoice.id)
+            .filter(text("invoices_fts MATCH :match").bindparams(match=match))
+            .order_by(rank, Invoice.id)
+        )
+    return _page(query, limit, cursor)
+
+
+def search_expenses(
+    db: Session,
+    owner_id: int,
+    q: str,
+    limit: int = 20,
+    cursor: str | None = None,
+) -> tuple[list[Expense], str | None]:
+    """Expenses matching `q` in category or description, best first."""
+    tokens = search_tokens(q)
+    if not tokens:
+        decode_offset_cursor(cursor)
+        return [], None
+    query = db.query(Expense).filter(Expense.owner_id == owner_id)
+    if db.get_bind().dialect.name == "postgresql":
+        tsquery = func.to_tsquery("simple", _tsquery(tokens))
+        vector = literal_column("expenses.search_vector")
+        query = query.filter(vector.op("@@")(tsquery)).order_by(func.ts_rank_cd(vector, tsquery).desc(), Expense.id)
+    else:
+        match = _fts5_match(owner_id, "category description", tokens)
+        rank = func.bm25(literal_column("expenses_fts"), 0.0, 2.0, 1.0)
+        query = (
+            query.join(expenses_fts, expenses_fts.c.rowid == Expense.id)
+            .filter(text("expenses_fts MATCH :match").bindparams(match=match))
+            .order_by(rank, Expense.id)
+        )
+    return _page(query, limit, cursor)
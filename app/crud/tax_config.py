@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from app.models.tax_config import TaxConfig
 from app.schemas.tax_config import TaxConfigCreate
+from app.core.report_cache import report_cache
 
 
 def create_tax_config(db: Session, owner_id: int, data: TaxConfigCreate):
@@ -12,6 +13,7 @@ def create_tax_config(db: Session, owner_id: int, data: TaxConfigCreate):
     )
     db.add(cfg)
     db.commit()
+    report_cache.bump(owner_id)
     db.refresh(cfg)
     return cfg
 
@@ -0,0 +1,155 @@
+"""
+Invoice and expense totals bucketed by day, week, month, quarter or year in
+a given timezone, in one round trip.
+
+Both ledgers are grouped by the same bucket expression and combined with
+UNION ALL, each arm filtered on (owner_id, created_at) so it runs off the
+keyset indexes. Buckets are labelled with their local start date
+(`YYYY-MM-DD`; weeks start on Monday).
+
+Postgres converts with `timezone(tz, created_at)` and buckets with
+`date_trunc`. SQLite has no timezone database, so the UTC offsets in force
+over the queried range are computed here with zoneinfo and applied via a
+CASE over `created_at`, newest transition first.
+"""
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from sqlalchemy import Integer, case, cast, func, literal, literal_column, select, union_all
+from sqlalchemy.orm import Session
+from app.models.company_profile import CompanyProfile
+from app.models.expense import Expense
+from app.models.invoice import Invoice
+
+GRANULARITIES = ("day", "week", "month", "quarter", "year")
+# rows are server-stamped, so nothing predates this; older rows get the offset in force then
+TZ_HISTORY_START = datetime(2000, 1, 1)
+
+
+def report_timezone(db: Session, owner_id: int, tz: str | None = None) -> str:
+    """`tz` if given, else the owner's company profile timezone, else UTC."""
+    if tz is None:
+        tz = db.query(CompanyProfile.timezone).filter(CompanyProfile.owner_id == owner_id).scalar()
+    tz = tz or "UTC"
+    try:
+        ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone: {tz}")
+    return tz
+
+
+def _offset(zone: ZoneInfo, utc: datetime) -> int:
+    return int(utc.replace(tzinfo=timezone.utc).astimezone(zone).utcoffset().total_seconds())
+
+
+@lru_cache(maxsize=256)
+def _year_transitions(tz: str, year: int) -> tuple[tuple[datetime, int], ...]:
+    """(naive UTC instant, new offset in seconds) for each offset change during `year`."""
+    zone = ZoneInfo(tz)
+    transitions = []
+    day = datetime(year, 1, 1)
+    previous = _offset(zone, day)
+    while day.year == year:
+        following = day + timedelta(days=1)
+        current = _offset(zone, following)
+        if current != previous:
+            low, high = day, following  # offset(low) == previous, offset(high) == current
+            while high - low > timedelta(seconds=1):
+                mid = low + (high - low) / 2
+                if _offset(zone, mid) == previous:
+                    low = mid
+                else:
+                    high = mid
+            transitions.append((high.replace(microsecond=0), current))
+            previous = current
+        day = following
+    return tuple(transitions)
+
+
+def utc_offsets(tz: str, start: datetime, end: datetime) -> tuple[int, list[tuple[datetime, int]]]:
+    """Offset in force at `start` and the transitions up to `end` (naive UTC datetimes)."""
+    transitions = [
+        t for year in range(start.year, end.year + 1) for t in _year_transitions(tz, year) if start < t[0] <= end
+    ]
+    return _offset(ZoneInfo(tz), start), transitions
+
+
+def _sqlite_local(column, tz: str, start: datetime, end: datetime):
+    initial, transitions = utc_offsets(tz, start, end)
+    if not transitions:
+        return func.datetime(column, f"{initial:+d} seconds") if initial else func.datetime(column)
+    modifier = case(
+        *((column >= literal(at, column.type), f"{offset:+d} seconds") for at, offset in reversed(transitions)),
+        else_=f"{initial:+d} seconds",
+    )
+    return func.datetime(column, modifier)
+
+
+def bucket_expr(db: Session, column, granularity: str, tz: str, start: datetime, end: datetime):
+    """Local start date (`YYYY-MM-DD`) of the bucket holding each `column` value."""
+    if db.get_bind().dialect.name == "postgresql":
+        return func.to_char(func.date_trunc(granularity, func.timezone(tz, column)), "YYYY-MM-DD")
+    local = _sqlite_local(column, tz, start, end)
+    if granularity == "day":
+        return func.date(local)
+    if granularity == "week":
+        return func.date(local, "weekday 0", "-6 days")
+    if granularity == "quarter":
+        months_in = (cast(func.strftime("%m", local), Integer) - 1) % 3
+        return func.date(local, "start of month", func.printf("-%d months", months_in))
+    return func.date(local, f"start of {granularity}")
+
+
+def _local_to_utc(value: datetime | None, zone: ZoneInfo) -> datetime | None:
+    """Naive bounds are local to the report timezone; return naive UTC."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=zone)
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def timeseries(
+    db: Session,
+    owner_id: int,
+    granularity: str = "month",
+    tz: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> dict:
+    """Per-bucket invoice and expense counts and totals, oldest bucket first."""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    tz = report_timezone(db, owner_id, tz)
+    zone = ZoneInfo(tz)
+    start = _local_to_utc(created_from, zone)
+    end = _local_to_utc(created_to, zone)
+    offsets_from = max(start or TZ_HISTORY_START, TZ_HISTORY_START)
+    offsets_to = end or datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=1)
+
+    arms = []
+    for kind, model, amount in (("invoice", Invoice, Invoice.total), ("expense", Expense, Expense.amount)):
+        period = bucket_expr(db, model.created_at, granularity, tz, offsets_from, offsets_to).label("period")
+        arm = (
+            select(
+                literal_column(f"'{kind}'").label("kind"),
+                period,
+                func.count().label("count"),
+                func.coalesce(func.sum(amount), 0).label("total"),
+            )
+            .where(model.owner_id == owner_id)
+            .group_by(literal_column("period"))
+        )
+        if start is not None:
+            arm = arm.where(model.created_at >= start)
+        if end is not None:
+            arm = arm.where(model.created_at < end)
+        arms.append(arm)
+    rows = db.execute(union_all(*arms).order_by(literal_column("period"), literal_column("kind")))
+
+    report = {"granularity": granularity, "timezone": tz, "invoices": [], "expenses": []}
+    for row in rows:
+        total = Decimal(str(row.total)).quantize(Decimal("0.01"))
+        report[f"{row.kind}s"].append({"period": row.period, "count": int(row.count), "total": str(total)})
+    return report
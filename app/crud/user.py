@@ -4,8 +4,8 @@ from app.models.user import User
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
-def create_user(db: Session, email: str, password: str):
-    hashed = User.get_password_hash(password)
+def create_user(db: Session, email: str, password: str | None = None, hashed_password: str | None = None):
+    hashed = hashed_password or User.get_password_hash(password)
     user = User(email=email, hashed_password=hashed)
     db.add(user)
     db.commit()
@@ -1,3 +1,4 @@
+from contextlib import contextmanager
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
@@ -12,3 +13,21 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+@contextmanager
+def session_scope():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_session_scope():
+    """
+    Dependency handing out `session_scope` unopened, for handlers that only
+    sometimes need the database. Being async and session-free, it costs no
+    worker thread; the caller opens a session (in a thread) only if needed.
+    """
+    return session_scope
@@ -1,11 +1,18 @@
 import os
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI
 from app.api.v1.router import router as v1_router
 from app.models.base import Base
 from app.db.session import engine
 from app.core.config import settings
-from app.core.ratelimit import build_limiter, SimpleRateLimiter
+from app.core.middleware import RateLimitMiddleware, get_limiter
+from app.core.last_used import last_used_buffer
+from app.core.auth_cache import principal_cache
+from app.core.passwords import password_hasher
+from app.core.pdf_cache import pdf_cache
+from app.core.pdf_export import shutdown_pdf_pool
+from app.core.qr import render_qr_png
+from app.core.report_cache import report_cache
+from app.core.outbox import outbox_worker
 
 app = FastAPI(
     title="Modular Financial Protocols (MCP)",
@@ -13,6 +20,7 @@ app = FastAPI(
     version="0.1.0"
 )
 
+app.add_middleware(RateLimitMiddleware)
 app.include_router(v1_router, prefix="/api/v1")
 
 
@@ -21,6 +29,18 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return {
+        "password_hashing": password_hasher.stats(),
+        "auth_cache": principal_cache.stats(),
+        "pdf_cache": pdf_cache.stats(),
+        "qr_cache": render_qr_png.cache_info()._asdict(),
+        "report_cache": report_cache.stats(),
+        "email_outbox": outbox_worker.stats(),
+    }
+
+
 @app.on_event("startup")
 def create_sqlite_schema_if_needed():
     """
@@ -30,28 +50,26 @@ def create_sqlite_schema_if_needed():
     if settings.DATABASE_URL.startswith("sqlite"):
         Base.metadata.create_all(bind=engine)
     # initialize limiter instance on app state so tests can override/reset
-    app.state.limiter = build_limiter(settings.REDIS_URL, settings.RATE_LIMIT_PER_MINUTE, 60)
-
-
-@app.middleware("http")
-async def rate_limit(request, call_next):
-    limiter = getattr(app.state, "limiter", build_limiter(settings.REDIS_URL, settings.RATE_LIMIT_PER_MINUTE, 60))
-    # key by api-key if present, else client host
-    key = request.headers.get("x-api-key") or request.client.host
-    try:
-        limiter.check(key)
-        # HTTPS enforcement (except localhost or disabled)
-        if settings.REQUIRE_HTTPS:
-            # Only enforce when behind a proxy that sets X-Forwarded-Proto.
-            # Direct Uvicorn connections are plain HTTP (TLS terminates at the proxy).
-            forwarded_proto = request.headers.get("x-forwarded-proto")
-            proto = forwarded_proto or request.url.scheme
-            host = (request.headers.get("host", "") or "").split(":", 1)[0]
-            insecure_ok_hosts = {"127.0.0.1", "localhost", "testserver"}
-            if forwarded_proto and proto != "https" and host not in insecure_ok_hosts:
-                raise HTTPException(status_code=400, detail="HTTPS required")
-    except HTTPException as exc:
-        return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
-
-    response = await call_next(request)
-    return response
+    get_limiter(app)
+    last_used_buffer.start()
+
+
+@app.on_event("shutdown")
+def flush_api_key_last_used():
+    last_used_buffer.stop()
+
+
+@app.on_event("shutdown")
+def stop_pdf_export_pool():
+    shutdown_pdf_pool()
+
+
+@app.on_event("startup")
+async def start_email_outbox():
+    if settings.SMTP_HOST:
+        outbox_worker.start()
+
+
+@app.on_event("shutdown")
+async def stop_email_outbox():
+    await outbox_worker.stop()
@@ -1,37 +1,70 @@
 from __future__ import annotations
 
+import base64
 from contextlib import contextmanager
+from datetime import date, datetime
 
-from jose import JWTError, jwt
 from mcp.server.fastmcp import Context, FastMCP
 from pydantic import BaseModel
-from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from app.core.auth import AuthError, resolve_credentials
+from app.core.auth_cache import Principal
 from app.core.config import settings
-from app.crud.api_key import get_user_api_keys, verify_api_key_plain
+from app.core.last_used import last_used_buffer
+from app.core.report_cache import report_cache
+from app.core.pdf_export import export_invoice_pdfs, shutdown_pdf_pool
+from app.crud import rollup
+from app.crud.aging import AGING_CLIENT_LIMIT, MAX_AGING_CLIENTS, aging, aging_date
 from app.crud.company_profile import get_or_create_profile, update_profile
 from app.crud.expense import create_expense, get_expense, get_expenses, update_expense
-from app.crud.invoice import create_invoice, get_invoice, get_invoices, update_invoice_status
+from app.crud.export import EXPORT_FORMATS, expense_rows, invoice_rows, serialize
+from app.crud.search import search_expenses, search_invoices
+from app.crud.invoice import (
+    create_invoice,
+    get_invoice,
+    get_invoices,
+    import_invoices,
+    recalculate_draft_totals,
+    update_invoice_status,
+)
+from app.crud.timeseries import timeseries
 from app.crud.tax_config import create_tax_config, list_tax_configs
-from app.crud.user import get_user_by_email, get_user_by_id
+from app.crud.user import get_user_by_id
 from app.db.session import SessionLocal, engine
 from app.models.base import Base
-from app.models.expense import Expense
-from app.models.invoice import Invoice
+from app.models.expense import ExpenseStatus
+from app.models.invoice import InvoiceStatus
 from app.schemas.company_profile import CompanyProfileOut, CompanyProfileUpdate
-from app.schemas.expense import ExpenseCreate, ExpenseOut, ExpenseUpdate
-from app.schemas.invoice import InvoiceCreate, InvoiceOut
+from app.schemas.expense import ExpenseCreate, ExpenseOut, ExpensePage, ExpenseUpdate
+from app.schemas.invoice import (
+    DraftRecalculation,
+    DraftRecalculationResult,
+    InvoiceBulkResult,
+    InvoiceCreate,
+    InvoiceHeaderOut,
+    InvoiceOut,
+    InvoicePage,
+)
 from app.schemas.tax_config import TaxConfigCreate, TaxConfigOut
 
+MAX_PAGE_SIZE = 500
+MAX_SEARCH_PAGE_SIZE = 100
+MAX_BULK_ROWS = 1000  # results are returned in one message; stream larger imports via POST /invoices/bulk
 
-class AuthError(ValueError):
-    pass
+
+class ConvertedTotals(BaseModel):
+    currency: str
+    total: str
+    unconverted: dict[str, str] = {}
 
 
 class ReportTotals(BaseModel):
     count: int
     total: str
+    by_currency: dict[str, str] = {}
+    by_status: dict[str, str] = {}
+    converted: ConvertedTotals | None = None
 
 
 class SummaryReport(BaseModel):
@@ -42,6 +75,8 @@ class SummaryReport(BaseModel):
 class MonthlyItem(BaseModel):
     month: str
     total: str
+    converted: str | None = None
+    unconverted: str | None = None
 
 
 class MonthlyReport(BaseModel):
@@ -49,6 +84,42 @@ class MonthlyReport(BaseModel):
     expenses: list[MonthlyItem]
 
 
+class AgingBuckets(BaseModel):
+    current: str
+    days_1_30: str
+    days_31_60: str
+    days_61_90: str
+    days_over_90: str
+    total: str
+
+
+class AgingClient(AgingBuckets):
+    client_name: str
+    currency: str
+    count: int
+
+
+class AgingReport(BaseModel):
+    as_of: str
+    timezone: str
+    currencies: dict[str, AgingBuckets]
+    clients: list[AgingClient]
+    clients_omitted: int = 0
+
+
+class TimeseriesItem(BaseModel):
+    period: str
+    count: int
+    total: str
+
+
+class TimeseriesReport(BaseModel):
+    granularity: str
+    timezone: str
+    invoices: list[TimeseriesItem]
+    expenses: list[TimeseriesItem]
+
+
 @contextmanager
 def db_session() -> Session:
     db = SessionLocal()
@@ -66,55 +137,17 @@ def _get_headers(ctx: Context):
     return request.headers
 
 
-def _require_user(db: Session, ctx: Context):
+def _require_user(db: Session, ctx: Context) -> Principal:
     if not settings.MCP_AUTH_REQUIRED:
         if settings.MCP_DEFAULT_OWNER_ID is None:
             raise AuthError("MCP_AUTH_REQUIRED is false but MCP_DEFAULT_OWNER_ID is not set.")
         user = get_user_by_id(db, settings.MCP_DEFAULT_OWNER_ID)
         if not user:
             raise AuthError("Default owner user not found.")
-        return user
+        return Principal(id=user.id, email=user.email)
 
     headers = _get_headers(ctx)
-    authorization = headers.get("authorization")
-    if authorization and authorization.startswith("Bearer "):
-        token = authorization[len("Bearer ") :]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        except JWTError as exc:
-            raise AuthError("Invalid token.") from exc
-        email = payload.get("sub")
-        if not email:
-            raise AuthError("Invalid token.")
-        user = get_user_by_email(db, email)
-        if not user:
-            raise AuthError("User not found.")
-        return user
-
-    x_api_key = headers.get("x-api-key")
-    if x_api_key:
-        if not x_api_key.startswith("mcp_u"):
-            raise AuthError("Invalid API key format.")
-        parts = x_api_key.split("_", 2)
-        if len(parts) != 3 or not parts[1].startswith("u"):
-            raise AuthError("Invalid API key format.")
-        try:
-            user_id = int(parts[1][1:])
-        except ValueError as exc:
-            raise AuthError("Invalid API key format.") from exc
-
-        user = get_user_by_id(db, user_id)
-        if not user:
-            raise AuthError("Invalid API key.")
-
-        user_keys = get_user_api_keys(db, user_id)
-        for key_obj in user_keys:
-            if verify_api_key_plain(x_api_key, key_obj):
-                db.commit()
-                return user
-        raise AuthError("Invalid API key.")
-
-    raise AuthError("Missing credentials.")
+    return resolve_credentials(db, headers.get("authorization"), headers.get("x-api-key"))
 
 
 mcp = FastMCP(
@@ -135,12 +168,181 @@ def invoices_create(data: InvoiceCreate, ctx: Context) -> InvoiceOut:
         return InvoiceOut.model_validate(invoice)
 
 
-@mcp.tool(name="invoices.list", description="List invoices for the authenticated user.")
-def invoices_list(ctx: Context, skip: int = 0, limit: int = 100) -> list[InvoiceOut]:
+@mcp.tool(
+    name="invoices.bulk_create",
+    description=(
+        f"Create up to {MAX_BULK_ROWS} invoices at once; returns a per-row result (line is the 1-based "
+        "row index). Larger imports should stream NDJSON to POST /api/v1/invoices/bulk."
+    ),
+)
+def invoices_bulk_create(rows: list[dict], ctx: Context, chunk_size: int = 500) -> list[InvoiceBulkResult]:
+    if len(rows) > MAX_BULK_ROWS:
+        raise ValueError(f"at most {MAX_BULK_ROWS} rows per call; stream larger imports to POST /invoices/bulk")
+    with db_session() as db:
+        user = _require_user(db, ctx)
+        return list(import_invoices(db, rows, user.id, chunk_size=max(1, chunk_size)))
+
+
+@mcp.tool(
+    name="invoices.list",
+    description=(
+        "List invoices for the authenticated user, newest first. Pass next_cursor back as cursor "
+        "for the following page. Optional filters: status, created_from/created_to (ISO datetimes), "
+        "client_name (exact), currency. include_items=false returns header rows without line items."
+    ),
+)
+def invoices_list(
+    ctx: Context,
+    limit: int = 100,
+    cursor: str | None = None,
+    status: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    client_name: str | None = None,
+    currency: str | None = None,
+    include_items: bool = True,
+) -> InvoicePage:
+    with db_session() as db:
+        user = _require_user(db, ctx)
+        invoices, next_cursor = get_invoices(
+            db,
+            user.id,
+            limit=max(1, min(limit, MAX_PAGE_SIZE)),
+            cursor=cursor,
+            status=InvoiceStatus(status) if status else None,
+            created_from=created_from,
+            created_to=created_to,
+            client_name=client_name,
+            currency=currency,
+            include_items=include_items,
+        )
+        schema = InvoiceOut if include_items else InvoiceHeaderOut
+        return InvoicePage(items=[schema.model_validate(inv) for inv in invoices], next_cursor=next_cursor)
+
+
+@mcp.tool(
+    name="invoices.search",
+    description=(
+        "Full-text search over the authenticated user's invoices: client name, invoice number and "
+        "line-item descriptions. Every word must match, as a prefix (\"acme consult\" finds Acme "
+        "invoices with a consulting item). Best match first; pass next_cursor back as cursor for the "
+        "following page. include_items=false returns header rows without line items."
+    ),
+)
+def invoices_search(
+    ctx: Context,
+    q: str,
+    limit: int = 20,
+    cursor: str | None = None,
+    include_items: bool = True,
+) -> InvoicePage:
+    with db_session() as db:
+        user = _require_user(db, ctx)
+        invoices, next_cursor = search_invoices(
+            db,
+            user.id,
+            q,
+            limit=max(1, min(limit, MAX_SEARCH_PAGE_SIZE)),
+            cursor=cursor,
+            include_items=include_items,
+        )
+        schema = InvoiceOut if include_items else InvoiceHeaderOut
+        return InvoicePage(items=[schema.model_validate(inv) for inv in invoices], next_cursor=next_cursor)
+
+
+class PdfExport(BaseModel):
+    filename: str
+    content_base64: str
+
+
+@mcp.tool(
+    name="invoices.export_pdfs",
+    description=(
+        "ZIP of PDFs for the authenticated user's invoices, base64-encoded. Optional filters: status, "
+        "created_from/created_to (ISO datetimes), client_name (exact), currency. For large periods "
+        "prefer the streaming REST endpoint GET /api/v1/invoices/export/pdf."
+    ),
+)
+def invoices_export_pdfs(
+    ctx: Context,
+    status: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    client_name: str | None = None,
+    currency: str | None = None,
+) -> PdfExport:
+    with db_session() as db:
+        user = _require_user(db, ctx)
+        archive = b"".join(
+            export_invoice_pdfs(
+                db,
+                user.id,
+                status=InvoiceStatus(status) if status else None,
+                created_from=created_from,
+                created_to=created_to,
+                client_name=client_name,
+                currency=currency,
+            )
+        )
+        return PdfExport(filename="invoices.zip", content_base64=base64.b64encode(archive).decode("ascii"))
+
+
+class LedgerExport(BaseModel):
+    format: str
+    content: str
+
+
+def _export_format(fmt: str) -> str:
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    return fmt
+
+
+@mcp.tool(
+    name="invoices.export",
+    description=(
+        "Every matching invoice (oldest first, totals without line items) as CSV or NDJSON text. "
+        "Optional filters: status, created_from/created_to (ISO datetimes), client_name (exact), currency. "
+        "For very large ledgers prefer the streaming REST endpoint GET /api/v1/invoices/export."
+    ),
+)
+def invoices_export(
+    ctx: Context,
+    format: str = "ndjson",
+    status: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    client_name: str | None = None,
+    currency: str | None = None,
+) -> LedgerExport:
+    fmt = _export_format(format)
+    with db_session() as db:
+        user = _require_user(db, ctx)
+        names, rows = invoice_rows(
+            db,
+            user.id,
+            status=InvoiceStatus(status) if status else None,
+            created_from=created_from,
+            created_to=created_to,
+            client_name=client_name,
+            currency=currency,
+        )
+        return LedgerExport(format=fmt, content="".join(serialize(names, rows, fmt)))
+
+
+@mcp.tool(
+    name="invoices.recalculate_drafts",
+    description=(
+        "Recompute subtotal, tax and total of the authenticated user's draft invoices from their items. "
+        "tax_rate (percent) defaults to the user's default tax config. Optional filters: client_name, "
+        "currency, created_from/created_to (ISO datetimes)."
+    ),
+)
+def invoices_recalculate_drafts(params: DraftRecalculation, ctx: Context) -> DraftRecalculationResult:
     with db_session() as db:
         user = _require_user(db, ctx)
-        invoices = get_invoices(db, user.id, skip=skip, limit=limit)
-        return [InvoiceOut.model_validate(inv) for inv in invoices]
+        updated, rate = recalculate_draft_totals(db, user.id, **params.model_dump())
+        return DraftRecalculationResult(updated=updated, tax_rate=rate)
 
 
 @mcp.tool(name="invoices.get", description="Fetch a single invoice by ID.")
@@ -171,12 +373,87 @@ def expenses_create(data: ExpenseCreate, ctx: Context) -> ExpenseOut:
         return ExpenseOut.model_validate(expense)
 
 
-@mcp.tool(name="expenses.list", description="List expenses for the authenticated user.")
-def expenses_list(ctx: Context) -> list[ExpenseOut]:
+@mcp.tool(
+    name="expenses.list",
+    description=(
+        "List expenses for the authenticated user, newest first. Pass next_cursor back as cursor "
+        "for the following page. Optional filters: status, created_from/created_to (ISO datetimes), "
+        "category (exact), currency."
+    ),
+)
+def expenses_list(
+    ctx: Context,
+    limit: int = 100,
+    cursor: str | None = None,
+    status: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    category: str | None = None,
+    currency: str | None = None,
+) -> ExpensePage:
+    with db_session() as db:
+        user = _require_user(db, ctx)
+        expenses, next_cursor = get_expenses(
+            db,
+            user.id,
+            limit=max(1, min(limit, MAX_PAGE_SIZE)),
+            cursor=cursor,
+            status=ExpenseStatus(status) if status else None,
+            created_from=created_from,
+            created_to=created_to,
+            category=category,
+            currency=currency,
+        )
+        return ExpensePage(items=[ExpenseOut.model_validate(exp) for exp in expenses], next_cursor=next_cursor)
+
+
+@mcp.tool(
+    name="expenses.search",
+    description=(
+        "Full-text search over the authenticated user's expenses: category and description. Every "
+        "word must match, as a prefix. Best match first; pass next_cursor back as cursor for the "
+        "following page."
+    ),
+)
+def expenses_search(ctx: Context, q: str, limit: int = 20, cursor: str | None = None) -> ExpensePage:
+    with db_session() as db:
+        user = _require_user(db, ctx)
+        expenses, next_cursor = search_expenses(
+            db, user.id, q, limit=max(1, min(limit, MAX_SEARCH_PAGE_SIZE)), cursor=cursor
+        )
+        return ExpensePage(items=[ExpenseOut.model_validate(exp) for exp in expenses], next_cursor=next_cursor)
+
+
+@mcp.tool(
+    name="expenses.export",
+    description=(
+        "Every matching expense (oldest first) as CSV or NDJSON text. Optional filters: status, "
+        "created_from/created_to (ISO datetimes), category, currency. For very large ledgers prefer "
+        "the streaming REST endpoint GET /api/v1/expenses/export."
+    ),
+)
+def expenses_export(
+    ctx: Context,
+    format: str = "ndjson",
+    status: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    category: str | None = None,
+    currency: str | None = None,
+) -> LedgerExport:
+    fmt = _export_format(format)
     with db_session() as db:
         user = _require_user(db, ctx)
-        expenses = get_expenses(db, user.id)
-        return [ExpenseOut.model_validate(exp) for exp in expenses]
+        names, rows = expense_rows(
+            db,
+            user.id,
+            status=ExpenseStatus(status) if status else None,
+            created_from=created_from,
+            created_to=created_to,
+            category=category,
+            currency=currency,
+        )
+        return LedgerExport(format=fmt, content="".join(serialize(names, rows, fmt)))
 
 
 @mcp.tool(name="expenses.get", description="Fetch a single expense by ID.")
@@ -232,58 +509,82 @@ def company_profile_update(data: CompanyProfileUpdate, ctx: Context) -> CompanyP
         return CompanyProfileOut.model_validate(profile)
 
 
-@mcp.tool(name="reports.summary", description="Totals for invoices and expenses.")
-def reports_summary(ctx: Context) -> SummaryReport:
+def _reporting_currency(currency: str | None) -> str | None:
+    if currency is not None and not (len(currency) == 3 and currency.isascii() and currency.isalpha()):
+        raise ValueError("currency must be a three-letter ISO code")
+    return currency and currency.upper()
+
+
+@mcp.tool(
+    name="reports.summary",
+    description=(
+        "Totals for invoices and expenses, also split by currency and by status. Optional currency "
+        "(ISO code) adds totals converted at month-end FX rates, listing amounts without a rate as unconverted."
+    ),
+)
+def reports_summary(ctx: Context, currency: str | None = None) -> SummaryReport:
+    params = {"currency": _reporting_currency(currency)}
     with db_session() as db:
         user = _require_user(db, ctx)
-        inv_sum = (
-            db.query(
-                func.coalesce(func.sum(Invoice.total), 0).label("total"),
-                func.count(Invoice.id).label("count"),
-            )
-            .filter(Invoice.owner_id == user.id)
-            .first()
-        )
-        exp_sum = (
-            db.query(
-                func.coalesce(func.sum(Expense.amount), 0).label("total"),
-                func.count(Expense.id).label("count"),
-            )
-            .filter(Expense.owner_id == user.id)
-            .first()
-        )
-        return SummaryReport(
-            invoices=ReportTotals(count=int(inv_sum.count), total=str(inv_sum.total)),
-            expenses=ReportTotals(count=int(exp_sum.count), total=str(exp_sum.total)),
-        )
+        report = report_cache.get_or_compute(user.id, "summary", params, lambda: rollup.summary(db, user.id, **params))
+        return SummaryReport(**report)
 
 
-@mcp.tool(name="reports.monthly", description="Monthly totals for invoices and expenses.")
-def reports_monthly(ctx: Context) -> MonthlyReport:
+@mcp.tool(
+    name="reports.monthly",
+    description=(
+        "Monthly totals for invoices and expenses. Optional currency (ISO code) adds each month's total "
+        "converted at that month's closing FX rate, plus the native amount left unconverted."
+    ),
+)
+def reports_monthly(ctx: Context, currency: str | None = None) -> MonthlyReport:
+    params = {"currency": _reporting_currency(currency)}
     with db_session() as db:
         user = _require_user(db, ctx)
-        invoices = (
-            db.query(
-                func.strftime("%Y-%m", Invoice.created_at).label("month"),
-                func.coalesce(func.sum(Invoice.total), 0).label("total"),
-            )
-            .filter(Invoice.owner_id == user.id)
-            .group_by("month")
-            .all()
-        )
-        expenses = (
-            db.query(
-                func.strftime("%Y-%m", Expense.created_at).label("month"),
-                func.coalesce(func.sum(Expense.amount), 0).label("total"),
-            )
-            .filter(Expense.owner_id == user.id)
-            .group_by("month")
-            .all()
-        )
-        return MonthlyReport(
-            invoices=[MonthlyItem(month=row.month, total=str(row.total)) for row in invoices],
-            expenses=[MonthlyItem(month=row.month, total=str(row.total)) for row in expenses],
-        )
+        report = report_cache.get_or_compute(user.id, "monthly", params, lambda: rollup.monthly(db, user.id, **params))
+        return MonthlyReport(**report)
+
+
+@mcp.tool(
+    name="reports.timeseries",
+    description=(
+        "Invoice and expense counts and totals per bucket, oldest first. granularity: day, week, "
+        "month (default), quarter or year. tz: IANA timezone (default: the company profile's, else "
+        "UTC). Optional created_from/created_to (ISO datetimes; naive values are in tz). Buckets "
+        "are labelled with their local start date; weeks start on Monday."
+    ),
+)
+def reports_timeseries(
+    ctx: Context,
+    granularity: str = "month",
+    tz: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> TimeseriesReport:
+    with db_session() as db:
+        user = _require_user(db, ctx)
+        params = {"granularity": granularity, "tz": tz, "created_from": created_from, "created_to": created_to}
+        report = report_cache.get_or_compute(user.id, "timeseries", params, lambda: timeseries(db, user.id, **params))
+        return TimeseriesReport(**report)
+
+
+@mcp.tool(
+    name="reports.aging",
+    description=(
+        "Accounts-receivable aging of sent invoices: outstanding totals current / 1-30 / 31-60 / "
+        "61-90 / 90+ days past due, per currency and for the `limit` largest clients (default 10, max "
+        "100). as_of: ISO date, default today in tz. tz: IANA timezone (default: the company profile's, else UTC)."
+    ),
+)
+def reports_aging(
+    ctx: Context, as_of: date | None = None, tz: str | None = None, limit: int = AGING_CLIENT_LIMIT,
+) -> AgingReport:
+    with db_session() as db:
+        user = _require_user(db, ctx)
+        as_of, tz = aging_date(db, user.id, as_of, tz)
+        params = {"as_of": as_of, "tz": tz, "limit": max(0, min(limit, MAX_AGING_CLIENTS))}
+        report = report_cache.get_or_compute(user.id, "aging", params, lambda: aging(db, user.id, **params))
+        return AgingReport(**report)
 
 
 def _ensure_sqlite_schema() -> None:
@@ -293,7 +594,12 @@ def _ensure_sqlite_schema() -> None:
 
 def main() -> None:
     _ensure_sqlite_schema()
-    mcp.run(transport="sse")
+    last_used_buffer.start()
+    try:
+        mcp.run(transport="sse")
+    finally:
+        last_used_buffer.stop()
+        shutdown_pdf_pool()
 
 
 if __name__ == "__main__":
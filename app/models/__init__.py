@@ -4,3 +4,7 @@ from .expense import Expense, ExpenseStatus
 from .api_key import ApiKey
 from .tax_config import TaxConfig
 from .company_profile import CompanyProfile
+from .outbox import OutboxEmail, OutboxStatus
+from .rollup import ReportRollup
+from .fx import FxRate
+from . import search  # noqa: F401  (full-text index DDL)
@@ -1,17 +1,19 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, func
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Index, func
 from sqlalchemy.orm import relationship
 from .base import Base
 
 class ApiKey(Base):
     __tablename__ = "api_keys"
+    # verification looks keys up by (prefix, hash) in a single indexed probe
+    __table_args__ = (Index("ix_api_keys_prefix_hash", "key_prefix", "key_hash", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=True)
-    key_prefix = Column(String(20), index=True)  # For future scaling: first 12 chars
+    key_prefix = Column(String(20), nullable=False)  # first 12 chars of the plain key
     key_hash = Column(String, nullable=False)
     expires_at = Column(DateTime(timezone=True), nullable=True)
     last_used_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     owner = relationship("User", back_populates="api_keys")
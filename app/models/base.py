@@ -1,12 +1,21 @@
 from sqlalchemy import Column, Integer, DateTime, func
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
+# SQLite's CURRENT_TIMESTAMP stores whole seconds without a fraction. Bind
+# datetimes in that same text form so comparisons against server-stamped
+# values (keyset cursors on created_at) match exactly.
+ServerTimestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
+
 
 class BaseModel(Base):
     """Abstract base for common audit columns."""
     __abstract__ = True
     id = Column(Integer, primary_key=True, index=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(ServerTimestamp, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
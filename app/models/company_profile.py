@@ -13,5 +13,6 @@ class CompanyProfile(Base):
     header_text = Column(String, nullable=True)
     tax_label = Column(String, nullable=True)
     tax_note = Column(String, nullable=True)
+    timezone = Column(String, nullable=True)  # IANA name; report buckets default to it (UTC if unset)
 
     owner = relationship("User", back_populates="company_profile")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Numeric, Enum, Integer, ForeignKey, func
+from sqlalchemy import Column, String, DateTime, Numeric, Enum, Index, Integer, ForeignKey, func
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 import enum
@@ -10,6 +10,11 @@ class ExpenseStatus(enum.Enum):
 
 class Expense(BaseModel):
     __tablename__ = "expenses"
+    # every tenant query starts with owner_id; see tests/test_query_plans.py
+    __table_args__ = (
+        Index("ix_expenses_owner_created", "owner_id", "created_at", "id"),  # keyset pages
+        Index("ix_expenses_owner_status", "owner_id", "status", "created_at", "id"),
+    )
 
     date = Column(DateTime(timezone=True), server_default=func.now())
     amount = Column(Numeric(12, 2), nullable=False)
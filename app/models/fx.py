@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Date, Numeric, String
+from .base import Base
+
+
+class FxRate(Base):
+    """
+    Reference exchange rate: `rate` units of `currency` buy one unit of
+    FX_BASE_CURRENCY on `date` (ECB-style quotes). Shared by all owners.
+    """
+    __tablename__ = "fx_rates"
+
+    # (currency, date) primary key: "latest rate on or before D" is one index probe
+    currency = Column(String(3), primary_key=True)
+    date = Column(Date, primary_key=True)
+    rate = Column(Numeric(18, 8), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Numeric, ForeignKey, Enum, func, Integer
+from sqlalchemy import Column, String, DateTime, Numeric, ForeignKey, Enum, Index, func, Integer
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 import enum
@@ -11,6 +11,12 @@ class InvoiceStatus(enum.Enum):
 
 class Invoice(BaseModel):
     __tablename__ = "invoices"
+    # every tenant query starts with owner_id; see tests/test_query_plans.py
+    __table_args__ = (
+        Index("ix_invoices_owner_created", "owner_id", "created_at", "id"),  # keyset pages
+        Index("ix_invoices_owner_status", "owner_id", "status", "created_at", "id"),
+        Index("ix_invoices_owner_due", "owner_id", "due_date"),
+    )
 
     invoice_number = Column(String, unique=True, index=True)
     issue_date = Column(DateTime(timezone=True), server_default=func.now())
@@ -38,7 +44,7 @@ class InvoiceItem(BaseModel):
     unit_price = Column(Numeric(12, 2), nullable=False)
     line_total = Column(Numeric(12, 2), default=0)
 
-    invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=False)
+    invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=False, index=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     owner = relationship("User", back_populates="invoice_items")
     invoice = relationship("Invoice", back_populates="items")
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, String, Text, Integer, ForeignKey, DateTime, Enum, Index
+from .base import BaseModel
+import enum
+
+class OutboxStatus(enum.Enum):
+    pending = "pending"
+    sent = "sent"
+    dead = "dead"  # permanent failure or out of attempts; kept for inspection
+
+class OutboxEmail(BaseModel):
+    """An email waiting for (or done with) delivery by the outbox worker."""
+    __tablename__ = "email_outbox"
+    # the worker polls for due pending rows
+    __table_args__ = (Index("ix_email_outbox_due", "status", "next_attempt_at"),)
+
+    to_address = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=True)  # attach this invoice's PDF
+    status = Column(Enum(OutboxStatus), default=OutboxStatus.pending, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False)
+    last_error = Column(String, nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
@@ -0,0 +1,115 @@
+"""
+Per-owner, per-month report rollups.
+
+One row per (owner, kind, month, currency, status) holding the row count and
+amount total of the matching invoices (`kind='invoice'`, `total`) or expenses
+(`kind='expense'`, `amount`). Months are UTC calendar months of `created_at`.
+
+Triggers apply every insert, update and delete of the source rows to the
+rollup inside the writing transaction, so reports read O(months) rows instead
+of scanning the ledger. Rows whose count drops to zero are kept and filtered
+on read. `python -m app.crud.rollup` recomputes the table from the ledger
+to repair drift; migration 0007 carries its own frozen copy of these triggers.
+"""
+from sqlalchemy import Column, ForeignKey, Integer, Numeric, String, event, text
+from .base import Base
+
+
+class ReportRollup(Base):
+    __tablename__ = "report_rollups"
+
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    kind = Column(String(16), primary_key=True)  # invoice | expense
+    month = Column(String(7), primary_key=True)  # YYYY-MM, UTC
+    currency = Column(String, primary_key=True)  # '' when the row has none
+    status = Column(String(16), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    total = Column(Numeric(14, 2), nullable=False, default=0)
+
+
+ROLLUP_SOURCES = (("invoices", "invoice", "total"), ("expenses", "expense", "amount"))
+
+_SQLITE_KEY = "'{kind}', strftime('%Y-%m', {row}.created_at), coalesce({row}.currency, ''), {row}.status"
+_SQLITE_UPSERT = """INSERT INTO report_rollups(owner_id, kind, month, currency, status, count, total)
+        VALUES ({row}.owner_id, {key}, {sign}1, {sign}coalesce({row}.{amount}, 0))
+        ON CONFLICT(owner_id, kind, month, currency, status)
+        DO UPDATE SET count = count + excluded.count, total = round(total + excluded.total, 2);"""
+
+
+def _sqlite_ddl() -> list[str]:
+    statements = []
+    for table, kind, amount in ROLLUP_SOURCES:
+        def upsert(row, sign):
+            key = _SQLITE_KEY.format(kind=kind, row=row)
+            return _SQLITE_UPSERT.format(row=row, key=key, sign=sign, amount=amount)
+
+        changed = " OR ".join(
+            f"old.{c} IS NOT new.{c}" for c in (amount, "status", "currency", "owner_id", "created_at")
+        )
+        statements += [
+            f"CREATE TRIGGER {table}_rollup_ai AFTER INSERT ON {table} BEGIN {upsert('new', '')} END",
+            f"CREATE TRIGGER {table}_rollup_ad AFTER DELETE ON {table} BEGIN {upsert('old', '-')} END",
+            f"CREATE TRIGGER {table}_rollup_au AFTER UPDATE ON {table} WHEN {changed} BEGIN "
+            f"{upsert('old', '-')} {upsert('new', '')} END",
+        ]
+    return statements
+
+
+_POSTGRES_APPLY = """INSERT INTO report_rollups(owner_id, kind, month, currency, status, count, total)
+            SELECT owner_id, '{kind}', to_char(created_at AT TIME ZONE 'UTC', 'YYYY-MM'),
+                coalesce(currency, ''), status::text, {sign}count(*), {sign}coalesce(sum({amount}), 0)
+            FROM {rows} GROUP BY 1, 3, 4, 5
+            ON CONFLICT (owner_id, kind, month, currency, status) DO UPDATE
+            SET count = report_rollups.count + excluded.count, total = report_rollups.total + excluded.total;"""
+
+
+def _postgres_ddl() -> list[str]:
+    # statement-level with transition tables: one grouped upsert per bulk write
+    statements = []
+    for table, kind, amount in ROLLUP_SOURCES:
+        statements += [
+            f"""CREATE OR REPLACE FUNCTION {table}_rollup() RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    {_POSTGRES_APPLY.format(kind=kind, amount=amount, rows='old_rows', sign='-')}
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    {_POSTGRES_APPLY.format(kind=kind, amount=amount, rows='new_rows', sign='')}
+                END IF;
+                RETURN NULL;
+            END $$""",
+            f"""CREATE TRIGGER {table}_rollup_ai AFTER INSERT ON {table}
+                REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION {table}_rollup()""",
+            f"""CREATE TRIGGER {table}_rollup_au AFTER UPDATE ON {table}
+                REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION {table}_rollup()""",
+            f"""CREATE TRIGGER {table}_rollup_ad AFTER DELETE ON {table}
+                REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION {table}_rollup()""",
+        ]
+    return statements
+
+
+def install_rollups(connection):
+    """Create the rollup maintenance triggers unless they already exist."""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        installed = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'invoices_rollup_ai'")
+        ).first()
+        statements = _sqlite_ddl()
+    elif dialect == "postgresql":
+        installed = connection.execute(
+            text("SELECT 1 FROM pg_trigger WHERE tgname = 'invoices_rollup_ai'")
+        ).first()
+        statements = _postgres_ddl()
+    else:
+        return
+    if installed:
+        return
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _install_rollups_after_create(target, connection, **kw):
+    install_rollups(connection)
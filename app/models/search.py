@@ -0,0 +1,136 @@
+"""
+Full-text search indexes for invoices and expenses.
+
+SQLite: FTS5 tables `invoices_fts` / `expenses_fts` whose rowid is the
+source row id. Postgres: a `search_vector` tsvector column with a GIN index
+on each table. Either way, triggers keep the index in sync with every write
+path (ORM, bulk inserts, set-based updates). An invoice document covers
+client_name, invoice_number and all of its item descriptions; an expense
+document covers category and description.
+
+Each FTS document also carries an `owner` token (`u<owner_id>`) so a
+search only walks the caller's postings.
+
+The statements are installed by `install_search` after `create_all`;
+migration 0006 carries a frozen copy for existing databases, so changes here
+need a new revision.
+"""
+from sqlalchemy import event, inspect, text
+from .base import Base
+
+SQLITE_TOKENIZER = "unicode61 remove_diacritics 2"
+
+_ITEMS_OF = "coalesce((SELECT group_concat(description, ' ') FROM invoice_items WHERE invoice_id = {id}), '')"
+
+SQLITE_DDL = [
+    f"CREATE VIRTUAL TABLE invoices_fts USING fts5("
+    f"owner, client_name, invoice_number, items, tokenize='{SQLITE_TOKENIZER}')",
+    f"CREATE VIRTUAL TABLE expenses_fts USING fts5(owner, category, description, tokenize='{SQLITE_TOKENIZER}')",
+    """CREATE TRIGGER invoices_fts_ai AFTER INSERT ON invoices BEGIN
+        INSERT INTO invoices_fts(rowid, owner, client_name, invoice_number, items)
+        VALUES (new.id, 'u' || new.owner_id, new.client_name, new.invoice_number, '');
+    END""",
+    """CREATE TRIGGER invoices_fts_au AFTER UPDATE OF client_name, invoice_number, owner_id ON invoices BEGIN
+        UPDATE invoices_fts SET owner = 'u' || new.owner_id, client_name = new.client_name,
+            invoice_number = new.invoice_number
+        WHERE rowid = new.id;
+    END""",
+    """CREATE TRIGGER invoices_fts_ad AFTER DELETE ON invoices BEGIN
+        DELETE FROM invoices_fts WHERE rowid = old.id;
+    END""",
+    # appending keeps bulk item inserts O(1) per row
+    """CREATE TRIGGER invoice_items_fts_ai AFTER INSERT ON invoice_items BEGIN
+        UPDATE invoices_fts SET items = trim(items || ' ' || coalesce(new.description, ''))
+        WHERE rowid = new.invoice_id;
+    END""",
+    f"""CREATE TRIGGER invoice_items_fts_au AFTER UPDATE OF description, invoice_id ON invoice_items BEGIN
+        UPDATE invoices_fts SET items = {_ITEMS_OF.format(id="old.invoice_id")} WHERE rowid = old.invoice_id;
+        UPDATE invoices_fts SET items = {_ITEMS_OF.format(id="new.invoice_id")} WHERE rowid = new.invoice_id;
+    END""",
+    f"""CREATE TRIGGER invoice_items_fts_ad AFTER DELETE ON invoice_items BEGIN
+        UPDATE invoices_fts SET items = {_ITEMS_OF.format(id="old.invoice_id")} WHERE rowid = old.invoice_id;
+    END""",
+    """CREATE TRIGGER expenses_fts_ai AFTER INSERT ON expenses BEGIN
+        INSERT INTO expenses_fts(rowid, owner, category, description)
+        VALUES (new.id, 'u' || new.owner_id, new.category, new.description);
+    END""",
+    """CREATE TRIGGER expenses_fts_au AFTER UPDATE OF category, description, owner_id ON expenses BEGIN
+        UPDATE expenses_fts SET owner = 'u' || new.owner_id, category = new.category,
+            description = new.description
+        WHERE rowid = new.id;
+    END""",
+    """CREATE TRIGGER expenses_fts_ad AFTER DELETE ON expenses BEGIN
+        DELETE FROM expenses_fts WHERE rowid = old.id;
+    END""",
+    # index rows that existed before the search tables
+    f"""INSERT INTO invoices_fts(rowid, owner, client_name, invoice_number, items)
+        SELECT id, 'u' || owner_id, client_name, invoice_number, {_ITEMS_OF.format(id="invoices.id")}
+        FROM invoices""",
+    """INSERT INTO expenses_fts(rowid, owner, category, description)
+        SELECT id, 'u' || owner_id, category, description FROM expenses""",
+]
+
+POSTGRES_DDL = [
+    "ALTER TABLE invoices ADD COLUMN search_vector tsvector",
+    """CREATE OR REPLACE FUNCTION invoice_search_doc(inv_id integer, client text, number text)
+    RETURNS tsvector LANGUAGE sql STABLE AS $$
+        SELECT to_tsvector('simple', coalesce(client, '') || ' ' || coalesce(number, '') || ' ' ||
+            coalesce((SELECT string_agg(description, ' ') FROM invoice_items WHERE invoice_id = inv_id), ''))
+    $$""",
+    """CREATE OR REPLACE FUNCTION invoices_search_row() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        NEW.search_vector := invoice_search_doc(NEW.id, NEW.client_name, NEW.invoice_number);
+        RETURN NEW;
+    END $$""",
+    """CREATE TRIGGER invoices_search_row BEFORE INSERT OR UPDATE OF client_name, invoice_number
+        ON invoices FOR EACH ROW EXECUTE FUNCTION invoices_search_row()""",
+    # statement-level with transition tables: one refresh per bulk item insert
+    """CREATE OR REPLACE FUNCTION invoice_items_search_refresh() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        UPDATE invoices i SET search_vector = invoice_search_doc(i.id, i.client_name, i.invoice_number)
+        WHERE i.id IN (SELECT invoice_id FROM changed_items);
+        RETURN NULL;
+    END $$""",
+    """CREATE TRIGGER invoice_items_search_ai AFTER INSERT ON invoice_items
+        REFERENCING NEW TABLE AS changed_items FOR EACH STATEMENT EXECUTE FUNCTION invoice_items_search_refresh()""",
+    """CREATE TRIGGER invoice_items_search_au AFTER UPDATE ON invoice_items
+        REFERENCING NEW TABLE AS changed_items FOR EACH STATEMENT EXECUTE FUNCTION invoice_items_search_refresh()""",
+    """CREATE TRIGGER invoice_items_search_ad AFTER DELETE ON invoice_items
+        REFERENCING OLD TABLE AS changed_items FOR EACH STATEMENT EXECUTE FUNCTION invoice_items_search_refresh()""",
+    "UPDATE invoices SET search_vector = invoice_search_doc(id, client_name, invoice_number)",
+    "CREATE INDEX ix_invoices_search ON invoices USING gin (search_vector)",
+    """ALTER TABLE expenses ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        to_tsvector('simple', coalesce(category, '') || ' ' || coalesce(description, ''))) STORED""",
+    "CREATE INDEX ix_expenses_search ON expenses USING gin (search_vector)",
+]
+
+
+def install_search(connection):
+    """Create the search indexes and triggers unless they already exist."""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        installed = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'invoices_fts'")
+        ).first()
+        statements = SQLITE_DDL
+    elif dialect == "postgresql":
+        installed = any(c["name"] == "search_vector" for c in inspect(connection).get_columns("invoices"))
+        statements = POSTGRES_DDL
+    else:
+        return
+    if installed:
+        return
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _install_search_after_create(target, connection, **kw):
+    install_search(connection)
+
+
+@event.listens_for(Base.metadata, "before_drop")
+def _drop_search_before_drop(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("DROP TABLE IF EXISTS invoices_fts")
+        connection.exec_driver_sql("DROP TABLE IF EXISTS expenses_fts")
@@ -1,10 +1,12 @@
-from sqlalchemy import Column, Integer, String, Numeric, ForeignKey
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
 
 class TaxConfig(BaseModel):
     __tablename__ = "tax_configs"
+    # owner's configs in id order (the first one is the default rate)
+    __table_args__ = (Index("ix_tax_configs_owner_id", "owner_id", "id"),)
 
     name = Column(String, nullable=False)          # e.g., "Standard VAT"
     country = Column(String, nullable=True)        # optional country code
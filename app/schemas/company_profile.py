@@ -1,10 +1,24 @@
-from pydantic import BaseModel
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from pydantic import BaseModel, field_validator
+
+
+def valid_timezone(name: str | None) -> str | None:
+    if name is None:
+        return None
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone: {name}")
+    return name
 
 
 class CompanyProfileUpdate(BaseModel):
     header_text: str | None = None
     tax_label: str | None = None
     tax_note: str | None = None
+    timezone: str | None = None
+
+    _check_timezone = field_validator("timezone")(valid_timezone)
 
 
 class CompanyProfileOut(BaseModel):
@@ -13,6 +27,7 @@ class CompanyProfileOut(BaseModel):
     header_text: str | None
     tax_label: str | None
     tax_note: str | None
+    timezone: str | None = None
 
     class Config:
         from_attributes = True
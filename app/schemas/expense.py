@@ -23,4 +23,8 @@ class ExpenseOut(BaseModel):
     status: str
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ExpensePage(BaseModel):
+    items: list[ExpenseOut]
+    next_cursor: str | None = None
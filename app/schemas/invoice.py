@@ -1,12 +1,13 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
 from typing import List
 from decimal import Decimal
 
 class InvoiceItemCreate(BaseModel):
     description: str
-    quantity: Decimal = 1
-    unit_price: Decimal
+    # bounded to the invoice_items columns so oversized amounts fail validation, not the INSERT
+    quantity: Decimal = Field(1, max_digits=10, decimal_places=2)
+    unit_price: Decimal = Field(max_digits=12, decimal_places=2)
 
 class InvoiceCreate(BaseModel):
     invoice_number: str
@@ -32,7 +33,8 @@ class InvoiceItemOut(BaseModel):
     class Config:
         from_attributes = True
 
-class InvoiceOut(BaseModel):
+class InvoiceHeaderOut(BaseModel):
+    """Invoice without its line items, for listings that only need totals."""
     id: int
     invoice_number: str
     issue_date: datetime
@@ -45,7 +47,36 @@ class InvoiceOut(BaseModel):
     status: str
     tax_label: str | None = None
     tax_note: str | None = None
-    items: List[InvoiceItemOut] = []
 
     class Config:
         from_attributes = True
+
+class InvoiceOut(InvoiceHeaderOut):
+    items: List[InvoiceItemOut] = []
+
+
+class InvoicePage(BaseModel):
+    items: List[InvoiceOut | InvoiceHeaderOut]
+    next_cursor: str | None = None
+
+
+class InvoiceBulkResult(BaseModel):
+    line: int
+    ok: bool
+    id: int | None = None
+    invoice_number: str | None = None
+    error: str | None = None
+
+
+class DraftRecalculation(BaseModel):
+    """Which drafts to re-total, and at what rate (default: the owner's default tax config)."""
+    tax_rate: Decimal | None = None
+    client_name: str | None = None
+    currency: str | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+
+
+class DraftRecalculationResult(BaseModel):
+    updated: int
+    tax_rate: Decimal
@@ -0,0 +1,114 @@
+"""
+Per-call authentication cost, before and after the shared resolver.
+
+    python -m benchmarks.bench_auth [--keys 50] [--calls 2000] [--concurrency 200]
+
+"legacy scan" replays the old path (load the user, then hash the presented
+key against every stored key); the other rows go through app.core.auth.
+
+The concurrent rows run `--calls` cached resolutions with `--concurrency` in
+flight on one event loop. "threadpool" is the shape of a dependency that
+needs a sync session (every call takes a worker thread, as the old
+`get_current_user` did through `get_db`); "event loop" is the current path,
+which only leaves the loop on a miss.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from contextlib import contextmanager
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+from app import models  # noqa: F401
+from app.core.auth import _load, resolve_credentials, resolve_credentials_async
+from app.core.auth_cache import credential_digest, principal_cache
+from app.core.last_used import last_used_buffer
+from app.core.security import create_access_token
+from app.crud.api_key import create_api_key, get_user_api_keys, verify_api_key_plain
+from app.crud.user import get_user_by_id
+from app.models.base import Base
+from app.models.user import User
+
+
+def _per_call_us(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=50, help="API keys stored for the user")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200, help="requests in flight at once")
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    user = User(email="bench@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    # the key under test is the oldest one, as with a long-lived CI key
+    _, plain = create_api_key(db, user.id, "bench")
+    for i in range(args.keys - 1):
+        create_api_key(db, user.id, f"k{i}")
+    token = create_access_token({"sub": user.email})
+
+    def legacy_scan():
+        owner = get_user_by_id(db, user.id)
+        assert owner and any(verify_api_key_plain(plain, k) for k in get_user_api_keys(db, user.id))
+
+    def uncached(kind, credential):
+        digest = credential_digest(kind, credential)
+        return lambda: _load(db, kind, credential, digest)
+
+    @contextmanager
+    def scope():
+        yield db
+
+    async def concurrent_us(resolve) -> float:
+        """Wall time per call with `--concurrency` calls in flight."""
+        gate = asyncio.Semaphore(args.concurrency)
+
+        async def one():
+            async with gate:
+                await resolve()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(args.calls)))
+        return (time.perf_counter() - start) / args.calls * 1e6
+
+    async def via_threadpool():
+        await run_in_threadpool(resolve_credentials, db, None, plain)
+
+    async def on_event_loop():
+        await resolve_credentials_async(scope, None, plain)
+
+    rows = [
+        ("api key, legacy scan", _per_call_us(legacy_scan, args.calls)),
+        ("api key, indexed lookup", _per_call_us(uncached("key", plain), args.calls)),
+        ("jwt, uncached", _per_call_us(uncached("jwt", token), args.calls)),
+    ]
+    resolve_credentials(db, None, plain)
+    resolve_credentials(db, f"Bearer {token}", None)
+    rows.append(("api key, cached", _per_call_us(lambda: resolve_credentials(db, None, plain), args.calls)))
+    rows.append(("jwt, cached", _per_call_us(lambda: resolve_credentials(db, f"Bearer {token}", None), args.calls)))
+    rows.append((f"cached, threadpool x{args.concurrency}", asyncio.run(concurrent_us(via_threadpool))))
+    rows.append((f"cached, event loop x{args.concurrency}", asyncio.run(concurrent_us(on_event_loop))))
+
+    print(f"{args.keys} keys on the user, {args.calls} calls each; cache {principal_cache.stats()}")
+    for name, us in rows:
+        print(f"{name:<30} {us:>10.1f} us/call")
+    last_used_buffer.clear()
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
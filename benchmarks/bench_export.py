@@ -0,0 +1,90 @@
+"""
+Peak memory of a full-ledger export: list-style vs streaming.
+
+    python -m benchmarks.bench_export [--rows 20000 80000]
+
+"list" loads every Expense as an ORM object and serializes one JSON array,
+as a sync through the list endpoints did; "stream csv/ndjson" consumes
+app.crud.export chunk by chunk. Peak is measured with tracemalloc, so the
+streaming rows should stay flat as the row count grows.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from decimal import Decimal
+
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import models  # noqa: F401
+from app.crud.export import expense_rows, serialize
+from app.models.base import Base
+from app.models.expense import Expense
+from app.models.user import User
+from app.schemas.expense import ExpenseOut
+
+
+def _measure(fn) -> tuple[float, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[20000, 80000], help="ledger sizes to compare")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            user = User(email="bench@example.com", hashed_password="x")
+            db.add(user)
+            db.commit()
+            owner_id = user.id
+
+        loaded = 0
+        print(f"{'rows':>8} {'mode':<14} {'peak MiB':>9} {'seconds':>8}")
+        for target in sorted(args.rows):
+            with Session() as db:
+                batch = [
+                    {"amount": Decimal("12.34"), "category": "Travel", "description": f"expense {n}", "owner_id": owner_id}
+                    for n in range(loaded, target)
+                ]
+                for i in range(0, len(batch), 10000):
+                    db.execute(insert(Expense), batch[i:i + 10000])
+                db.commit()
+                loaded = target
+
+            def as_list():
+                with Session() as db:
+                    rows = db.query(Expense).filter(Expense.owner_id == owner_id).all()
+                    json.dumps([ExpenseOut.model_validate(r).model_dump(mode="json") for r in rows])
+
+            def streamed(fmt):
+                def run():
+                    with Session() as db:
+                        names, rows = expense_rows(db, owner_id)
+                        for _ in serialize(names, rows, fmt):
+                            pass
+                return run
+
+            for mode, fn in (("list", as_list), ("stream csv", streamed("csv")), ("stream ndjson", streamed("ndjson"))):
+                peak, seconds = _measure(fn)
+                print(f"{target:>8} {mode:<14} {peak:>9.1f} {seconds:>8.2f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
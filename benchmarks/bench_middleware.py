@@ -0,0 +1,110 @@
+"""
+Per-request overhead of the rate-limit/HTTPS middleware.
+
+    python -m benchmarks.bench_middleware [--requests 3000]
+
+Runs the same FastAPI app three ways (no middleware, the previous
+@app.middleware("http") implementation, and the ASGI RateLimitMiddleware)
+against a JSON route and a 256 KiB StreamingResponse, in-process via httpx.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("SECRET_KEY", "bench")
+
+import httpx
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.core.config import settings
+from app.core.middleware import RateLimitMiddleware
+from app.core.ratelimit import build_limiter, route_cost
+
+CHUNK = b"%PDF" + b"x" * 16_380
+
+
+def _build(kind: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/json")
+    def json_route():
+        return {"status": "ok"}
+
+    @app.get("/stream")
+    def stream_route():
+        return StreamingResponse(iter([CHUNK] * 16), media_type="application/pdf")
+
+    if kind == "asgi":
+        app.add_middleware(RateLimitMiddleware)
+    elif kind == "legacy":
+
+        @app.middleware("http")
+        async def rate_limit(request, call_next):
+            limiter = getattr(app.state, "limiter", build_limiter(None, 10**9, 60))
+            key = request.headers.get("x-api-key") or request.client.host
+            try:
+                limiter.check(key, cost=route_cost(request.url.path, settings.RATE_LIMIT_ROUTE_COSTS))
+                forwarded_proto = request.headers.get("x-forwarded-proto")
+                if forwarded_proto and forwarded_proto != "https":
+                    raise HTTPException(status_code=400, detail="HTTPS required")
+            except HTTPException as exc:
+                return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+            return await call_next(request)
+
+    # same generous limit for every variant; the legacy one rebuilds per request
+    if kind == "asgi":
+        app.state.limiter = build_limiter(None, 10**9, 60)
+    return app
+
+
+async def _measure(apps: dict[str, FastAPI], path: str, requests: int) -> dict[str, list[float]]:
+    """Interleave variants request by request so drift affects all of them equally."""
+    clients = {
+        kind: httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver")
+        for kind, app in apps.items()
+    }
+    samples = {kind: [] for kind in apps}
+    try:
+        for i in range(requests + 50):
+            for kind, client in clients.items():
+                start = time.perf_counter()
+                response = await client.get(path)
+                elapsed = (time.perf_counter() - start) * 1e6
+                assert response.status_code == 200
+                if i >= 50:  # warm-up
+                    samples[kind].append(elapsed)
+    finally:
+        for client in clients.values():
+            await client.aclose()
+    return samples
+
+
+def _pct(samples: list[float], q: float) -> float:
+    return statistics.quantiles(samples, n=100)[q - 1]
+
+
+async def _main(requests: int):
+    for path in ("/json", "/stream"):
+        print(path)
+        samples = await _measure({kind: _build(kind) for kind in ("none", "legacy", "asgi")}, path, requests)
+        base50, base99 = _pct(samples["none"], 50), _pct(samples["none"], 99)
+        for kind, values in samples.items():
+            p50, p99 = _pct(values, 50), _pct(values, 99)
+            print(
+                f"  {kind:<7} p50 {p50:8.1f} us   p99 {p99:8.1f} us   "
+                f"overhead p50 {p50 - base50:+7.1f} us  p99 {p99 - base99:+7.1f} us"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=3000)
+    args = parser.parse_args()
+    asyncio.run(_main(args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Memory of the in-memory rate limiter under scanning traffic.
+
+    python -m benchmarks.bench_ratelimit [--keys 2000000] [--max-keys 100000]
+
+Every request comes from a new key (an IP sweep). The token bucket's key
+table and traced memory should plateau at `--max-keys`; pass `--legacy` to
+replay the old unbounded fixed-window dict alongside for comparison.
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from app.core.ratelimit import TokenBucketRateLimiter
+
+
+class _LegacyFixedWindow:
+    """The previous SimpleRateLimiter: one never-evicted dict entry per key."""
+
+    def __init__(self, max_requests: int, window_seconds: int = 60):
+        self.max_requests = max_requests
+        self.window = window_seconds
+        self.store = {}
+
+    def check(self, key: str):
+        now = time.time()
+        count, start = self.store.get(key, (0, now))
+        if now - start > self.window:
+            self.store[key] = (1, now)
+            return
+        self.store[key] = (count + 1, start)
+
+
+def _run(limiter, keys: int, checkpoints: int):
+    step = keys // checkpoints
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(keys):
+        limiter.check(f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}:{i}")
+        if (i + 1) % step == 0:
+            current, _ = tracemalloc.get_traced_memory()
+            print(f"  {i + 1:>10,} keys  table={len(limiter.store):>10,}  traced={current / 2**20:8.1f} MiB")
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+    print(f"  {elapsed / keys * 1e6:.2f} us/check (tracemalloc on)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=2_000_000)
+    parser.add_argument("--max-keys", type=int, default=100_000)
+    parser.add_argument("--checkpoints", type=int, default=8)
+    parser.add_argument("--legacy", action="store_true")
+    args = parser.parse_args()
+
+    print(f"token bucket, max_keys={args.max_keys:,}")
+    _run(TokenBucketRateLimiter(120, 60, args.max_keys), args.keys, args.checkpoints)
+    if args.legacy:
+        print("legacy fixed window (unbounded)")
+        _run(_LegacyFixedWindow(120, 60), args.keys, args.checkpoints)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Draft re-totalling: per-row ORM loop vs the set-based UPDATE.
+
+    python -m benchmarks.bench_recalc [--drafts 100000] [--items 3]
+
+Both runs start from the same file-backed SQLite database. "orm loop" loads
+each draft with its items and re-totals it in Python (the only option before
+recalculate_draft_totals); "set-based" is one UPDATE ... FROM.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from decimal import Decimal
+
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import selectinload, sessionmaker
+
+from app import models  # noqa: F401
+from app.crud.invoice import recalculate_draft_totals
+from app.models.base import Base
+from app.models.invoice import Invoice, InvoiceItem, InvoiceStatus
+from app.models.user import User
+
+
+def _seed(url: str, drafts: int, items: int) -> int:
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        user = User(email="bench@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        for start in range(0, drafts, 10000):
+            count = min(10000, drafts - start)
+            db.execute(
+                insert(Invoice),
+                [
+                    {"invoice_number": f"B-{n}", "client_name": "Bench", "subtotal": 0, "tax_amount": 0, "total": 0,
+                     "status": InvoiceStatus.draft, "owner_id": user.id}
+                    for n in range(start, start + count)
+                ],
+            )
+        invoice_ids = db.execute(select(Invoice.id)).scalars().all()
+        for start in range(0, len(invoice_ids), 10000):
+            db.execute(
+                insert(InvoiceItem),
+                [
+                    {"invoice_id": invoice_id, "description": "x", "quantity": Decimal("2"),
+                     "unit_price": Decimal("10.25"), "line_total": Decimal("20.50"), "owner_id": user.id}
+                    for invoice_id in invoice_ids[start:start + 10000]
+                    for _ in range(items)
+                ],
+            )
+        db.commit()
+        owner_id = user.id
+    engine.dispose()
+    return owner_id
+
+
+def orm_loop(db, owner_id: int, rate: Decimal):
+    drafts = (
+        db.query(Invoice)
+        .options(selectinload(Invoice.items))
+        .filter(Invoice.owner_id == owner_id, Invoice.status == InvoiceStatus.draft)
+        .all()
+    )
+    for invoice in drafts:
+        subtotal = sum((item.line_total for item in invoice.items), Decimal("0"))
+        invoice.subtotal = subtotal
+        invoice.tax_amount = subtotal * rate / 100
+        invoice.total = subtotal + invoice.tax_amount
+    db.commit()
+    return len(drafts)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--drafts", type=int, default=100_000)
+    parser.add_argument("--items", type=int, default=3, help="items per draft")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seed = os.path.join(tmp, "seed.db")
+        owner_id = _seed(f"sqlite:///{seed}", args.drafts, args.items)
+        print(f"{args.drafts} drafts x {args.items} items")
+        for name, run in (
+            ("orm loop", lambda db: orm_loop(db, owner_id, Decimal("20"))),
+            ("set-based", lambda db: recalculate_draft_totals(db, owner_id, tax_rate=Decimal("20"))[0]),
+        ):
+            path = os.path.join(tmp, f"{name.replace(' ', '_')}.db")
+            shutil.copy(seed, path)
+            engine = create_engine(f"sqlite:///{path}")
+            with sessionmaker(bind=engine)() as db:
+                start = time.perf_counter()
+                updated = run(db)
+                print(f"{name:<10} {updated:>8} rows {time.perf_counter() - start:>8.2f} s")
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 import os
 import sys
+import tempfile
+from contextlib import contextmanager
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 # ensure project root on path
@@ -10,9 +12,16 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
+# keep rendered PDFs out of the working tree
+os.environ.setdefault("PDF_CACHE_DIR", tempfile.mkdtemp(prefix="pdf-cache-"))
+
 from app.main import app
 from app.db import session as db_session
 from app.models.base import Base
+from app.core.auth_cache import principal_cache
+from app.core.last_used import last_used_buffer
+from app.core.pdf_cache import pdf_cache
+from app.core.report_cache import report_cache
 # import models to register with Base.metadata
 from app import models  # noqa: F401
 
@@ -20,6 +29,18 @@ from app import models  # noqa: F401
 @pytest.fixture(scope="session")
 def engine():
     engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+
+    # pysqlite does not emit BEGIN itself before SAVEPOINT, so a savepoint
+    # release would commit for real; take over transaction control (see the
+    # SQLAlchemy pysqlite "serializable isolation / savepoints" recipe)
+    @event.listens_for(engine, "connect")
+    def _no_implicit_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _explicit_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
     Base.metadata.create_all(bind=engine)
     return engine
 
@@ -28,7 +49,8 @@ def engine():
 def db(engine):
     connection = engine.connect()
     transaction = connection.begin()
-    SessionLocal = sessionmaker(bind=connection)
+    # savepoint per session transaction so code under test may commit or roll back freely
+    SessionLocal = sessionmaker(bind=connection, join_transaction_mode="create_savepoint")
     db = SessionLocal()
 
     # override dependency
@@ -38,7 +60,20 @@ def db(engine):
         finally:
             pass
 
+    @contextmanager
+    def test_scope():
+        yield db
+
+    async def override_get_session_scope():
+        return test_scope
+
     app.dependency_overrides[db_session.get_db] = override_get_db
+    app.dependency_overrides[db_session.get_session_scope] = override_get_session_scope
+    principal_cache.clear()
+    app.state.limiter = None  # rebuilt lazily with the configured limits
+    last_used_buffer.clear()
+    pdf_cache.clear()
+    report_cache.clear()
 
     yield db
 
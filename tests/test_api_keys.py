@@ -17,3 +17,87 @@ def test_api_key_allows_access(client):
     r = client.get("/api/v1/expenses", headers={"X-API-KEY": api_key})
     assert r.status_code == 200
     assert r.json() == []
+
+
+def test_api_key_lookup_rejects_expired_and_revoked(client, db):
+    from datetime import datetime, timedelta, timezone
+    from app.models.api_key import ApiKey
+
+    r = client.post("/api/v1/auth/register", json={"email": "keys2@example.com", "password": "secret123"})
+    token = r.json()["access_token"]
+    auth = {"Authorization": f"Bearer {token}"}
+
+    created = [client.post("/api/v1/auth/api-keys", json={"name": f"k{i}"}, headers=auth).json() for i in range(3)]
+    expired, revoked, live = created
+
+    db.query(ApiKey).filter(ApiKey.id == expired["id"]).update(
+        {"expires_at": datetime.now(timezone.utc) - timedelta(days=1)}
+    )
+    db.flush()
+    assert client.delete(f"/api/v1/auth/api-keys/{revoked['id']}", headers=auth).status_code == 200
+
+    assert client.get("/api/v1/expenses", headers={"X-API-KEY": expired["plain_key"]}).status_code == 401
+    assert client.get("/api/v1/expenses", headers={"X-API-KEY": revoked["plain_key"]}).status_code == 401
+    assert client.get("/api/v1/expenses", headers={"X-API-KEY": live["plain_key"]}).status_code == 200
+    # a valid key presented under another user id is rejected
+    forged = live["plain_key"].replace("mcp_u", "mcp_u9", 1)
+    assert client.get("/api/v1/expenses", headers={"X-API-KEY": forged}).status_code == 401
+
+
+def test_cached_api_key_is_dropped_on_revoke(client):
+    from app.core.auth_cache import principal_cache
+
+    r = client.post("/api/v1/auth/register", json={"email": "keys3@example.com", "password": "secret123"})
+    auth = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    key = client.post("/api/v1/auth/api-keys", json={"name": "cached"}, headers=auth).json()
+    headers = {"X-API-KEY": key["plain_key"]}
+
+    before = principal_cache.stats()
+    assert client.get("/api/v1/expenses", headers=headers).status_code == 200
+    assert client.get("/api/v1/expenses", headers=headers).status_code == 200
+    after = principal_cache.stats()
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] >= 1
+
+    assert client.delete(f"/api/v1/auth/api-keys/{key['id']}", headers=auth).status_code == 200
+    assert client.get("/api/v1/expenses", headers=headers).status_code == 401
+
+
+def test_last_used_at_is_written_behind(client, db):
+    from app.core.last_used import last_used_buffer
+    from app.models.api_key import ApiKey
+
+    r = client.post("/api/v1/auth/register", json={"email": "keys4@example.com", "password": "secret123"})
+    auth = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    key = client.post("/api/v1/auth/api-keys", json={"name": "wb"}, headers=auth).json()
+
+    for _ in range(3):
+        assert client.get("/api/v1/expenses", headers={"X-API-KEY": key["plain_key"]}).status_code == 200
+    assert db.get(ApiKey, key["id"]).last_used_at is None
+
+    assert last_used_buffer.flush(db) == 1
+    db.expire_all()
+    assert db.get(ApiKey, key["id"]).last_used_at is not None
+
+
+def test_cached_credentials_resolve_without_opening_a_session(client, db):
+    from contextlib import contextmanager
+    from app.db.session import get_session_scope
+
+    r = client.post("/api/v1/auth/register", json={"email": "keys5@example.com", "password": "secret123"})
+    auth = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    opened = []
+
+    @contextmanager
+    def counting_scope():
+        opened.append(1)
+        yield db
+
+    async def override():
+        return counting_scope
+
+    client.app.dependency_overrides[get_session_scope] = override
+    assert client.get("/api/v1/expenses", headers=auth).status_code == 200
+    assert len(opened) == 1  # miss: one session, in a worker thread
+    assert client.get("/api/v1/expenses", headers=auth).status_code == 200
+    assert len(opened) == 1  # hit: answered on the event loop
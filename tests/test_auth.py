@@ -14,3 +14,25 @@ def test_register_and_login(client):
     )
     assert resp2.status_code == 200
     assert resp2.json()["access_token"]
+
+
+def test_login_returns_503_when_hash_pool_is_saturated(client, monkeypatch):
+    from app.api.v1 import auth
+    from app.core.passwords import PasswordHasher
+
+    client.post("/api/v1/auth/register", json={"email": "busy@example.com", "password": "secret123"})
+    saturated = PasswordHasher(workers=1, max_queue=0)
+    assert saturated._slots.acquire(blocking=False)  # the only slot is taken
+    monkeypatch.setattr(auth, "password_hasher", saturated)
+
+    resp = client.post(
+        "/api/v1/auth/login",
+        data={"username": "busy@example.com", "password": "secret123"},
+        headers={"content-type": "application/x-www-form-urlencoded"},
+    )
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
+    assert saturated.stats()["rejected"] == 1
+
+    metrics = client.get("/metrics").json()
+    assert metrics["password_hashing"]["completed"] >= 1
@@ -0,0 +1,144 @@
+import asyncio
+import email
+from email import policy
+import socket
+from datetime import datetime, timezone
+import pytest
+from aiosmtpd.controller import Controller
+from app.core.outbox import OutboxWorker
+from app.models.outbox import OutboxEmail, OutboxStatus
+
+
+class SinkHandler:
+    """Collects delivered messages; `reject` maps a recipient to an SMTP reply."""
+
+    def __init__(self):
+        self.messages = []
+        self.peers = set()
+        self.reject = {}
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.reject:
+            return self.reject[address]
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(email.message_from_bytes(envelope.content, policy=policy.default))
+        self.peers.add(session.peer)
+        return "250 Message accepted"
+
+
+@pytest.fixture
+def smtp_sink():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    handler = SinkHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    yield handler, port
+    controller.stop()
+
+
+def _invoice(client, auth):
+    payload = {
+        "invoice_number": "MAIL-1",
+        "due_date": "2026-12-31T00:00:00Z",
+        "client_name": "Mail Client",
+        "items": [{"description": "Work", "quantity": "1", "unit_price": "40"}],
+    }
+    return client.post("/api/v1/invoices", json=payload, headers=auth).json()["id"]
+
+
+def _drain(worker, db):
+    async def go():
+        try:
+            return await worker.drain_once(db)
+        finally:
+            await worker.close()
+    return asyncio.run(go())
+
+
+def test_email_is_queued_then_delivered_in_one_batch(client, db, smtp_sink):
+    handler, port = smtp_sink
+    r = client.post("/api/v1/auth/register", json={"email": "mailer@example.com", "password": "secret123"})
+    auth = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    invoice_id = _invoice(client, auth)
+
+    for to in ("a@example.com", "b@example.com"):
+        r = client.post(f"/api/v1/invoices/{invoice_id}/email", params={"to": to}, headers=auth)
+        assert r.status_code == 200 and r.json()["status"] == "queued"
+    assert handler.messages == []  # nothing is sent on the request path
+
+    worker = OutboxWorker("127.0.0.1", port, starttls=False)
+    assert _drain(worker, db) == 2
+    assert sorted(m["To"] for m in handler.messages) == ["a@example.com", "b@example.com"]
+    assert len(handler.peers) == 1  # both sent over the same connection
+    attachment = next(handler.messages[0].iter_attachments())
+    assert attachment.get_filename() == "invoice_MAIL-1.pdf"
+    assert attachment.get_payload(decode=True).startswith(b"%PDF")
+
+    db.expire_all()
+    rows = db.query(OutboxEmail).all()
+    assert {row.status for row in rows} == {OutboxStatus.sent}
+    assert _drain(worker, db) == 0
+
+
+def test_transient_failures_back_off_and_permanent_ones_dead_letter(client, db, smtp_sink):
+    handler, port = smtp_sink
+    handler.reject = {"later@example.com": "451 Try again later", "nobody@example.com": "550 No such user"}
+    r = client.post("/api/v1/auth/register", json={"email": "retry@example.com", "password": "secret123"})
+    auth = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    invoice_id = _invoice(client, auth)
+    for to in ("later@example.com", "nobody@example.com", "ok@example.com"):
+        client.post(f"/api/v1/invoices/{invoice_id}/email", params={"to": to}, headers=auth)
+
+    worker = OutboxWorker("127.0.0.1", port, starttls=False, backoff_seconds=60, max_attempts=2)
+    assert _drain(worker, db) == 3
+    db.expire_all()
+    rows = {row.to_address: row for row in db.query(OutboxEmail).all()}
+    assert rows["ok@example.com"].status == OutboxStatus.sent
+    assert rows["nobody@example.com"].status == OutboxStatus.dead
+    assert "550" in rows["nobody@example.com"].last_error
+    later = rows["later@example.com"]
+    assert later.status == OutboxStatus.pending and later.attempts == 1
+    assert later.next_attempt_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc)
+    assert _drain(worker, db) == 0  # not due yet
+
+    # second failure exhausts max_attempts
+    later.next_attempt_at = datetime.now(timezone.utc)
+    db.commit()
+    assert _drain(worker, db) == 1
+    db.expire_all()
+    assert db.get(OutboxEmail, later.id).status == OutboxStatus.dead
+    assert worker.stats() == {"sent": 1, "retried": 1, "dead_lettered": 2}
+
+
+def test_unbuildable_email_is_dead_lettered_without_blocking_the_batch(client, db, smtp_sink):
+    from app.crud.outbox import enqueue_email
+
+    handler, port = smtp_sink
+    r = client.post("/api/v1/auth/register", json={"email": "inject@example.com", "password": "secret123"})
+    auth = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    invoice_id = _invoice(client, auth)
+    bad = "bad@example.com\r\nBcc: x@evil.com"
+    r = client.post(f"/api/v1/invoices/{invoice_id}/email", params={"to": bad}, headers=auth)
+    assert r.status_code == 422
+
+    # a row queued before recipients were validated must not wedge the outbox
+    for to in ("first@example.com", "second@example.com"):
+        client.post(f"/api/v1/invoices/{invoice_id}/email", params={"to": to}, headers=auth)
+    owner_id = db.query(OutboxEmail.owner_id).first()[0]
+    enqueue_email(db, owner_id, bad, subject="Invoice MAIL-1", body="Injected", invoice_id=invoice_id)
+    db.commit()
+
+    worker = OutboxWorker("127.0.0.1", port, starttls=False)
+    assert _drain(worker, db) == 3
+    assert sorted(m["To"] for m in handler.messages) == ["first@example.com", "second@example.com"]
+    assert all(m["Bcc"] is None for m in handler.messages)
+    db.expire_all()
+    dead = db.query(OutboxEmail).filter_by(to_address=bad).one()
+    assert dead.status == OutboxStatus.dead and "ValueError" in dead.last_error
+    assert worker.stats() == {"sent": 2, "retried": 0, "dead_lettered": 1}
+    assert _drain(worker, db) == 0
@@ -21,3 +21,47 @@ def test_create_and_update_expense(client):
     data = r.json()
     assert data["status"] == "approved"
     assert data["amount"] == "45.00"
+
+
+def test_expense_export_streams_csv_and_ndjson(client):
+    import csv
+    import io
+    import json
+
+    r = client.post("/api/v1/auth/register", json={"email": "expexport@example.com", "password": "secret123"})
+    auth = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    for n, category in enumerate(["Travel", "Office", "Travel"]):
+        payload = {"amount": f"{n + 1}.50", "category": category, "description": f"e{n}"}
+        client.post("/api/v1/expenses", json=payload, headers=auth)
+
+    r = client.get("/api/v1/expenses/export", headers=auth)
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert [row["description"] for row in rows] == ["e0", "e1", "e2"]  # oldest first
+    assert rows[0]["amount"] == "1.50" and rows[0]["status"] == "pending"
+
+    r = client.get("/api/v1/expenses/export", params={"format": "ndjson", "category": "Travel"}, headers=auth)
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert [line["description"] for line in lines] == ["e0", "e2"]
+    assert client.get("/api/v1/expenses/export", params={"format": "xml"}, headers=auth).status_code == 422
+
+
+def test_expense_search(client, db):
+    from sqlalchemy import update
+    from app.models.expense import Expense
+
+    r = client.post("/api/v1/auth/register", json={"email": "expsearch@example.com", "password": "secret123"})
+    auth = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    for category, description in [("Travel", "Taxi to airport"), ("Meals", "Client lunch, travel day"), ("Office", "Paper")]:
+        client.post("/api/v1/expenses", json={"amount": "1", "category": category, "description": description}, headers=auth)
+    exp_id = client.get("/api/v1/expenses/search", params={"q": "paper"}, headers=auth).json()[0]["id"]
+
+    r = client.get("/api/v1/expenses/search", params={"q": "trav"}, headers=auth)
+    assert r.status_code == 200
+    assert [e["description"] for e in r.json()] == ["Taxi to airport", "Client lunch, travel day"]
+
+    db.execute(update(Expense).where(Expense.id == exp_id).values(description="Printer toner"))
+    db.commit()
+    assert client.get("/api/v1/expenses/search", params={"q": "paper"}, headers=auth).json() == []
+    assert len(client.get("/api/v1/expenses/search", params={"q": "toner"}, headers=auth).json()) == 1
+    assert client.get("/api/v1/expenses/search", params={"q": ""}, headers=auth).status_code == 422
@@ -24,3 +24,303 @@ def test_create_invoice_with_items(client):
     assert data["tax_amount"] == "25.00"
     assert data["total"] == "275.00"
     assert len(data["items"]) == 2
+
+
+def test_create_invoice_is_one_transaction_with_batched_items(db):
+    from sqlalchemy import event
+    from app.crud.invoice import create_invoice
+    from app.crud.user import create_user
+    from app.schemas.invoice import InvoiceCreate
+
+    user = create_user(db, "bulk@example.com", hashed_password="x")
+    data = InvoiceCreate(
+        invoice_number="INV-BATCH",
+        due_date="2026-12-31T00:00:00Z",
+        client_name="Batch Client",
+        items=[{"description": f"Line {i}", "quantity": "1", "unit_price": "10"} for i in range(20)],
+    )
+    statements = []
+    engine = db.get_bind().engine
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split()[0].upper() + " " + statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        invoice = create_invoice(db, data, user.id)
+        inserts = [s for s in statements if s.startswith("INSERT")]
+        assert sum("invoice_items" in s for s in inserts) == 1
+        assert not any(s.startswith("INSERT") and "company_profiles" in s for s in statements)
+        statements.clear()
+        assert len(invoice.items) == 20
+        assert invoice.subtotal == Decimal("200")
+        assert statements == []  # items came back eagerly loaded
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def test_bulk_import_ndjson_reports_each_row(client):
+    import json
+
+    r = client.post("/api/v1/auth/register", json={"email": "bulkimp@example.com", "password": "secret123"})
+    auth = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    def row(number, unit_price="5"):
+        return json.dumps({
+            "invoice_number": number,
+            "due_date": "2026-12-31T00:00:00Z",
+            "client_name": "Bulk Client",
+            "items": [{"description": "Work", "quantity": "2", "unit_price": unit_price}],
+        })
+
+    body = "\n".join([
+        row("B-1"), row("B-2"), "{not json", row("B-1"), "", row("B-3"), row("B-4", unit_price="1e15"),
+    ]) + "\n"
+    r = client.post("/api/v1/invoices/bulk?chunk_size=2", content=body, headers=auth)
+    assert r.status_code == 200
+    results = [json.loads(line) for line in r.text.splitlines()]
+    assert [(x["line"], x["ok"]) for x in results] == [
+        (1, True), (2, True), (3, False), (4, False), (6, True), (7, False),
+    ]
+    assert "UNIQUE" in results[3]["error"] or "unique" in results[3]["error"]
+    assert "unit_price" in results[5]["error"]  # would overflow NUMERIC(12, 2) on Postgres
+
+    listed = client.get("/api/v1/invoices", headers=auth).json()
+    assert sorted(inv["invoice_number"] for inv in listed) == ["B-1", "B-2", "B-3"]
+    assert all(len(inv["items"]) == 1 for inv in listed)
+
+
+def test_invoice_listing_uses_keyset_cursor_and_filters(client):
+    r = client.post("/api/v1/auth/register", json={"email": "pages@example.com", "password": "secret123"})
+    auth = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    for i in range(7):
+        payload = {
+            "invoice_number": f"P-{i}",
+            "due_date": "2026-12-31T00:00:00Z",
+            "client_name": "Acme" if i % 2 else "Globex",
+            "currency": "EUR" if i == 3 else "USD",
+            "items": [{"description": "x", "quantity": "1", "unit_price": "1"}],
+        }
+        assert client.post("/api/v1/invoices", json=payload, headers=auth).status_code == 200
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        r = client.get("/api/v1/invoices", params=params, headers=auth)
+        assert r.status_code == 200
+        seen += [inv["invoice_number"] for inv in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    # rows created within the same second are still ordered and never repeated
+    assert seen == [f"P-{i}" for i in reversed(range(7))]
+
+    r = client.get("/api/v1/invoices", params={"client_name": "Acme", "currency": "USD"}, headers=auth)
+    assert [inv["invoice_number"] for inv in r.json()] == ["P-5", "P-1"]
+    assert client.get("/api/v1/invoices", params={"status": "paid"}, headers=auth).json() == []
+    assert client.get("/api/v1/invoices", params={"cursor": "garbage"}, headers=auth).status_code == 400
+
+
+def test_invoice_list_query_count_is_independent_of_page_size(db):
+    from sqlalchemy import event
+    from app.crud.invoice import create_invoice, get_invoices
+    from app.crud.user import create_user
+    from app.schemas.invoice import InvoiceCreate, InvoiceHeaderOut, InvoiceOut
+
+    owner_id = create_user(db, "nplus1@example.com", hashed_password="x").id
+    for i in range(12):
+        create_invoice(db, InvoiceCreate(
+            invoice_number=f"N-{i}",
+            due_date="2026-12-31T00:00:00Z",
+            client_name="Client",
+            items=[{"description": "a", "unit_price": "1"}, {"description": "b", "unit_price": "2"}],
+        ), owner_id)
+    db.expire_all()
+
+    engine = db.get_bind().engine
+    selects = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append(statement)
+
+    def count(limit, include_items):
+        selects.clear()
+        invoices, _ = get_invoices(db, owner_id, limit=limit, include_items=include_items)
+        schema = InvoiceOut if include_items else InvoiceHeaderOut
+        out = [schema.model_validate(inv) for inv in invoices]
+        assert len(out) == limit
+        db.expire_all()
+        return len(selects)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        assert count(2, True) == count(10, True) == 2
+        assert count(2, False) == count(10, False) == 1
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def test_invoice_list_header_only(client):
+    r = client.post("/api/v1/auth/register", json={"email": "hdr@example.com", "password": "secret123"})
+    auth = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    payload = {
+        "invoice_number": "H-1",
+        "due_date": "2026-12-31T00:00:00Z",
+        "client_name": "Header Client",
+        "items": [{"description": "x", "quantity": "1", "unit_price": "3"}],
+    }
+    client.post("/api/v1/invoices", json=payload, headers=auth)
+    full = client.get("/api/v1/invoices", headers=auth).json()
+    assert len(full[0]["items"]) == 1
+    header = client.get("/api/v1/invoices", params={"include_items": "false"}, headers=auth).json()
+    assert "items" not in header[0] and header[0]["total"] == "3.00"
+
+
+def test_invoice_export_batches_rows_and_keeps_session_empty(db, monkeypatch):
+    import json
+    from app.crud import export
+    from app.crud.user import create_user
+    from app.models.invoice import Invoice
+
+    monkeypatch.setattr(export, "EXPORT_BATCH_ROWS", 2)
+    owner_id = create_user(db, "ledger@example.com", hashed_password="x").id
+    db.add_all(
+        Invoice(invoice_number=f"L-{n}", client_name="Ledger", total=Decimal(n), owner_id=owner_id) for n in range(5)
+    )
+    db.commit()
+    db.expunge_all()
+
+    names, rows = export.invoice_rows(db, owner_id)
+    chunks = list(export.serialize(names, rows, "ndjson"))
+    assert len(chunks) == 3  # 2 + 2 + 1 rows
+    lines = [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+    assert [line["invoice_number"] for line in lines] == [f"L-{n}" for n in range(5)]
+    assert lines[3]["total"] == "3.00" and lines[3]["status"] == "draft"
+    assert len(db.identity_map) == 0  # plain rows, no ORM objects
+
+
+def test_recalculate_drafts_uses_new_default_rate_in_one_update(client, db):
+    from sqlalchemy import event
+
+    r = client.post("/api/v1/auth/register", json={"email": "recalc@example.com", "password": "secret123"})
+    auth = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    ids = []
+    for n in range(3):
+        payload = {
+            "invoice_number": f"R-{n}",
+            "due_date": "2026-12-31T00:00:00Z",
+            "client_name": "Recalc",
+            "items": [
+                {"description": "a", "quantity": "2", "unit_price": "50"},
+                {"description": "b", "quantity": "1", "unit_price": "25.50"},
+            ],
+        }
+        ids.append(client.post("/api/v1/invoices", json=payload, headers=auth).json()["id"])
+    client.patch(f"/api/v1/invoices/{ids[2]}", json={"status": "sent"}, headers=auth)
+    client.post("/api/v1/tax/configs", json={"name": "VAT", "rate": "20"}, headers=auth)
+
+    engine = db.get_bind().engine
+    updates = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("UPDATE"):
+            updates.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        r = client.post("/api/v1/invoices/recalculate-drafts", json={}, headers=auth)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert r.status_code == 200, r.text
+    assert r.json()["updated"] == 2 and Decimal(r.json()["tax_rate"]) == 20
+    assert len(updates) == 1
+
+    draft = client.get(f"/api/v1/invoices/{ids[0]}", headers=auth).json()
+    assert (draft["subtotal"], draft["tax_amount"], draft["total"]) == ("125.50", "25.10", "150.60")
+    sent = client.get(f"/api/v1/invoices/{ids[2]}", headers=auth).json()
+    assert sent["total"] == "125.50"  # only drafts change
+
+    r = client.post("/api/v1/invoices/recalculate-drafts", json={"tax_rate": "0", "client_name": "Nobody"}, headers=auth)
+    assert r.json()["updated"] == 0
+
+
+def test_invoice_search_ranks_matches_and_is_owner_scoped(client):
+    def register(email):
+        r = client.post("/api/v1/auth/register", json={"email": email, "password": "secret123"})
+        return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    auth, other = register("search@example.com"), register("search-other@example.com")
+    docs = [
+        ("S-1", "Acme Corp", "Consulting services"),
+        ("S-2", "Globex", "Consulting"),
+        ("S-3", "Acme Corp", "Hardware"),
+        ("S-4", "Initech", "Acme licence"),
+    ]
+    ids = {}
+    for number, client_name, description in docs:
+        payload = {
+            "invoice_number": number, "due_date": "2026-12-31T00:00:00Z", "client_name": client_name,
+            "items": [{"description": description, "quantity": "1", "unit_price": "10"}],
+        }
+        ids[number] = client.post("/api/v1/invoices", json=payload, headers=auth).json()["id"]
+    payload["invoice_number"] = "OTHER-1"
+    client.post("/api/v1/invoices", json=payload, headers=other)
+
+    r = client.get("/api/v1/invoices/search", params={"q": "acme consult"}, headers=auth)
+    assert r.status_code == 200
+    assert [inv["invoice_number"] for inv in r.json()] == ["S-1"]
+    assert r.json()[0]["items"][0]["description"] == "Consulting services"
+
+    # a client-name hit outranks a line-item hit
+    r = client.get("/api/v1/invoices/search", params={"q": "acme", "limit": 2}, headers=auth)
+    first = [inv["invoice_number"] for inv in r.json()]
+    assert "S-4" not in first and len(first) == 2
+    r = client.get(
+        "/api/v1/invoices/search",
+        params={"q": "acme", "cursor": r.headers["X-Next-Cursor"], "include_items": "false"},
+        headers=auth,
+    )
+    assert [inv["invoice_number"] for inv in r.json()] == ["S-4"] and "items" not in r.json()[0]
+    assert "X-Next-Cursor" not in r.headers
+
+    r = client.get("/api/v1/invoices/search", params={"q": "licence"}, headers=other)
+    assert [inv["invoice_number"] for inv in r.json()] == ["OTHER-1"]
+    assert client.get("/api/v1/invoices/search", params={"q": "x", "cursor": "bogus"}, headers=auth).status_code == 400
+
+
+def test_invoice_search_index_follows_writes(db):
+    from sqlalchemy import delete, insert, update
+    from app.crud.invoice import create_invoice
+    from app.crud.search import search_invoices
+    from app.crud.user import create_user
+    from app.models.invoice import Invoice, InvoiceItem
+    from app.schemas.invoice import InvoiceCreate
+
+    user = create_user(db, "searchsync@example.com", hashed_password="x")
+    invoice = create_invoice(
+        db,
+        InvoiceCreate(invoice_number="SYNC-1", due_date="2026-12-31T00:00:00Z", client_name="Umbrella", items=[]),
+        user.id,
+    )
+
+    def found(q):
+        return [inv.id for inv in search_invoices(db, user.id, q)[0]]
+
+    # Core bulk insert bypasses the ORM entirely
+    db.execute(insert(InvoiceItem), [
+        {"invoice_id": invoice.id, "description": d, "quantity": 1, "unit_price": 1, "line_total": 1, "owner_id": user.id}
+        for d in ("Café setup", "Onboarding")
+    ])
+    assert found("cafe") == [invoice.id] and found("onboard") == [invoice.id]
+
+    db.execute(update(InvoiceItem).where(InvoiceItem.description == "Onboarding").values(description="Training"))
+    assert found("onboard") == [] and found("training") == [invoice.id]
+    db.execute(delete(InvoiceItem).where(InvoiceItem.description == "Training"))
+    assert found("training") == [] and found("cafe") == [invoice.id]
+
+    db.execute(update(Invoice).where(Invoice.id == invoice.id).values(client_name="Wayne"))
+    assert found("umbrella") == [] and found("wayne cafe") == [invoice.id]
+    db.execute(delete(InvoiceItem))
+    db.execute(delete(Invoice).where(Invoice.id == invoice.id))
+    assert found("wayne") == []
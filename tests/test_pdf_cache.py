@@ -0,0 +1,117 @@
+import io
+import os
+import zipfile
+from app.core.pdf_cache import PdfCache, pdf_cache
+from app.core.pdf_export import shutdown_pdf_pool
+
+
+def _invoice(client, auth, number="PDF-1"):
+    payload = {
+        "invoice_number": number,
+        "due_date": "2026-12-31T00:00:00Z",
+        "client_name": "Pdf Client",
+        "items": [{"description": "Work", "quantity": "2", "unit_price": "10"}],
+    }
+    r = client.post("/api/v1/invoices", json=payload, headers=auth)
+    assert r.status_code == 200, r.text
+    return r.json()["id"]
+
+
+def test_pdf_is_rendered_once_then_served_from_disk(client):
+    r = client.post("/api/v1/auth/register", json={"email": "pdf@example.com", "password": "secret123"})
+    auth = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    invoice_id = _invoice(client, auth)
+
+    first = client.get(f"/api/v1/invoices/{invoice_id}/pdf", headers=auth)
+    assert first.status_code == 200 and first.content.startswith(b"%PDF")
+    second = client.get(f"/api/v1/invoices/{invoice_id}/pdf", headers=auth)
+    assert second.content == first.content
+    assert second.headers["content-disposition"] == "attachment; filename=invoice_PDF-1.pdf"
+    assert pdf_cache.stats()["misses"] == 1 and pdf_cache.stats()["hits"] == 1
+
+    # the PDF does not show the status, so a status change keeps the cached file
+    r = client.patch(f"/api/v1/invoices/{invoice_id}", json={"status": "sent"}, headers=auth)
+    assert r.status_code == 200
+    client.get(f"/api/v1/invoices/{invoice_id}/pdf", headers=auth)
+    assert pdf_cache.stats()["misses"] == 1 and pdf_cache.stats()["hits"] == 2
+
+    # new totals are a new document
+    r = client.patch(f"/api/v1/invoices/{invoice_id}", json={"status": "draft"}, headers=auth)
+    client.post("/api/v1/invoices/recalculate-drafts", json={"tax_rate": "10"}, headers=auth)
+    client.get(f"/api/v1/invoices/{invoice_id}/pdf", headers=auth)
+    assert pdf_cache.stats()["misses"] == 2
+
+
+def test_pdf_cache_evicts_least_recently_served(tmp_path):
+    cache = PdfCache(str(tmp_path), max_bytes=250)
+    cache.put(1, "a", b"x" * 100)
+    cache.put(2, "a", b"x" * 100)
+    assert cache.get(1, "a")  # 1 is now the most recent
+    cache.put(3, "a", b"x" * 100)
+    assert cache.get(2, "a") is None
+    assert cache.get(1, "a") and cache.get(3, "a")
+    assert sorted(os.listdir(tmp_path)) == ["1-a.pdf", "3-a.pdf"]
+
+    # a new process picks up the files already on disk
+    reopened = PdfCache(str(tmp_path), max_bytes=250)
+    assert reopened.get(3, "a")
+    assert reopened.stats()["bytes"] == 200
+
+
+def test_export_streams_zip_of_matching_invoices(client):
+    r = client.post("/api/v1/auth/register", json={"email": "zip@example.com", "password": "secret123"})
+    auth = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    ids = [_invoice(client, auth, number=f"ZIP/{n}") for n in range(3)]
+    client.patch(f"/api/v1/invoices/{ids[0]}", json={"status": "paid"}, headers=auth)
+    client.get(f"/api/v1/invoices/{ids[1]}/pdf", headers=auth)  # one already cached
+
+    try:
+        r = client.get("/api/v1/invoices/export/pdf", params={"status": "draft"}, headers=auth)
+    finally:
+        shutdown_pdf_pool()
+    assert r.status_code == 200, r.text
+    assert r.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(r.content)) as archive:
+        assert sorted(archive.namelist()) == ["invoice_ZIP_1.pdf", "invoice_ZIP_2.pdf"]
+        assert all(archive.read(name).startswith(b"%PDF") for name in archive.namelist())
+    # the fresh render was added to the cache
+    assert pdf_cache.stats()["entries"] == 2
+
+    # "ZIP/1" and "ZIP_1" sanitize to the same name; both must survive in the archive
+    twin = _invoice(client, auth, number="ZIP_1")
+    try:
+        r = client.get("/api/v1/invoices/export/pdf", params={"status": "draft"}, headers=auth)
+    finally:
+        shutdown_pdf_pool()
+    with zipfile.ZipFile(io.BytesIO(r.content)) as archive:
+        names = archive.namelist()
+    assert len(names) == len(set(names)) == 3
+    assert "invoice_ZIP_2.pdf" in names and any(name in names for name in (f"invoice_ZIP_1_{twin}.pdf",
+                                                                           f"invoice_ZIP_1_{ids[1]}.pdf"))
+
+
+def test_pdf_and_qr_answer_if_none_match_with_304(client):
+    r = client.post("/api/v1/auth/register", json={"email": "etag@example.com", "password": "secret123"})
+    auth = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    invoice_id = _invoice(client, auth)
+
+    for path in (f"/api/v1/invoices/{invoice_id}/pdf", f"/api/v1/invoices/{invoice_id}/qrcode"):
+        first = client.get(path, headers=auth)
+        etag = first.headers["etag"]
+        assert first.status_code == 200 and not etag.startswith("W/")
+        assert first.headers["cache-control"] == "private, no-cache"
+        again = client.get(path, headers={**auth, "If-None-Match": etag})
+        assert again.status_code == 304 and again.content == b""
+        assert again.headers["etag"] == etag
+        assert client.get(path, headers={**auth, "If-None-Match": '"other"'}).status_code == 200
+
+    # validators follow what each document shows: a status change revalidates both,
+    # new totals change the PDF
+    pdf_etag = client.get(f"/api/v1/invoices/{invoice_id}/pdf", headers=auth).headers["etag"]
+    qr_etag = client.get(f"/api/v1/invoices/{invoice_id}/qrcode", headers=auth).headers["etag"]
+    client.patch(f"/api/v1/invoices/{invoice_id}", json={"status": "sent"}, headers=auth)
+    assert client.get(f"/api/v1/invoices/{invoice_id}/pdf", headers={**auth, "If-None-Match": pdf_etag}).status_code == 304
+    assert client.get(f"/api/v1/invoices/{invoice_id}/qrcode", headers={**auth, "If-None-Match": qr_etag}).status_code == 304
+    client.patch(f"/api/v1/invoices/{invoice_id}", json={"status": "draft"}, headers=auth)
+    client.post("/api/v1/invoices/recalculate-drafts", json={"tax_rate": "10"}, headers=auth)
+    assert client.get(f"/api/v1/invoices/{invoice_id}/pdf", headers={**auth, "If-None-Match": pdf_etag}).status_code == 200
@@ -0,0 +1,157 @@
+"""
+Query-plan regression tests: every hot tenant query must use an index.
+
+The SQL is captured from the real CRUD/report code and re-run under EXPLAIN.
+SQLite always runs; Postgres runs when TEST_POSTGRES_URL points at a scratch
+database (tables are created and dropped there).
+"""
+import json
+import os
+from datetime import datetime, timezone
+from decimal import Decimal
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1 import reporting
+from app.core.auth_cache import Principal
+from app.crud import api_key as api_key_crud
+from app.crud import expense as expense_crud
+from app.crud import invoice as invoice_crud
+from app.crud import search as search_crud
+from app.crud import tax_config as tax_crud
+from app.crud.pagination import encode_cursor
+from app.crud.user import create_user
+from app.models.base import Base
+from app.models.expense import Expense, ExpenseStatus
+from app.models.invoice import InvoiceStatus
+from app.schemas.invoice import InvoiceCreate, InvoiceItemCreate
+from app.schemas.tax_config import TaxConfigCreate
+
+TENANT_TABLES = {"invoices", "invoice_items", "expenses", "tax_configs", "api_keys", "report_rollups"}
+# shared reference data, probed per report group: a scan here would scale with rate history
+TENANT_TABLES |= {"fx_rates"}
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def plan_engine(request, engine):
+    if request.param == "sqlite":
+        yield engine
+        return
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL not set")
+    pg = create_engine(url)
+    Base.metadata.create_all(bind=pg)
+    yield pg
+    Base.metadata.drop_all(bind=pg)
+    pg.dispose()
+
+
+def _capture_hot_queries(session) -> list[tuple[str, object]]:
+    """Run the hot read paths once and return the SELECTs they emitted."""
+    user = create_user(session, "plans@example.com", hashed_password="x")
+    owner_id = user.id
+    principal = Principal(id=owner_id, email=user.email)
+    tax_crud.create_tax_config(session, owner_id, TaxConfigCreate(name="VAT", country="DE", rate=Decimal("19")))
+    invoice = invoice_crud.create_invoice(
+        session,
+        InvoiceCreate(
+            invoice_number="PLAN-1",
+            due_date=datetime(2030, 1, 1),
+            client_name="Acme",
+            items=[InvoiceItemCreate(description="Work", quantity=Decimal("1"), unit_price=Decimal("10"))],
+        ),
+        owner_id,
+    )
+    session.add(Expense(category="Office", amount=Decimal("5"), owner_id=owner_id))
+    session.commit()
+    _, plain_key = api_key_crud.create_api_key(session, owner_id, name="plans")
+    cursor = encode_cursor(datetime.now(timezone.utc), invoice.id + 1)
+
+    captured = []
+
+    def before_execute(conn, cursor_, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    bind = session.get_bind().engine
+    event.listen(bind, "before_cursor_execute", before_execute)
+    try:
+        session.expire_all()
+        invoice_crud.get_invoices(session, owner_id)
+        invoice_crud.get_invoices(session, owner_id, cursor=cursor, status=InvoiceStatus.draft)
+        invoice_crud.get_invoice(session, invoice.id, owner_id)
+        expense_crud.get_expenses(session, owner_id)
+        expense_crud.get_expenses(session, owner_id, cursor=cursor, status=ExpenseStatus.pending)
+        tax_crud.get_default_tax_rate(session, owner_id)
+        tax_crud.list_tax_configs(session, owner_id)
+        api_key_crud.verify_api_key(session, plain_key)
+        api_key_crud.get_user_api_keys(session, owner_id)
+        search_crud.search_invoices(session, owner_id, "acme work")
+        search_crud.search_expenses(session, owner_id, "office")
+        reporting.summary(currency=None, db=session, current_user=principal)
+        reporting.summary(currency="USD", db=session, current_user=principal)
+        reporting.monthly(currency="USD", db=session, current_user=principal)
+        reporting.timeseries(granularity="week", tz="Europe/Berlin", db=session, current_user=principal)
+        reporting.aging(as_of=None, tz=None, limit=10, db=session, current_user=principal)
+    finally:
+        event.remove(bind, "before_cursor_execute", before_execute)
+    return captured
+
+
+def _is_tenant_scan(detail: str) -> bool:
+    # "SCAN t" is a full table scan and "SCAN t USING INDEX" a full index scan;
+    # SQLite before 3.36 writes "SCAN TABLE t"
+    words = detail.split()
+    if words[1:2] == ["TABLE"]:
+        del words[1]
+    return len(words) >= 2 and words[0] == "SCAN" and words[1] in TENANT_TABLES
+
+
+def test_scan_detector_reads_old_and_new_sqlite_plan_formats():
+    assert _is_tenant_scan("SCAN invoices")
+    assert _is_tenant_scan("SCAN TABLE invoices")
+    assert _is_tenant_scan("SCAN TABLE invoices USING INDEX ix_invoices_owner_due")
+    assert not _is_tenant_scan("SEARCH invoices USING INDEX ix_invoices_owner_due (owner_id=?)")
+    assert not _is_tenant_scan("SEARCH TABLE invoices USING INDEX ix_invoices_owner_due (owner_id=?)")
+
+
+def _sqlite_scans(conn, statement, parameters) -> list[str]:
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    return [row[-1] for row in rows if _is_tenant_scan(row[-1])]
+
+
+def _postgres_scans(conn, statement, parameters) -> list[str]:
+    # tiny test tables make a seq scan look cheapest; forbid it so a remaining
+    # seq scan means no index can serve the query
+    conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    result = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+    [plan] = json.loads(result) if isinstance(result, str) else result
+    scans, stack = [], [plan["Plan"]]
+    while stack:
+        node = stack.pop()
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in TENANT_TABLES:
+            scans.append(f"Seq Scan on {node['Relation Name']}")
+        stack.extend(node.get("Plans", []))
+    return scans
+
+
+def test_hot_queries_use_indexes(plan_engine):
+    connection = plan_engine.connect()
+    transaction = connection.begin()
+    session = sessionmaker(bind=connection, join_transaction_mode="create_savepoint")()
+    try:
+        captured = _capture_hot_queries(session)
+        assert captured
+        explain = _sqlite_scans if plan_engine.dialect.name == "sqlite" else _postgres_scans
+        failures = {}
+        for statement, parameters in captured:
+            scans = explain(connection, statement, parameters)
+            if scans:
+                failures[statement] = scans
+        assert not failures, json.dumps(failures, indent=2)
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
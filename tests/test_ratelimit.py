@@ -14,3 +14,69 @@ def test_rate_limit_blocks_after_threshold(client):
     assert r1.status_code == 200
     assert r2.status_code == 200
     assert r3.status_code == 429
+
+
+def test_token_bucket_caps_key_table_and_charges_route_costs():
+    import pytest
+    from fastapi import HTTPException
+    from app.core.ratelimit import TokenBucketRateLimiter, route_cost
+
+    limiter = TokenBucketRateLimiter(max_requests=10, window_seconds=60, max_keys=100)
+    for i in range(1000):
+        limiter.check(f"scanner-{i}")
+    assert len(limiter.store) == 100
+
+    costs = {"/api/v1/invoices/*/pdf": 5}
+    assert route_cost("/api/v1/invoices/7/pdf", costs) == 5
+    assert route_cost("/api/v1/invoices", costs) == 1
+    limiter.check("pdf-client", cost=5)
+    limiter.check("pdf-client", cost=5)
+    with pytest.raises(HTTPException) as exc:
+        limiter.check("pdf-client", cost=1)
+    assert exc.value.status_code == 429
+    assert int(exc.value.headers["Retry-After"]) >= 1
+
+    # a route costing more than the whole burst takes the full bucket instead of never passing
+    small = TokenBucketRateLimiter(max_requests=4, window_seconds=60)
+    small.check("pdf-client", cost=5)
+    with pytest.raises(HTTPException) as exc:
+        small.check("pdf-client", cost=5)
+    assert 1 <= int(exc.value.headers["Retry-After"]) <= 60
+
+
+def test_redis_limiter_single_script_local_block_and_fail_open():
+    import pytest
+    from fastapi import HTTPException
+    from app.core.ratelimit import RedisRateLimiter
+
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    limiter = RedisRateLimiter(None, max_requests=2, window_seconds=60, client=fakeredis.FakeRedis(server=server))
+
+    limiter.check("k")
+    limiter.check("k")
+    with pytest.raises(HTTPException) as exc:
+        limiter.check("k")
+    assert exc.value.status_code == 429
+    assert int(exc.value.headers["Retry-After"]) >= 1
+    assert "k" in limiter.blocked
+    # TTL tracks the bucket, not the time since the last request
+    assert 0 < limiter.r.pttl("rl:k") <= 60_000
+    limiter.check("costly", cost=5)  # clamped to the burst of 2
+
+    server.connected = False
+    with pytest.raises(HTTPException):
+        limiter.check("k")  # answered from the local block list, no Redis needed
+    limiter.check("other")  # Redis down: falls back to the in-process bucket
+    limiter.check("other")
+    with pytest.raises(HTTPException):
+        limiter.check("other")
+
+
+def test_middleware_rejects_plain_http_behind_proxy(client):
+    r = client.get("/api/v1/tools", headers={"X-Forwarded-Proto": "http", "Host": "api.example.com"})
+    assert r.status_code == 400
+    assert r.json() == {"detail": "HTTPS required"}
+    r = client.get("/api/v1/tools", headers={"X-Forwarded-Proto": "https", "Host": "api.example.com"})
+    assert r.status_code == 200
+    assert client.app.state.limiter is not None  # built once, then reused
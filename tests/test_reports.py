@@ -0,0 +1,335 @@
+from decimal import Decimal
+
+
+def _rollup(db, owner_id):
+    from sqlalchemy import select
+    from app.models.rollup import ReportRollup
+
+    rows = db.execute(
+        select(ReportRollup.kind, ReportRollup.month, ReportRollup.currency, ReportRollup.status,
+               ReportRollup.count, ReportRollup.total)
+        .where(ReportRollup.owner_id == owner_id, ReportRollup.count != 0)
+        .order_by(ReportRollup.kind, ReportRollup.month, ReportRollup.currency, ReportRollup.status)
+    )
+    return [tuple(row) for row in rows]
+
+
+def test_rollup_follows_every_write_path_and_matches_rebuild(db):
+    from sqlalchemy import delete, update
+    from app.crud.invoice import create_invoice, import_invoices, recalculate_draft_totals, update_invoice_status
+    from app.crud.rollup import rebuild_rollups
+    from app.crud.user import create_user
+    from app.models.expense import Expense, ExpenseStatus
+    from app.models.invoice import Invoice, InvoiceItem
+    from app.schemas.invoice import InvoiceCreate
+
+    user = create_user(db, "rollup@example.com", hashed_password="x")
+
+    def invoice(number, currency="USD"):
+        return {
+            "invoice_number": number, "due_date": "2026-12-31T00:00:00Z", "client_name": "Acme", "currency": currency,
+            "items": [{"description": "Work", "quantity": "2", "unit_price": "10"}],
+        }
+
+    first = create_invoice(db, InvoiceCreate(**invoice("R-1")), user.id)
+    list(import_invoices(db, [invoice("R-2"), invoice("R-3", "EUR")], user.id))
+    update_invoice_status(db, first.id, "paid", user.id)
+    recalculate_draft_totals(db, user.id, tax_rate=Decimal("10"))
+    db.add_all([
+        Expense(amount=Decimal("5.10"), currency="USD", category="Travel", owner_id=user.id),
+        Expense(amount=Decimal("2.20"), currency="USD", category="Office", owner_id=user.id),
+    ])
+    db.commit()
+    db.execute(update(Expense).where(Expense.category == "Office").values(status=ExpenseStatus.approved))
+    eur = db.query(Invoice).filter_by(invoice_number="R-3").one()
+    db.execute(delete(InvoiceItem).where(InvoiceItem.invoice_id == eur.id))
+    db.execute(delete(Invoice).where(Invoice.id == eur.id))
+    db.commit()
+
+    month = first.created_at.strftime("%Y-%m")
+    maintained = _rollup(db, user.id)
+    assert maintained == [
+        ("expense", month, "USD", "approved", 1, Decimal("2.20")),
+        ("expense", month, "USD", "pending", 1, Decimal("5.10")),
+        ("invoice", month, "USD", "draft", 1, Decimal("22.00")),
+        ("invoice", month, "USD", "paid", 1, Decimal("20.00")),
+    ]
+    rebuild_rollups(db, owner_id=user.id)
+    assert _rollup(db, user.id) == maintained
+
+
+def test_report_endpoints_read_the_rollup(client, db):
+    from sqlalchemy import event
+
+    r = client.post("/api/v1/auth/register", json={"email": "reports@example.com", "password": "secret123"})
+    auth = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    for number, currency in (("RP-1", "USD"), ("RP-2", "EUR")):
+        payload = {
+            "invoice_number": number, "due_date": "2026-12-31T00:00:00Z", "client_name": "Acme", "currency": currency,
+            "items": [{"description": "Work", "quantity": "1", "unit_price": "100"}],
+        }
+        client.post("/api/v1/invoices", json=payload, headers=auth)
+    client.post("/api/v1/expenses", json={"amount": "7.50", "category": "Travel"}, headers=auth)
+
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind().engine
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        r = client.get("/api/v1/reports/summary", headers=auth)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+    assert r.status_code == 200
+    data = r.json()
+    assert data["invoices"]["count"] == 2 and Decimal(data["invoices"]["total"]) == 200
+    assert data["invoices"]["by_currency"] == {"EUR": "100.00", "USD": "100.00"}
+    assert data["invoices"]["by_status"] == {"draft": "200.00"}
+    assert data["expenses"]["count"] == 1 and data["expenses"]["by_status"] == {"pending": "7.50"}
+    assert not any("FROM invoices" in s or "FROM expenses" in s for s in statements)
+
+    r = client.get("/api/v1/reports/monthly", headers=auth)
+    (month,) = r.json()["invoices"]
+    assert month["total"] == "200.00" and r.json()["expenses"][0]["total"] == "7.50"
+
+
+def test_timeseries_buckets_in_owner_timezone_in_one_query(client, db):
+    from datetime import datetime
+    from sqlalchemy import event
+    from app.models.expense import Expense
+    from app.models.invoice import Invoice
+    from app.models.user import User
+
+    r = client.post("/api/v1/auth/register", json={"email": "buckets@example.com", "password": "secret123"})
+    auth = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    owner_id = db.query(User.id).filter(User.email == "buckets@example.com").scalar()
+    # UTC instants either side of Berlin's 2026 DST start (01:00 UTC on Sunday 29 March)
+    stamps = ["2026-03-28 23:30:00", "2026-03-31 22:30:00", "2026-06-30 22:00:00"]
+    for n, stamp in enumerate(stamps):
+        db.add(Invoice(invoice_number=f"TS-{n}", client_name="Acme", total=10, owner_id=owner_id,
+                       created_at=datetime.fromisoformat(stamp)))
+    db.add(Expense(amount=4, category="Travel", owner_id=owner_id, created_at=datetime(2026, 3, 29, 0, 30)))
+    db.commit()
+
+    def periods(**params):
+        r = client.get("/api/v1/reports/timeseries", params=params, headers=auth)
+        assert r.status_code == 200, r.text
+        return [(b["period"], b["count"]) for b in r.json()["invoices"]], r.json()
+
+    assert periods()[0] == [("2026-03-01", 2), ("2026-06-01", 1)]  # UTC months
+    assert client.patch("/api/v1/company/profile", json={"timezone": "Europe/Berlin"}, headers=auth).status_code == 200
+
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if "UNION ALL" in statement:
+            statements.append(statement)
+
+    engine = db.get_bind().engine
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        months, data = periods()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+    assert len(statements) == 1
+    assert data["timezone"] == "Europe/Berlin"
+    assert months == [("2026-03-01", 1), ("2026-04-01", 1), ("2026-07-01", 1)]
+    assert data["expenses"] == [{"period": "2026-03-01", "count": 1, "total": "4.00"}]
+
+    assert periods(granularity="day")[0] == [("2026-03-29", 1), ("2026-04-01", 1), ("2026-07-01", 1)]
+    assert periods(granularity="week")[0] == [("2026-03-23", 1), ("2026-03-30", 1), ("2026-06-29", 1)]
+    assert periods(granularity="quarter")[0] == [("2026-01-01", 1), ("2026-04-01", 1), ("2026-07-01", 1)]
+    assert periods(granularity="year")[0] == [("2026-01-01", 3)]
+    assert periods(granularity="month", tz="Asia/Tokyo", created_from="2026-04-01T00:00:00")[0] == [
+        ("2026-04-01", 1), ("2026-07-01", 1),
+    ]
+    assert client.get("/api/v1/reports/timeseries", params={"tz": "Mars/Base"}, headers=auth).status_code == 400
+    assert client.get("/api/v1/reports/timeseries", params={"granularity": "hour"}, headers=auth).status_code == 422
+
+
+def test_report_cache_serves_polls_until_a_write_bumps_the_generation(client, db):
+    from sqlalchemy import event
+    from app.core.report_cache import report_cache
+
+    r = client.post("/api/v1/auth/register", json={"email": "cached@example.com", "password": "secret123"})
+    auth = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    client.post("/api/v1/expenses", json={"amount": "3.00", "category": "Travel"}, headers=auth)
+
+    reads = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if "report_rollups" in statement or "UNION ALL" in statement:
+            reads.append(statement)
+
+    engine = db.get_bind().engine
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        for _ in range(3):
+            assert client.get("/api/v1/reports/summary", headers=auth).json()["expenses"]["total"] == "3.00"
+            client.get("/api/v1/reports/timeseries", params={"granularity": "day"}, headers=auth)
+        assert len(reads) == 2
+        client.get("/api/v1/reports/timeseries", params={"granularity": "week"}, headers=auth)
+        assert len(reads) == 3  # parameters are part of the key
+
+        client.post("/api/v1/expenses", json={"amount": "4.00", "category": "Travel"}, headers=auth)
+        assert client.get("/api/v1/reports/summary", headers=auth).json()["expenses"]["total"] == "7.00"
+        assert len(reads) == 4
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+    assert report_cache.stats()["hits"] >= 4
+
+
+def test_redis_report_cache_is_shared_and_fails_open():
+    import pytest
+    from app.core.report_cache import RedisReportCache
+
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    worker_a = RedisReportCache(None, client=fakeredis.FakeRedis(server=server))
+    worker_b = RedisReportCache(None, client=fakeredis.FakeRedis(server=server))
+    computed = []
+
+    def compute(value):
+        def run():
+            computed.append(value)
+            return {"total": value}
+        return run
+
+    assert worker_a.get_or_compute(7, "summary", {}, compute("1.00")) == {"total": "1.00"}
+    assert worker_b.get_or_compute(7, "summary", {}, compute("unused")) == {"total": "1.00"}
+    worker_a.bump(7)
+    assert worker_b.get_or_compute(7, "summary", {}, compute("2.00")) == {"total": "2.00"}
+    assert worker_b.get_or_compute(8, "summary", {}, compute("other")) == {"total": "other"}
+    assert computed == ["1.00", "2.00", "other"]
+
+    disabled = RedisReportCache(None, ttl_seconds=0, client=fakeredis.FakeRedis(server=server))
+    assert disabled.get_or_compute(9, "summary", {}, compute("4.00")) == {"total": "4.00"}
+    assert disabled.get_or_compute(9, "summary", {}, compute("5.00")) == {"total": "5.00"}
+    assert not list(disabled.r.scan_iter("rc:9:*"))
+
+    server.connected = False
+    assert worker_a.get_or_compute(7, "summary", {}, compute("3.00")) == {"total": "3.00"}
+    assert worker_a.get_or_compute(7, "summary", {}, compute("unused")) == {"total": "3.00"}  # local fallback
+    assert worker_a.stats()["redis_available"] is False
+
+
+def test_aging_buckets_sent_invoices_by_days_past_due(client):
+    r = client.post("/api/v1/auth/register", json={"email": "aging@example.com", "password": "secret123"})
+    auth = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    invoices = [
+        ("AG-1", "Acme", "USD", "2026-10-20T00:00:00Z", "sent"),  # not yet due
+        ("AG-2", "Acme", "USD", "2026-10-17T12:00:00Z", "sent"),  # 1 day
+        ("AG-3", "Acme", "USD", "2026-09-18T00:00:00Z", "sent"),  # 30 days
+        ("AG-4", "Acme", "USD", "2026-09-17T23:00:00Z", "sent"),  # 31 days
+        ("AG-5", "Globex", "EUR", "2026-06-01T00:00:00Z", "sent"),  # 90+
+        ("AG-6", "Globex", "EUR", "2026-06-01T00:00:00Z", "paid"),
+        ("AG-7", "Globex", "EUR", "2026-06-01T00:00:00Z", "draft"),
+        ("AG-8", "Initech", "GBP", "2026-10-17T23:00:00-05:00", "sent"),  # 04:00Z on the 18th: not yet due
+    ]
+    for number, client_name, currency, due, status in invoices:
+        payload = {
+            "invoice_number": number, "due_date": due, "client_name": client_name, "currency": currency,
+            "items": [{"description": "Work", "quantity": "1", "unit_price": "10"}],
+        }
+        invoice_id = client.post("/api/v1/invoices", json=payload, headers=auth).json()["id"]
+        if status != "draft":
+            client.patch(f"/api/v1/invoices/{invoice_id}", json={"status": status}, headers=auth)
+
+    r = client.get("/api/v1/reports/aging", params={"as_of": "2026-10-18"}, headers=auth)
+    assert r.status_code == 200 and len(r.content) < 1024
+    data = r.json()
+    assert data["currencies"]["USD"] == {
+        "current": "10.00", "days_1_30": "20.00", "days_31_60": "10.00", "days_61_90": "0.00",
+        "days_over_90": "0.00", "total": "40.00",
+    }
+    assert data["currencies"]["EUR"]["days_over_90"] == "10.00"
+    assert data["currencies"]["GBP"]["current"] == "10.00"
+    assert [(c["client_name"], c["count"], c["total"]) for c in data["clients"]] == [
+        ("Acme", 4, "40.00"), ("Globex", 1, "10.00"), ("Initech", 1, "10.00"),
+    ]
+    assert data["clients_omitted"] == 0
+
+    r = client.get("/api/v1/reports/aging", params={"as_of": "2026-10-18", "limit": 1}, headers=auth)
+    assert [c["client_name"] for c in r.json()["clients"]] == ["Acme"] and r.json()["clients_omitted"] == 2
+    assert r.json()["currencies"]["EUR"]["total"] == "10.00"  # totals still cover every client
+
+    # AG-2 falls due at 21:00 on the 17th in Tokyo, so it is current there that day
+    r = client.get("/api/v1/reports/aging", params={"as_of": "2026-10-17", "tz": "Asia/Tokyo"}, headers=auth)
+    assert r.json()["currencies"]["USD"]["current"] == "20.00"
+
+    # paying an invoice invalidates the cached report
+    paid = client.get("/api/v1/invoices", params={"client_name": "Acme"}, headers=auth).json()[-1]["id"]
+    client.patch(f"/api/v1/invoices/{paid}", json={"status": "paid"}, headers=auth)
+    r = client.get("/api/v1/reports/aging", params={"as_of": "2026-10-18"}, headers=auth)
+    assert r.json()["currencies"]["USD"]["total"] == "30.00"
+
+
+def test_reports_convert_at_month_end_rates_and_list_unconverted(client, db):
+    import pytest
+    from app.crud.fx import load_rates_csv
+    from app.crud.rollup import monthly, summary
+    from app.crud.user import create_user
+    from app.models.rollup import ReportRollup
+
+    user = create_user(db, "fx@example.com", hashed_password="x")
+    db.add_all([
+        ReportRollup(owner_id=user.id, kind=kind, month=month, currency=currency, status="draft", count=1,
+                     total=Decimal(total))
+        for kind, month, currency, total in (
+            ("invoice", "2026-01", "USD", "110.00"),
+            ("invoice", "2026-02", "USD", "120.00"),
+            ("invoice", "2026-02", "EUR", "50.00"),
+            ("invoice", "2026-02", "JPY", "1000.00"),
+            ("invoice", "2026-02", "usd", "12.00"),
+            ("expense", "2026-02", "GBP", "10.00"),
+        )
+    ])
+    db.commit()
+    written = load_rates_csv(db, [
+        "date,currency,rate",
+        "2026-01-30,USD,1.00",  # superseded below: the last row for a key wins
+        "2026-01-30,USD,1.10",
+        "2026-02-27,USD,1.20",
+        "2026-03-02,USD,9.99",  # after February's month end
+        "2026-02-01,GBP,0.80",
+    ])
+    assert written == 4
+    load_rates_csv(db, ["date,currency,rate", "2026-02-27,USD,1.20"])  # re-applying is an upsert
+
+    report = summary(db, user.id, currency="eur")
+    assert report["invoices"]["converted"] == {"currency": "EUR", "total": "260.00", "unconverted": {"JPY": "1000.00"}}
+    assert report["expenses"]["converted"]["total"] == "12.50"
+    assert "converted" not in summary(db, user.id)["invoices"]
+
+    # USD target at each month end: EUR 50 -> 60 and GBP 10 -> 15 at the February rates;
+    # lowercase "usd" rows convert like "USD"
+    report = monthly(db, user.id, currency="USD")
+    assert report["invoices"] == [
+        {"month": "2026-01", "total": "110.00", "converted": "110.00", "unconverted": "0.00"},
+        {"month": "2026-02", "total": "1182.00", "converted": "192.00", "unconverted": "1000.00"},
+    ]
+    assert report["expenses"] == [{"month": "2026-02", "total": "10.00", "converted": "15.00", "unconverted": "0.00"}]
+
+    with pytest.raises(ValueError, match="line 3"):
+        load_rates_csv(db, ["date,currency,rate", "2026-03-01,CHF,0.95", "2026-03-01,SEK,-1"])
+    assert summary(db, user.id, currency="CHF")["invoices"]["converted"]["unconverted"]["EUR"] == "50.00"
+
+    r = client.post("/api/v1/auth/register", json={"email": "fx-api@example.com", "password": "secret123"})
+    auth = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    assert client.get("/api/v1/reports/summary", params={"currency": "US"}, headers=auth).status_code == 422
+    r = client.get("/api/v1/reports/summary", params={"currency": "usd"}, headers=auth)
+    assert r.status_code == 200 and r.json()["invoices"]["converted"]["currency"] == "USD"
+
+    # a rate load invalidates cached converted reports straight away
+    payload = {
+        "invoice_number": "FX-1", "due_date": "2026-12-31T00:00:00Z", "client_name": "Acme", "currency": "SEK",
+        "items": [{"description": "Work", "quantity": "1", "unit_price": "110"}],
+    }
+    client.post("/api/v1/invoices", json=payload, headers=auth)
+    r = client.get("/api/v1/reports/summary", params={"currency": "EUR"}, headers=auth)
+    assert r.json()["invoices"]["converted"] == {"currency": "EUR", "total": "0.00", "unconverted": {"SEK": "110.00"}}
+    load_rates_csv(db, ["date,currency,rate", "2000-01-01,SEK,11"])
+    r = client.get("/api/v1/reports/summary", params={"currency": "EUR"}, headers=auth)
+    assert r.json()["invoices"]["converted"] == {"currency": "EUR", "total": "10.00", "unconverted": {}}